@@ -0,0 +1,30 @@
+"""Add outbox priority
+
+Revision ID: 7c4e2b91a0d3
+Revises: 3f2a9c7d1e54
+Create Date: 2026-10-17 14:03:27.551930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c4e2b91a0d3'
+down_revision: Union[str, Sequence[str], None] = '3f2a9c7d1e54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notification_outbox', sa.Column('priority', sa.SmallInteger(), server_default='0', nullable=False))
+    op.create_index('ix_notification_outbox_priority_id', 'notification_outbox', [sa.text('priority DESC'), 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_notification_outbox_priority_id', table_name='notification_outbox')
+    op.drop_column('notification_outbox', 'priority')
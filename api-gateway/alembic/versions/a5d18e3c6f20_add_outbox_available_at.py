@@ -0,0 +1,28 @@
+"""Add outbox available_at
+
+Revision ID: a5d18e3c6f20
+Revises: 7c4e2b91a0d3
+Create Date: 2026-10-17 16:41:09.218734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5d18e3c6f20'
+down_revision: Union[str, Sequence[str], None] = '7c4e2b91a0d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notification_outbox', sa.Column('available_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('notification_outbox', 'available_at')
@@ -1,70 +1,252 @@
-import pika
-# import json
+import asyncio
+import itertools
+import aio_pika
+from aio_pika.abc import AbstractRobustConnection, AbstractChannel, AbstractExchange
+from aio_pika.exceptions import AMQPConnectionError, ChannelPreconditionFailed
+from typing import Optional
 from .config import settings
-from .models import NotificationRequest
-from pika.exceptions import AMQPConnectionError
+from .models import NotificationRequest, NotificationType
+from .priority import amqp_priority
+
+ROUTING_KEYS = {
+    NotificationType.email: 'email',
+    NotificationType.push: 'push',
+}
+
+QUEUE_NAMES = {
+    'email': 'email.queue',
+    'push': 'push.queue',
+}
+
+# Rejected messages (permanent failures, or transient ones past the last
+# retry tier) are dead-lettered to failed.queue through this exchange.
+DEAD_LETTER_EXCHANGE = 'notifications.dlx'
+FAILED_QUEUE = 'failed.queue'
+
+# Header in which consumers count how many retry tiers a message has passed.
+RETRY_COUNT_HEADER = 'x-retry-count'
+
+
+def retry_queue_name(routing_key: str, delay_seconds: int) -> str:
+    """
+    The TTL queue a consumer parks a message in to retry it after
+    `delay_seconds`, e.g. email.retry.30s. It is published to through the
+    default exchange and dead-letters back to notifications.direct with the
+    original routing key once the TTL expires.
+    """
+    return f"{routing_key}.retry.{delay_seconds}s"
+
 
 class AMQPPublisher:
-    def __init__(self, host, user, password):
-        self.credentials = pika.PlainCredentials(user, password)
-        self.parameters = pika.ConnectionParameters(host=host, credentials=self.credentials)
-        self.connection = None
-        self.channel = None
+    def __init__(
+        self,
+        host: str,
+        user: str,
+        password: str,
+        channel_pool_size: int = 4,
+        confirm_timeout: float = 5.0,
+        max_retries: int = 5,
+        initial_backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        max_priority: int = 10,
+        retry_delays: Optional[list[int]] = None
+    ):
+        self.host = host
+        self.user = user
+        self.password = password
+        self.channel_pool_size = channel_pool_size
+        self.confirm_timeout = confirm_timeout
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.max_priority = max_priority
+        self.retry_delays = retry_delays if retry_delays is not None else [5, 30, 300]
+
+        self.connection: Optional[AbstractRobustConnection] = None
+        self.channels: list[AbstractChannel] = []
         self.exchange_name = 'notifications.direct'
 
-    def connect(self):
-        """Establishes a connection and a channel."""
-        try:
-            self.connection = pika.BlockingConnection(self.parameters)
-            self.channel = self.connection.channel()
-            self.channel.exchange_declare(
-                exchange=self.exchange_name, 
-                exchange_type='direct',
+        self._next_channel = itertools.cycle(range(channel_pool_size))
+        self._connect_lock = asyncio.Lock()
+
+    async def connect(self):
+        """
+        Opens a robust connection and a pool of confirm-mode channels.
+        Retries with exponential backoff; once connected, aio-pika
+        restores the connection and its channels on its own.
+        """
+        async with self._connect_lock:
+            if self.is_connected:
+                return
+
+            delay = self.initial_backoff
+            for attempt in range(1, self.max_retries + 1):
+                try:
+                    self.connection = await aio_pika.connect_robust(
+                        host=self.host,
+                        login=self.user,
+                        password=self.password,
+                        reconnect_interval=self.initial_backoff
+                    )
+                    break
+                except (AMQPConnectionError, OSError) as e:
+                    print(f"Failed to connect to RabbitMQ (attempt {attempt}/{self.max_retries}): {e}")
+                    if attempt == self.max_retries:
+                        raise
+                    print(f"Retrying in {delay} seconds...")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.max_backoff)
+
+            self.channels = [
+                await self.connection.channel(publisher_confirms=True) # type: ignore
+                for _ in range(self.channel_pool_size)
+            ]
+            await self.channels[0].declare_exchange(
+                self.exchange_name,
+                aio_pika.ExchangeType.DIRECT,
                 durable=True
             )
-            print("AMQP Publisher connected and exchange declared.")
-        except AMQPConnectionError as e:
-            print(f"Failed to connect to RabbitMQ: {e}")
-            raise
+            await self._declare_queues()
+            print(f"AMQP Publisher connected with {self.channel_pool_size} channels and exchange declared.")
 
-    def publish_message(self, request: NotificationRequest):
-        """Publishes a notification request to the correct queue."""
-        if not self.channel or self.channel.is_closed:
+    async def _declare_queues(self):
+        """
+        Declares the consumer-side topology, so consumers never have to:
+
+        - email.queue/push.queue: priority queues bound to the main exchange
+          that dead-letter rejected messages to failed.queue.
+        - {routing_key}.retry.{delay}s: one TTL queue per retry tier that
+          dead-letters back to the main exchange with the original routing
+          key. A tier holds a single TTL, so messages expire in order.
+        - notifications.dlx -> failed.queue, where messages are parked.
+
+        A queue that already exists with other arguments cannot be
+        redeclared; it keeps working as it is until it is deleted and
+        recreated.
+        """
+        await self._declare(
+            FAILED_QUEUE,
+            {},
+            exchange_name=DEAD_LETTER_EXCHANGE,
+            exchange_type=aio_pika.ExchangeType.FANOUT
+        )
+
+        for routing_key, queue_name in QUEUE_NAMES.items():
+            await self._declare(
+                queue_name,
+                {"x-max-priority": self.max_priority, "x-dead-letter-exchange": DEAD_LETTER_EXCHANGE},
+                exchange_name=self.exchange_name,
+                routing_key=routing_key
+            )
+            for delay in self.retry_delays:
+                await self._declare(retry_queue_name(routing_key, delay), {
+                    "x-message-ttl": delay * 1000,
+                    "x-dead-letter-exchange": self.exchange_name,
+                    "x-dead-letter-routing-key": routing_key
+                })
+
+    async def _declare(
+        self,
+        queue_name: str,
+        arguments: dict,
+        exchange_name: Optional[str] = None,
+        exchange_type: aio_pika.ExchangeType = aio_pika.ExchangeType.DIRECT,
+        routing_key: Optional[str] = None
+    ):
+        """Declares a durable queue, and binds it to `exchange_name` when given."""
+        # A failed declaration closes its channel, so each gets its own.
+        channel = await self.connection.channel() # type: ignore
+        try:
+            bind_to = await channel.declare_exchange(exchange_name, exchange_type, durable=True) if exchange_name else None
+            queue = await channel.declare_queue(queue_name, durable=True, arguments=arguments)
+            if bind_to:
+                await queue.bind(bind_to, routing_key=routing_key)
+        except ChannelPreconditionFailed as e:
+            print(f"WARNING: {queue_name} exists with other arguments and was left as it is: {e}")
+        finally:
+            if not channel.is_closed:
+                await channel.close()
+
+    @property
+    def is_connected(self) -> bool:
+        return self.connection is not None and not self.connection.is_closed
+
+    async def _get_exchange(self) -> AbstractExchange:
+        """
+        Picks the next channel round-robin. Publishes on the same channel
+        are pipelined: each one only awaits its own confirm.
+        """
+        if not self.is_connected:
             print("AMQP connection is closed. Reconnecting...")
-            self.connect()
+            await self.connect()
+
+        index = next(self._next_channel)
+        channel = self.channels[index]
+        if channel.is_closed:
+            channel = await self.connection.channel(publisher_confirms=True) # type: ignore
+            self.channels[index] = channel
+
+        return await channel.get_exchange(self.exchange_name, ensure=False)
 
-        if request.notification_type == 'email':
-            routing_key = 'email'
-        elif request.notification_type == 'push':
-            routing_key = 'push'
-        else:
-            print(f"Unknown notification type: {request.notification_type}")
-            return
+    async def publish_message(self, request: NotificationRequest):
+        """
+        Publishes a notification request to the correct queue and waits
+        for the broker to confirm it. Raises ValueError for an unknown
+        notification type.
+        """
+        exchange = await self._get_exchange()
+        await self._publish(exchange, request)
 
-        message_body = request.model_dump_json()
+    async def publish_batch(self, requests: list[NotificationRequest]) -> list[Optional[BaseException]]:
+        """
+        Publishes a batch of requests on a single channel and waits for
+        all of their confirms together. Returns one entry per request:
+        None if it was confirmed, otherwise the exception it failed with.
+        """
+        exchange = await self._get_exchange()
+        return await asyncio.gather(
+            *(self._publish(exchange, request) for request in requests),
+            return_exceptions=True
+        )
 
+    async def _publish(self, exchange: AbstractExchange, request: NotificationRequest):
+        routing_key = ROUTING_KEYS.get(request.notification_type)
+        if routing_key is None:
+            raise ValueError(f"Unknown notification type: {request.notification_type}")
+
+        message = aio_pika.Message(
+            body=request.model_dump_json().encode(),
+            content_type="application/json",
+            message_id=str(request.request_id),
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            priority=amqp_priority(request.priority)
+        )
         try:
-            self.channel.basic_publish( #type: ignore
-                exchange=self.exchange_name,
+            await exchange.publish(
+                message,
                 routing_key=routing_key,
-                body=message_body,
-                properties=pika.BasicProperties(
-                    delivery_mode=2,
-                )
+                timeout=self.confirm_timeout
             )
-            print(f"Message published to exchange '{self.exchange_name}' with routing key '{routing_key}'")
         except Exception as e:
-            print(f"Failed to publish message: {e}")
-            # Handle potential reconnection or error
-    
-    def close(self):
-        if self.connection and self.connection.is_open:
-            self.connection.close()
+            print(f"Failed to publish message {request.request_id}: {e}")
+            raise
+
+    async def close(self):
+        if self.connection and not self.connection.is_closed:
+            await self.connection.close()
             print("AMQP connection closed.")
+        self.channels = []
 
 
 publisher = AMQPPublisher(
     host=settings.RABBITMQ_HOST,
     user=settings.RABBITMQ_DEFAULT_USER,
-    password=settings.RABBITMQ_DEFAULT_PASS
-)
\ No newline at end of file
+    password=settings.RABBITMQ_DEFAULT_PASS,
+    channel_pool_size=settings.AMQP_CHANNEL_POOL_SIZE,
+    confirm_timeout=settings.AMQP_CONFIRM_TIMEOUT,
+    max_retries=settings.AMQP_CONNECT_MAX_RETRIES,
+    initial_backoff=settings.AMQP_RECONNECT_BACKOFF,
+    max_backoff=settings.AMQP_RECONNECT_BACKOFF_MAX,
+    max_priority=settings.AMQP_MAX_PRIORITY,
+    retry_delays=settings.AMQP_RETRY_DELAYS
+)
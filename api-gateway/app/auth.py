@@ -0,0 +1,124 @@
+import hashlib
+import hmac
+import time
+import httpx
+import jwt
+from typing import Optional
+from fastapi import Header, HTTPException, status
+from .http_client import get_http_client
+from .config import settings
+
+# The user-service's deny-list: revoked tokens are kept under this prefix,
+# keyed by their SHA-256, until they would have expired anyway.
+REVOKED_TOKEN_PREFIX = "revoked_token:"
+
+
+class TokenVerifier:
+    """
+    Verifies user-service access tokens in-process, either with the shared
+    signing secret or with a JWKS key set fetched at startup. Unknown key IDs
+    trigger a refetch of the key set, at most once per `jwks_refresh_interval`
+    seconds, so key rotation does not need a restart.
+
+    Disabled when neither a secret nor a JWKS URL is configured; the
+    user-service then remains the only place tokens are checked.
+    """
+
+    def __init__(
+        self,
+        secret: Optional[str] = None,
+        algorithm: str = "HS256",
+        jwks_url: Optional[str] = None,
+        jwks_refresh_interval: float = 300.0
+    ):
+        self.secret = secret
+        self.algorithm = algorithm
+        self.jwks_url = jwks_url
+        self.jwks_refresh_interval = jwks_refresh_interval
+
+        self._keys: dict[Optional[str], jwt.PyJWK] = {}
+        self._keys_fetched_at = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.secret or self.jwks_url)
+
+    async def load(self, client: httpx.AsyncClient):
+        """Fetches the JWKS key set. Called on startup and on unknown key IDs."""
+        if not self.jwks_url:
+            return
+        self._keys_fetched_at = time.monotonic()
+        response = await client.get(self.jwks_url, timeout=5.0)
+        response.raise_for_status()
+        key_set = jwt.PyJWKSet.from_dict(response.json())
+        self._keys = {key.key_id: key for key in key_set.keys}
+        print(f"Loaded {len(self._keys)} JWKS signing key(s).")
+
+    async def _signing_key(self, token: str):
+        if self.secret:
+            return self.secret
+
+        key_id = jwt.get_unverified_header(token).get("kid")
+        if key_id not in self._keys and time.monotonic() - self._keys_fetched_at >= self.jwks_refresh_interval:
+            try:
+                await self.load(get_http_client())
+            except Exception as e:
+                print(f"JWKS refresh failed: {e}")
+
+        key = self._keys.get(key_id)
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unknown signing key: {key_id}")
+        return key
+
+    async def verify(self, token: str) -> dict:
+        """Returns the token's `user` claim, or raises 401."""
+        try:
+            payload = jwt.decode(token, await self._signing_key(token), algorithms=[self.algorithm])
+        except jwt.ExpiredSignatureError:
+            raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Token expired")
+        except jwt.InvalidTokenError:
+            raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid token")
+
+        user = payload.get("user")
+        if not isinstance(user, dict) or not user.get("user_id"):
+            raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid token")
+        return user
+
+    async def authorize(self, token: str, user_id: str) -> Optional[dict]:
+        """
+        Verifies the token and checks that it belongs to `user_id`, as the
+        user-service does for profile reads. Returns None when disabled.
+        """
+        if not self.enabled:
+            return None
+
+        user = await self.verify(token)
+        if str(user["user_id"]) != user_id:
+            raise HTTPException(status.HTTP_403_FORBIDDEN, "Token does not belong to this user")
+        return user
+
+    def revocation_key(self, token: str) -> Optional[str]:
+        """
+        The deny-list key to check for `token`, read in the admission
+        pipeline. None when disabled: the user-service then checks it.
+        """
+        if not self.enabled:
+            return None
+        return f"{REVOKED_TOKEN_PREFIX}{hashlib.sha256(token.encode()).hexdigest()}"
+
+
+token_verifier = TokenVerifier(
+    secret=settings.JWT_SECRET_KEY,
+    algorithm=settings.JWT_ALGORITHM,
+    jwks_url=settings.JWT_JWKS_URL,
+    jwks_refresh_interval=settings.JWT_JWKS_REFRESH_INTERVAL
+)
+
+
+async def verify_service_token(x_service_token: Optional[str] = Header(default=None)):
+    """Dependency for internal endpoints, checked against INTERNAL_SERVICE_TOKEN."""
+    if not settings.INTERNAL_SERVICE_TOKEN:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Internal service access is not configured")
+    if not x_service_token or not hmac.compare_digest(x_service_token, settings.INTERNAL_SERVICE_TOKEN):
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "Invalid service token")
+    return True
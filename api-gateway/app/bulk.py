@@ -0,0 +1,354 @@
+import asyncio
+import json
+import re
+from typing import AsyncIterator, Optional
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import update, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+from .amqp_client import AMQPPublisher
+from .outbox_relay import OutboxRelay
+from .scheduler import scheduler, due_at
+from .user_service_client import get_users_details_bulk, check_user_preferences
+from .status_cache import status_cache, status_entry
+from .priority import amqp_priority
+from .models import (
+    NotificationRequest,
+    NotificationLog,
+    NotificationOutbox,
+    NotificationStatus
+)
+from .config import settings
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class BulkBodyError(ValueError):
+    """The body is not a JSON array or NDJSON stream."""
+
+
+async def iter_ndjson_items(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Splits a streamed NDJSON body into one raw item per non-blank line."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+
+class _JSONArrayScanner:
+    """
+    Incremental splitter behind iter_json_array_items. Each TOKEN match
+    skips scalars, whitespace and whole string literals in C and stops at
+    the next bracket, brace or comma, so Python only sees the structure.
+    Its quantifiers are possessive (Python 3.11+) to keep a failed match
+    linear. Only the unfinished tail of the current element is carried
+    between chunks; a string literal cut off by a chunk boundary is
+    rescanned from its opening quote once more data arrives.
+    """
+
+    TOKEN = re.compile(rb'(?:[^"\[\]{},]++|"[^"\\]*+(?:\\.[^"\\]*+)*+")*+([\[\]{},"])', re.DOTALL)
+    NON_SPACE = re.compile(rb"\S")
+
+    def __init__(self):
+        self.depth = 0
+        self.started = False
+        self.finished = False
+        self.after_comma = False
+        self.buffer = b""
+        self.pos = 0
+        self.items: list[bytes] = []
+
+    def feed(self, chunk: bytes):
+        """Scans `chunk`, appending every element it completes to `items`."""
+        if self.finished:
+            if self.NON_SPACE.search(chunk):
+                raise BulkBodyError("Unexpected data after the closing ']'")
+            return
+
+        buffer = self.buffer + chunk
+        start = 0
+        pos = self.pos
+        if not self.started:
+            match = self.NON_SPACE.search(buffer)
+            if match is None:
+                return
+            if buffer[match.start()] != ord("["):
+                raise BulkBodyError("Body must be a JSON array or NDJSON")
+            self.started = True
+            start = pos = match.end()
+
+        match_token = self.TOKEN.match
+        while True:
+            match = match_token(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            token = match.group(1)
+            if token == b'"':
+                # The string's closing quote is in a later chunk.
+                pos = match.start(1)
+                break
+            pos = match.end()
+
+            if self.depth == 0 and token in (b",", b"]"):
+                item = buffer[start:match.start(1)]
+                if item.strip():
+                    self.items.append(item)
+                elif token == b",":
+                    raise BulkBodyError("Empty element in JSON array")
+                elif self.after_comma:
+                    raise BulkBodyError("Trailing comma in JSON array")
+                self.after_comma = token == b","
+                start = pos
+                if token == b"]":
+                    self.finished = True
+                    self.buffer = b""
+                    if self.NON_SPACE.search(buffer, start):
+                        raise BulkBodyError("Unexpected data after the closing ']'")
+                    return
+            elif token in (b"[", b"{"):
+                self.depth += 1
+            elif token in (b"]", b"}"):
+                self.depth -= 1
+
+        self.buffer = buffer[start:]
+        self.pos = pos - start
+
+    def take(self) -> list[bytes]:
+        items, self.items = self.items, []
+        return items
+
+
+async def iter_json_array_items(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Splits a streamed top-level JSON array into its raw elements without
+    holding the whole body in memory. Only nesting depth and string state
+    are tracked; each element is validated on its own afterwards. Elements
+    are yielded once their chunk has been scanned, and the event loop gets
+    a turn between chunks so a large body cannot hold it.
+    """
+    scanner = _JSONArrayScanner()
+    async for chunk in chunks:
+        error = None
+        try:
+            scanner.feed(chunk)
+        except BulkBodyError as e:
+            error = e
+        for item in scanner.take():
+            yield item
+        if error:
+            raise error
+        await asyncio.sleep(0)
+
+    if not scanner.finished:
+        raise BulkBodyError("Unterminated JSON array")
+
+
+class BulkSubmission:
+    """
+    Processes a bulk submission in chunks of `chunk_size` items. Per chunk:
+    one user resolution for all distinct users, one multi-row insert of
+    notification_logs (plus their outbox rows, in the same transaction) and
+    either a relay wake-up or one confirm batch to RabbitMQ. Items with a
+    future send_at are handed to the scheduler instead. Results are
+    yielded as NDJSON lines in input order, one chunk at a time, followed by
+    a summary line.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        session_factory: async_sessionmaker[AsyncSession],
+        publisher: AMQPPublisher,
+        relay: OutboxRelay,
+        chunk_size: int = 500,
+        max_items: int = 100000
+    ):
+        self.redis_client = redis_client
+        self.session_factory = session_factory
+        self.publisher = publisher
+        self.relay = relay
+        self.chunk_size = chunk_size
+        self.max_items = max_items
+
+        self.counts: dict[str, int] = {}
+
+    async def run(self, items: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        chunk: list[tuple[int, bytes]] = []
+        index = 0
+        try:
+            async for raw in items:
+                if index >= self.max_items:
+                    yield self._line({"error": f"Bulk submissions are limited to {self.max_items} items; the rest were ignored."})
+                    break
+                chunk.append((index, raw))
+                index += 1
+                if len(chunk) >= self.chunk_size:
+                    for result in await self._process_chunk(chunk):
+                        yield self._line(result)
+                    chunk = []
+        except BulkBodyError as e:
+            if chunk:
+                for result in await self._process_chunk(chunk):
+                    yield self._line(result)
+                chunk = []
+            yield self._line({"error": f"Invalid body after item {index}: {e}"})
+
+        if chunk:
+            for result in await self._process_chunk(chunk):
+                yield self._line(result)
+
+        yield self._line({"summary": {"total": index, **self.counts}})
+
+    def _line(self, result: dict) -> bytes:
+        if "status" in result:
+            self.counts[result["status"]] = self.counts.get(result["status"], 0) + 1
+        return json.dumps(result).encode() + b"\n"
+
+    async def _process_chunk(self, chunk: list[tuple[int, bytes]]) -> list[dict]:
+        results: dict[int, dict] = {}
+        valid: list[tuple[int, NotificationRequest]] = []
+        seen: set = set()
+
+        for index, raw in chunk:
+            try:
+                request = NotificationRequest.model_validate_json(raw)
+            except ValidationError as e:
+                results[index] = {"index": index, "status": "invalid", "error": str(e.errors(include_url=False))}
+                continue
+            if request.request_id in seen:
+                results[index] = self._result(index, request, "duplicate")
+                continue
+            seen.add(request.request_id)
+            valid.append((index, request))
+
+        try:
+            users = await get_users_details_bulk(
+                list({str(request.user_id) for _, request in valid}),
+                self.redis_client
+            ) if valid else {}
+        except HTTPException as e:
+            for index, request in valid:
+                results[index] = self._result(index, request, "failed", f"User lookup failed: {e.detail}")
+            valid = []
+
+        accepted: list[tuple[int, NotificationRequest]] = []
+        for index, request in valid:
+            user_data = users.get(str(request.user_id))
+            if user_data is None:
+                results[index] = self._result(index, request, "rejected", "User not found")
+            elif not check_user_preferences(request.notification_type, user_data):
+                results[index] = self._result(index, request, "suppressed")
+            else:
+                accepted.append((index, request))
+
+        if accepted:
+            try:
+                results.update(await self._store(accepted))
+            except Exception as e:
+                print(f"Bulk submission chunk failed: {e}")
+                for index, request in accepted:
+                    results[index] = self._result(index, request, "failed", "Failed to store notification")
+
+            await status_cache.store(self.redis_client, [
+                status_entry(request.request_id, NotificationStatus.pending)
+                for index, request in accepted
+                if results[index]["status"] == "accepted"
+            ])
+
+        return [results[index] for index, _ in chunk]
+
+    async def _store(self, accepted: list[tuple[int, NotificationRequest]]) -> dict[int, dict]:
+        results: dict[int, dict] = {}
+        async with self.session_factory() as session:
+            async with session.begin():
+                inserted_ids = set((await session.execute(
+                    pg_insert(NotificationLog)
+                    .values([
+                        {
+                            "request_id": request.request_id,
+                            "user_id": request.user_id,
+                            "notification_type": request.notification_type,
+                            "status": NotificationStatus.pending
+                        }
+                        for _, request in accepted
+                    ])
+                    .on_conflict_do_nothing(index_elements=[NotificationLog.request_id])
+                    .returning(NotificationLog.request_id)
+                )).scalars().all())
+
+                inserted = []
+                immediate = []
+                scheduled = []
+                for index, request in accepted:
+                    if request.request_id not in inserted_ids:
+                        results[index] = self._result(index, request, "duplicate")
+                        continue
+                    inserted.append((index, request))
+                    due = due_at(request)
+                    if due is None:
+                        immediate.append((index, request))
+                    else:
+                        scheduled.append((index, request, due))
+
+                if immediate and settings.OUTBOX_ENABLED:
+                    await session.execute(
+                        pg_insert(NotificationOutbox).values([
+                            {
+                                "request_id": request.request_id,
+                                "payload": request.model_dump_json(),
+                                "priority": amqp_priority(request.priority)
+                            }
+                            for _, request in immediate
+                        ])
+                    )
+                elif immediate:
+                    errors = await self.publisher.publish_batch([request for _, request in immediate])
+                    failed = [request.request_id for (_, request), error in zip(immediate, errors) if error]
+                    if failed:
+                        await session.execute(
+                            update(NotificationLog)
+                            .where(NotificationLog.request_id.in_(failed))
+                            .values(status=NotificationStatus.failed, error_message="Failed to publish")
+                        )
+                    for (index, request), error in zip(immediate, errors):
+                        if error:
+                            results[index] = self._result(index, request, "failed", "Failed to publish")
+
+        if immediate and settings.OUTBOX_ENABLED:
+            self.relay.wake()
+
+        if scheduled:
+            try:
+                await scheduler.schedule(self.redis_client, [(request, due) for _, request, due in scheduled])
+            except RedisError as e:
+                print(f"Bulk submission scheduling failed: {e}")
+                # Drop the log rows, as a single send does, so the items
+                # can be resubmitted with the same request_ids.
+                async with self.session_factory() as session:
+                    async with session.begin():
+                        await session.execute(
+                            delete(NotificationLog)
+                            .where(NotificationLog.request_id.in_([request.request_id for _, request, _ in scheduled]))
+                        )
+                for index, request, _ in scheduled:
+                    results[index] = self._result(index, request, "failed", "Failed to schedule")
+
+        for index, request in inserted:
+            results.setdefault(index, self._result(index, request, "accepted"))
+        return results
+
+    @staticmethod
+    def _result(index: int, request: NotificationRequest, status: str, error: Optional[str] = None) -> dict:
+        result = {"index": index, "request_id": str(request.request_id), "status": status}
+        if error:
+            result["error"] = error
+        return result
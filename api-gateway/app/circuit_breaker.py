@@ -0,0 +1,57 @@
+import time
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for a downstream dependency.
+
+    closed:    calls go through; `failure_threshold` failures in a row open it.
+    open:      calls are refused until `reset_timeout` seconds have passed.
+    half_open: a single trial call is let through; success closes the
+               circuit again, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being refused outright."""
+        return self.state == "open" and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def allow_request(self) -> bool:
+        if self.state == "closed":
+            return True
+
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = "half_open"
+
+        if self._trial_in_flight:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                print(f"Circuit opened after {self.failures} consecutive failures.")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures}
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import computed_field
+from typing import Literal, Optional
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file='../../.env', env_file_encoding='utf-8', extra='ignore')
@@ -7,8 +8,71 @@ class Settings(BaseSettings):
     RABBITMQ_HOST: str = "rabbitmq"
     RABBITMQ_DEFAULT_USER: str = "guest"
     RABBITMQ_DEFAULT_PASS: str = "guest"
+    AMQP_CHANNEL_POOL_SIZE: int = 4
+    AMQP_CONFIRM_TIMEOUT: float = 5.0
+    AMQP_CONNECT_MAX_RETRIES: int = 5
+    AMQP_RECONNECT_BACKOFF: float = 1.0
+    AMQP_RECONNECT_BACKOFF_MAX: float = 30.0
+
+    # email.queue/push.queue are priority queues (x-max-priority). Requests at
+    # or above HIGH_PRIORITY_THRESHOLD are "high priority": they may use the
+    # share of the gateway's ingest queues that is held back from the rest.
+    AMQP_MAX_PRIORITY: int = 10
+    HIGH_PRIORITY_THRESHOLD: int = 5
+    HIGH_PRIORITY_RESERVED_FRACTION: float = 0.2
+    # Delays (seconds) of the retry tiers consumers park failing messages in.
+    # Read from JSON, e.g. AMQP_RETRY_DELAYS='[5, 30, 300]'.
+    AMQP_RETRY_DELAYS: list[int] = [5, 30, 300]
+
+    PUBLISH_BATCH_MAX_LATENCY_MS: float = 5.0
+    PUBLISH_BATCH_SIZE: int = 100
+    PUBLISH_QUEUE_DEPTH: int = 10000
+
+    LOG_WRITER_MAX_LATENCY_MS: float = 5.0
+    LOG_WRITER_BATCH_SIZE: int = 1000
+    LOG_WRITER_QUEUE_DEPTH: int = 20000
+
+    STATUS_UPDATE_MAX_LATENCY_MS: float = 5.0
+    STATUS_UPDATE_BATCH_SIZE: int = 500
+    STATUS_UPDATE_QUEUE_DEPTH: int = 10000
+    STATUS_BATCH_MAX_ITEMS: int = 1000
+
+    STATUS_CACHE_PENDING_TTL: float = 300.0
+    STATUS_CACHE_TERMINAL_TTL: float = 86400.0
+    STATUS_LOCAL_CACHE_MAX_ENTRIES: int = 50000
+    STATUS_LOCAL_CACHE_TTL: float = 600.0
+
+    STATUS_STREAM_MAX_IDS: int = 100
+    STATUS_STREAM_MAX_SUBSCRIPTIONS: int = 50000
+    STATUS_STREAM_HEARTBEAT: float = 15.0
+
+    IDEMPOTENCY_TTL: float = 86400.0
+    IDEMPOTENCY_IN_FLIGHT_TTL: float = 30.0
+
+    OUTBOX_ENABLED: bool = True
+    OUTBOX_BATCH_SIZE: int = 500
+    OUTBOX_POLL_INTERVAL_MS: float = 200.0
+    # A row is retried after OUTBOX_RETRY_BACKOFF * 2^attempts seconds (capped
+    # at OUTBOX_RETRY_BACKOFF_MAX) and its notification marked failed after
+    # OUTBOX_MAX_ATTEMPTS failed publishes.
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_RETRY_BACKOFF: float = 1.0
+    OUTBOX_RETRY_BACKOFF_MAX: float = 300.0
+
+    # Notifications with a future send_at wait in Redis until they are due.
+    # A failed publish is retried SCHEDULER_RETRY_DELAY seconds later, and
+    # the notification marked failed after SCHEDULER_MAX_ATTEMPTS failures.
+    SCHEDULER_BATCH_SIZE: int = 500
+    SCHEDULER_POLL_INTERVAL_MS: float = 500.0
+    SCHEDULER_LEASE_SECONDS: float = 60.0
+    SCHEDULER_RETRY_DELAY: float = 5.0
+    SCHEDULER_MAX_ATTEMPTS: int = 10
+
+    BULK_CHUNK_SIZE: int = 500
+    BULK_MAX_ITEMS: int = 100000
 
     REDIS_HOST: str = "redis"
+    REDIS_MAX_CONNECTIONS: int = 100
 
     GATEWAY_DB_HOST: str = "gateway-db"
     GATEWAY_DB_NAME: str = "gateway_db"
@@ -17,6 +81,37 @@ class Settings(BaseSettings):
     GATEWAY_DB_PORT: int = 5432
 
     USER_SERVICE_URL: str = "http://user-service:8001"
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    USER_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    USER_CACHE_TTL: float = 60.0
+    USER_PREF_SOFT_TTL: float = 300.0
+    USER_PREF_HARD_TTL: float = 3600.0
+    USER_PREF_NEGATIVE_TTL: float = 30.0
+    USER_SERVICE_BREAKER_THRESHOLD: int = 5
+    USER_SERVICE_BREAKER_RESET: float = 30.0
+
+    # Local verification of user-service access tokens, with either the shared
+    # signing secret or a JWKS key set. Leave both unset to skip it.
+    JWT_SECRET_KEY: Optional[str] = None
+    JWT_ALGORITHM: str = "HS256"
+    JWT_JWKS_URL: Optional[str] = None
+    JWT_JWKS_REFRESH_INTERVAL: float = 300.0
+
+    # Shared secret for the user-service's internal endpoints. When set, cache
+    # misses are resolved through the batch endpoint instead of one GET each.
+    INTERNAL_SERVICE_TOKEN: Optional[str] = None
+    USER_BATCH_MAX_LATENCY_MS: float = 2.0
+    USER_BATCH_SIZE: int = 500
+
+    # Limits are requests per RATE_LIMIT_WINDOW seconds; 0 disables a rule.
+    # The dict settings are read from JSON, e.g. RATE_LIMIT_API_KEYS='{"tenant-key": 5000}'.
+    RATE_LIMIT_ALGORITHM: Literal["token_bucket", "sliding_log"] = "token_bucket"
+    RATE_LIMIT_WINDOW: int = 60
+    RATE_LIMIT_DEFAULT: int = 20
+    RATE_LIMIT_PER_USER: int = 0
+    RATE_LIMIT_PER_TYPE: dict[str, int] = {}
+    RATE_LIMIT_API_KEYS: dict[str, int] = {}
+    RATE_LIMIT_USERS: dict[str, int] = {}
 
     @computed_field
     @property
@@ -55,4 +55,31 @@ async def get_user_details_from_service(user_id: str, token: str) -> dict:
             raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "User service is down or faulty")
     except httpx.RequestError as e:
         print(f"Cannot connect to User Service: {e}")
-        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "User service is unreachable")
\ No newline at end of file
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "User service is unreachable")
+
+async def get_users_batch_from_service(user_ids: list[str]) -> dict[str, dict]:
+    """
+    Resolves many users with one call to the User Service's internal
+    batch endpoint. Returns the users that exist, keyed by user_id.
+    """
+    client = get_http_client()
+
+    url = f"{settings.USER_SERVICE_URL}/api/v1/users/batch"
+    headers = {"X-Service-Token": settings.INTERNAL_SERVICE_TOKEN or ""}
+
+    try:
+        response = await client.post(url, json={"user_ids": user_ids}, timeout=5.0, headers=headers)
+        response.raise_for_status()
+
+        data = response.json()
+        if not data.get("success") or not data.get("data"):
+            raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Invalid batch response from user-service")
+
+        return {user["user_id"]: user for user in data["data"]["users"]}
+
+    except httpx.HTTPStatusError as e:
+        print(f"User service batch lookup returned an error: {e.response.status_code}")
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "User service is down or faulty")
+    except httpx.RequestError as e:
+        print(f"Cannot connect to User Service: {e}")
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "User service is unreachable")
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import uuid
+from typing import NamedTuple, Optional
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from .models import NotificationRequest
+from .config import settings
+
+IDEMPOTENCY_PREFIX = "idem:"
+
+# Deletes KEYS[1] only while it still holds the claim of owner ARGV[1].
+RELEASE_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if current and cjson.decode(current)['owner'] == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Replaces KEYS[1] with the completed entry ARGV[2] (TTL ARGV[3] seconds)
+# unless another owner has claimed it since ARGV[1]'s claim expired.
+COMPLETE_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if current and cjson.decode(current)['owner'] ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+
+class IdempotencyInProgress(Exception):
+    """Raised when another handler is still processing the same request_id."""
+
+
+class IdempotencyKeyReused(Exception):
+    """Raised when a request_id is resubmitted with a different payload."""
+
+
+class IdempotencyClaim(NamedTuple):
+    key: str
+    owner: str
+    fingerprint: str
+
+
+class IdempotencyStore:
+    """
+    Redis-first deduplication of notification submissions, keyed by
+    request_id.
+
+    The first submission claims idem:{request_id} with SET NX (queued on the
+    admission pipeline, so it costs no extra round-trip) and holds it for
+    `in_flight_ttl` seconds while it is processed. Its response is then
+    cached under the same key for `ttl` seconds, and retries with the same
+    payload are answered from there without touching Postgres or RabbitMQ.
+    A failed submission releases its claim so the client can retry. Both
+    steps check the claim's owner token in a Lua script, so a handler that
+    outlived its in-flight TTL cannot drop or overwrite a newer claim.
+    """
+
+    def __init__(self, ttl: float = 86400.0, in_flight_ttl: float = 30.0):
+        self.ttl = ttl
+        self.in_flight_ttl = in_flight_ttl
+
+        self.claimed = 0
+        self.replayed = 0
+        self.in_progress = 0
+        self.mismatched = 0
+
+    def claim(self, request: NotificationRequest) -> IdempotencyClaim:
+        return IdempotencyClaim(
+            key=f"{IDEMPOTENCY_PREFIX}{request.request_id}",
+            owner=uuid.uuid4().hex,
+            fingerprint=hashlib.sha256(request.model_dump_json().encode()).hexdigest()
+        )
+
+    def queue(self, pipeline, claim: IdempotencyClaim):
+        """Queues the SET NX claim and a GET of the current entry on a pipeline."""
+        pending = json.dumps({"owner": claim.owner, "fingerprint": claim.fingerprint})
+        pipeline.set(claim.key, pending, nx=True, ex=int(self.in_flight_ttl))
+        pipeline.get(claim.key)
+
+    def parse(self, claim: IdempotencyClaim, claimed, current: Optional[str]) -> Optional[dict]:
+        """
+        Returns None when this handler owns the request_id, or the cached
+        response body of a completed earlier submission. Raises
+        IdempotencyInProgress or IdempotencyKeyReused otherwise.
+        """
+        entry = json.loads(current) if current else None
+        # A pipeline re-run after NOSCRIPT finds this handler's own claim.
+        if claimed or entry is None or entry.get("owner") == claim.owner:
+            self.claimed += 1
+            return None
+
+        if entry["fingerprint"] != claim.fingerprint:
+            self.mismatched += 1
+            raise IdempotencyKeyReused("request_id was already used for a different notification")
+        if "response" not in entry:
+            self.in_progress += 1
+            raise IdempotencyInProgress("A submission with this request_id is still being processed")
+
+        self.replayed += 1
+        return entry["response"]
+
+    async def complete(self, redis_client: redis.Redis, claim: IdempotencyClaim, response: dict):
+        """Caches the response for retries. Errors are logged, not raised."""
+        try:
+            await redis_client.eval(
+                COMPLETE_SCRIPT, 1, claim.key,
+                claim.owner,
+                json.dumps({"fingerprint": claim.fingerprint, "response": response}),
+                int(self.ttl)
+            )
+        except RedisError as e:
+            print(f"Redis idempotency SET error: {e}")
+
+    async def release(self, redis_client: redis.Redis, claim: IdempotencyClaim):
+        """Drops an unfinished claim so the client can retry. Errors are logged, not raised."""
+        try:
+            await redis_client.eval(RELEASE_SCRIPT, 1, claim.key, claim.owner)
+        except RedisError as e:
+            print(f"Redis idempotency DELETE error: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "claimed": self.claimed,
+            "replayed": self.replayed,
+            "in_progress": self.in_progress,
+            "mismatched": self.mismatched,
+        }
+
+
+idempotency = IdempotencyStore(
+    ttl=settings.IDEMPOTENCY_TTL,
+    in_flight_ttl=settings.IDEMPOTENCY_IN_FLIGHT_TTL
+)
@@ -0,0 +1,244 @@
+import asyncio
+import time
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+from .config import settings
+from .database import AsyncSessionFactory
+from .models import NotificationRequest
+from .priority import amqp_priority, is_high_priority, low_priority_limit
+
+
+class LogWriterQueueFull(Exception):
+    """Raised when the writer's queue is at capacity (back-pressure)."""
+
+
+class DuplicateNotification(Exception):
+    """Raised when a notification_logs row already exists for the request_id."""
+
+
+# One round-trip per batch: the arrays are unnested into rows, logs are
+# inserted (skipping request_ids that already exist) and outbox rows are
+# added only for the logs that were actually inserted and asked for one.
+INSERT_BATCH_SQL = text("""
+    WITH batch AS (
+        SELECT * FROM unnest(
+            CAST(:request_ids AS uuid[]),
+            CAST(:user_ids AS uuid[]),
+            CAST(:notification_types AS notification_type_enum[]),
+            CAST(:payloads AS text[]),
+            CAST(:priorities AS smallint[]),
+            CAST(:enqueue AS boolean[])
+        ) AS b(request_id, user_id, notification_type, payload, priority, enqueue)
+    ),
+    logs AS (
+        INSERT INTO notification_logs (request_id, user_id, notification_type, status)
+        SELECT request_id, user_id, notification_type, CAST('pending' AS notification_status_enum) FROM batch
+        ON CONFLICT (request_id) DO NOTHING
+        RETURNING request_id
+    ),
+    outbox AS (
+        INSERT INTO notification_outbox (request_id, payload, priority)
+        SELECT batch.request_id, batch.payload, batch.priority
+        FROM batch JOIN logs USING (request_id)
+        WHERE batch.enqueue
+    )
+    SELECT request_id FROM logs
+""")
+
+
+class NotificationLogWriter:
+    """
+    Write-behind ingest for notification_logs. Rows from concurrent
+    handlers are grouped and written by a single INSERT ... SELECT unnest
+    statement, together with their outbox rows. A batch is flushed when it
+    reaches `max_batch_size` rows or when its oldest row has waited
+    `max_latency_ms`. Each caller of `write` is resolved once the batch
+    holding its row has committed. The last `reserved_fraction` of the
+    queue only admits high-priority requests.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        max_latency_ms: float = 5.0,
+        max_batch_size: int = 1000,
+        max_queue_depth: int = 20000,
+        reserved_fraction: float = 0.0
+    ):
+        self.session_factory = session_factory
+        self.max_latency = max_latency_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.max_queue_depth = max_queue_depth
+        self.low_priority_depth = low_priority_limit(max_queue_depth, reserved_fraction)
+
+        self._queue: asyncio.Queue[tuple[NotificationRequest, bool, asyncio.Future]] = asyncio.Queue(maxsize=max_queue_depth)
+        self._task: Optional[asyncio.Task] = None
+        self._flushing: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.submitted = 0
+        self.rejected = 0
+        self.written = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.batches = 0
+        self.peak_queue_depth = 0
+        self.last_flush_ms = 0.0
+
+    async def start(self):
+        self._stopping = False
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            print("Notification log writer started.")
+
+    async def stop(self):
+        """
+        Stops accepting rows, lets the batch being written finish and
+        writes what is still queued, so every waiting caller is resolved.
+        """
+        self._stopping = True
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flushing:
+            await self._flushing
+            self._flushing = None
+
+        while not self._queue.empty():
+            await self._flush(self._drain(self.max_batch_size))
+        print("Notification log writer stopped.")
+
+    async def write(self, request: NotificationRequest, outbox: bool = True):
+        """
+        Queues a pending log row (and, with `outbox`, its outbox row) for the
+        next batch and waits until it is committed. Raises LogWriterQueueFull
+        immediately if the queue is at capacity (for the request's priority)
+        or the writer is stopping, and DuplicateNotification if the
+        request_id was already logged.
+        """
+        if self._stopping:
+            self.rejected += 1
+            raise LogWriterQueueFull("Log writer is shutting down")
+        if not is_high_priority(request) and self._queue.qsize() >= self.low_priority_depth:
+            self.rejected += 1
+            raise LogWriterQueueFull(f"Log writer queue is full for low-priority requests ({self.low_priority_depth} pending)")
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((request, outbox, future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise LogWriterQueueFull(f"Log writer queue is full ({self.max_queue_depth} pending)")
+
+        self.submitted += 1
+        self.peak_queue_depth = max(self.peak_queue_depth, self._queue.qsize())
+        await future
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "low_priority_queue_depth": self.low_priority_depth,
+            "peak_queue_depth": self.peak_queue_depth,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "written": self.written,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "batches": self.batches,
+            "avg_batch_size": round((self.written + self.duplicates + self.failed) / self.batches, 2) if self.batches else 0.0,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+    def _drain(self, limit: int) -> list[tuple[NotificationRequest, bool, asyncio.Future]]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_latency
+
+            try:
+                while len(batch) < self.max_batch_size:
+                    batch.extend(self._drain(self.max_batch_size - len(batch)))
+                    timeout = deadline - loop.time()
+                    if len(batch) >= self.max_batch_size or timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # Stopped while collecting: these are already off the queue.
+                self._flushing = asyncio.create_task(self._flush(batch))
+                raise
+
+            # Shielded so stop() cannot abandon a batch mid-insert; it
+            # waits for self._flushing instead.
+            self._flushing = asyncio.create_task(self._flush(batch))
+            await asyncio.shield(self._flushing)
+            self._flushing = None
+
+    async def _flush(self, batch: list[tuple[NotificationRequest, bool, asyncio.Future]]):
+        if not batch:
+            return
+
+        started = time.perf_counter()
+
+        # A request_id repeated within the batch is written once; later copies are duplicates.
+        rows: dict = {}
+        for request, outbox, _ in batch:
+            rows.setdefault(request.request_id, (request, outbox))
+
+        try:
+            async with self.session_factory() as session:
+                async with session.begin():
+                    result = await session.execute(INSERT_BATCH_SQL, {
+                        "request_ids": list(rows),
+                        "user_ids": [request.user_id for request, _ in rows.values()],
+                        "notification_types": [request.notification_type.value for request, _ in rows.values()],
+                        "payloads": [request.model_dump_json() for request, _ in rows.values()],
+                        "priorities": [amqp_priority(request.priority) for request, _ in rows.values()],
+                        "enqueue": [outbox for _, outbox in rows.values()],
+                    })
+                    inserted = set(result.scalars().all())
+        except Exception as e:
+            print(f"Notification log writer flush failed: {e}")
+            for _, _, future in batch:
+                self.failed += 1
+                if not future.done():
+                    future.set_exception(e)
+            self.batches += 1
+            return
+
+        for request, _, future in batch:
+            if request.request_id in inserted:
+                inserted.discard(request.request_id)
+                self.written += 1
+                if not future.done():
+                    future.set_result(None)
+            else:
+                self.duplicates += 1
+                if not future.done():
+                    future.set_exception(DuplicateNotification(f"Notification {request.request_id} already exists"))
+
+        self.batches += 1
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+
+
+log_writer = NotificationLogWriter(
+    AsyncSessionFactory,
+    max_latency_ms=settings.LOG_WRITER_MAX_LATENCY_MS,
+    max_batch_size=settings.LOG_WRITER_BATCH_SIZE,
+    max_queue_depth=settings.LOG_WRITER_QUEUE_DEPTH,
+    reserved_fraction=settings.HIGH_PRIORITY_RESERVED_FRACTION
+)
@@ -1,9 +1,11 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Request
+from fastapi import FastAPI, Body, Depends, HTTPException, Query, status, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials 
-from typing import Annotated
+from starlette.background import BackgroundTask
+from typing import Annotated, Optional
 from contextlib import asynccontextmanager
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, delete
 from .models import (
     NotificationRequest,
     StatusUpdateRequest,
@@ -15,21 +17,37 @@ from .models import (
 import httpx
 from .user_service_client import (
     get_and_cache_user_details,
-    check_user_preferences
+    check_user_preferences,
+    user_pref_cache_key,
+    is_user_cached_locally,
+    NOT_PREFETCHED,
+    listen_for_user_invalidations,
+    user_cache,
+    user_fetches,
+    user_service_breaker
 )
 from .http_client import set_http_client, get_http_client
+from .auth import token_verifier, verify_service_token
+from .bulk import BulkSubmission, iter_ndjson_items, iter_json_array_items, NDJSON_MEDIA_TYPE
+from .user_loader import user_loader
 from .amqp_client import publisher
-from .redis_client import redis_client, get_redis
-import redis
-from redis.exceptions import RedisError
+from .publish_batcher import publish_batcher, PublishQueueFull
+from .outbox_relay import outbox_relay
+from .scheduler import scheduler, due_at
+from .log_writer import log_writer, LogWriterQueueFull, DuplicateNotification
+from .status_updater import status_updater, StatusQueueFull, StatusNotFound
+from .status_cache import status_cache, status_entry
+from .status_stream import status_stream, StreamCapacityExceeded, SSE_MEDIA_TYPE
+from .redis_client import get_redis, close_redis
+import redis.asyncio as redis
+from redis.exceptions import RedisError, NoScriptError
+from .rate_limiter import rate_limiter, RateLimitResult
+from .idempotency import idempotency, IdempotencyClaim, IdempotencyInProgress, IdempotencyKeyReused
 from .config import settings
 import uuid
-from .database import engine, Base, get_db
+from .database import engine, Base, get_db, AsyncSessionFactory
 import asyncio
 
-RATE_LIMIT_PER_MINUTE = 20
-RATE_LIMIT_WINDOW = 60
-
 http_bearer_scheme = HTTPBearer()
 
 @asynccontextmanager
@@ -44,120 +62,338 @@ async def lifespan(app: FastAPI):
     set_http_client(client)
     print("HTTP client initialized and injected.")
 
-    max_retries = 5
-    retry_delay = 3
-    for attempt in range(max_retries):
-        try:
-            print(f"Attempting to connect to RabbitMQ (attempt {attempt + 1}/{max_retries})...")
-            publisher.connect()
-            print("RabbitMQ connection successful")
-            break
-        except Exception as e:
-            print(f"Failed to connect to RabbitMQ: {e}")
-            if attempt < max_retries - 1:
-                print(f"Retrying in {retry_delay} seconds...")
-                await asyncio.sleep(retry_delay)
-            else:
-                print("WARNING: Starting without RabbitMQ connection. Messages will fail to publish.")
+    try:
+        await token_verifier.load(client)
+    except Exception as e:
+        print(f"Failed to load JWKS signing keys: {e}")
+        print("WARNING: Tokens will be rejected until the key set can be fetched.")
+
+    try:
+        await publisher.connect()
+        print("RabbitMQ connection successful")
+    except Exception as e:
+        print(f"Failed to connect to RabbitMQ: {e}")
+        print("WARNING: Starting without RabbitMQ connection. Publishing will retry the connection.")
+
+    await publish_batcher.start()
+    await log_writer.start()
+    await status_updater.start()
+    if settings.OUTBOX_ENABLED:
+        await outbox_relay.start()
 
     try:
-        if get_redis().ping():
-            print("Redis connection successful.")
+        if await get_redis().ping():
+            await rate_limiter.load(get_redis())
+            print("Redis connection successful, rate limiter script loaded.")
         else:
             print("Redis connection failed.")
     except Exception as e:
         print(f"Failed to connect to Redis on startup: {e}")
 
+    await scheduler.start(get_redis())
+    invalidation_listener = asyncio.create_task(listen_for_user_invalidations(get_redis()))
+    status_event_listener = asyncio.create_task(status_stream.listen(get_redis()))
+
     yield
     
     print("API Gateway shutting down...")
+
+    invalidation_listener.cancel()
+    status_event_listener.cancel()
     
     await client.aclose()
     print("HTTP client closed")
-    
-    publisher.close()
+
+    await scheduler.stop()
+    await log_writer.stop()
+    await status_updater.stop()
+    await outbox_relay.stop()
+    await publish_batcher.stop()
+    await publisher.close()
+
+    await close_redis()
     
     await engine.dispose()
 
 app = FastAPI(lifespan=lifespan)
 
 
-async def rate_limit_depend(request: Request, redis: redis.Redis = Depends(get_redis)):
+async def check_rate_limit_and_prefetch_user(
+    request: Request,
+    notification: NotificationRequest,
+    redis: redis.Redis,
+    claim: IdempotencyClaim,
+    revocation_key: Optional[str] = None
+) -> tuple[RateLimitResult, Optional[str] | object, Optional[dict]]:
+    """
+    Runs the rate limiter's EVALSHA, the request_id's idempotency claim,
+    the user_pref cache read and, given `revocation_key`, the token
+    deny-list check in a single pipelined round-trip. Raises 401 for a
+    revoked token. Returns the
+    limiter result, to be sent back as X-RateLimit-* headers, the cached
+    user JSON, if any (NOT_PREFETCHED when the user is already cached
+    in-process), and the cached response of an earlier submission of the
+    same request, if any.
+    """
     if not request.client:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Could not identify client for rate limiting."
         )
-    ip = request.client.host
-    key = f"rate_limit:{ip}"
+    rules = rate_limiter.rules_for(
+        client_ip=request.client.host,
+        api_key=request.headers.get("X-API-Key"),
+        user_id=str(notification.user_id),
+        notification_type=notification.notification_type.value
+    )
+
+    # Skip the Redis read when the in-process cache will answer anyway.
+    prefetch_user = not is_user_cached_locally(str(notification.user_id))
+
+    async def execute():
+        pipeline = redis.pipeline(transaction=False)
+        rate_limiter.queue(pipeline, rules)
+        idempotency.queue(pipeline, claim)
+        if prefetch_user:
+            pipeline.get(user_pref_cache_key(str(notification.user_id)))
+        if revocation_key:
+            pipeline.exists(revocation_key)
+        return await pipeline.execute()
+
     try:
-        pipeline = redis.pipeline()
-        pipeline.incr(key)
-        pipeline.expire(key, RATE_LIMIT_WINDOW)
-        requests_in_window = pipeline.execute()[0]
-        if requests_in_window > RATE_LIMIT_PER_MINUTE:
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail=f"Too many requests. Limit is {RATE_LIMIT_PER_MINUTE} per minute."
-            )
+        try:
+            results = await execute()
+        except NoScriptError:
+            await rate_limiter.load(redis)
+            results = await execute()
     except RedisError as e:
         print(f"Redis error, failing closed: {e}")
+        # The claim may have been set before the error; don't make retries wait it out.
+        await idempotency.release(redis, claim)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error connecting to rate limiter."
         )
-    return True
 
-async def update_status_in_db(
-    request_id: uuid.UUID, 
-    new_status: NotificationStatus, 
-    db: AsyncSession, 
-    error_message: str | None = None
-):
-    stmt = select(NotificationLog).filter(NotificationLog.request_id == request_id)
-    result = await db.execute(stmt)
-    log = result.scalar_one_or_none()
-    if not log:
+    if revocation_key and results[-1]:
+        await idempotency.release(redis, claim)
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
+
+    limit = rate_limiter.parse(results[0])
+    cached_user = results[3] if prefetch_user else NOT_PREFETCHED
+    try:
+        replay = idempotency.parse(claim, results[1], results[2])
+    except IdempotencyInProgress as e:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Notification ID not found: {request_id}"
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
+    except IdempotencyKeyReused as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+    # A retry of an accepted submission is answered even when throttled.
+    if replay is None and not limit.allowed:
+        await idempotency.release(redis, claim)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Too many requests. Limit is {limit.limit} per {settings.RATE_LIMIT_WINDOW} seconds.",
+            headers=limit.headers()
         )
-    log.status = new_status
-    log.error_message = error_message 
+    return limit, cached_user, replay
+
+async def apply_status_update(status_request: StatusUpdateRequest) -> str:
+    """
+    Hands a single webhook event to the coalescing status updater. Returns
+    "ignored" for reports about notifications already in a terminal state.
+    """
     try:
-        await db.commit()
+        return await status_updater.submit(status_request)
+    except StatusNotFound as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except StatusQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Gateway is overloaded, retry later: {e}",
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
-        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update status in database: {e}"
         )
 
+async def apply_status_batch(updates: list[StatusUpdateRequest]) -> dict:
+    """Applies a batch webhook in one statement; unknown IDs are reported, not fatal."""
+    try:
+        outcomes = await status_updater.apply(updates)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to update status in database: {e}"
+        )
+    return {
+        outcome: [str(request_id) for request_id, result in outcomes.items() if result == outcome]
+        for outcome in ("updated", "ignored", "not_found")
+    }
+
 
 @app.get("/health", status_code=status.HTTP_200_OK, tags=["Monitoring"])
 async def get_health():
     return {"status": "ok"}
 
 
+@app.get("/metrics/publisher",
+         status_code=status.HTTP_200_OK,
+         response_model=StandardApiResponse,
+         tags=["Monitoring"])
+async def get_publisher_metrics():
+    return StandardApiResponse(
+        success=True,
+        message="Publisher metrics retrieved successfully.",
+        data=publish_batcher.stats()
+    )
+
+
+@app.get("/metrics/log-writer",
+         status_code=status.HTTP_200_OK,
+         response_model=StandardApiResponse,
+         tags=["Monitoring"])
+async def get_log_writer_metrics():
+    return StandardApiResponse(
+        success=True,
+        message="Log writer metrics retrieved successfully.",
+        data=log_writer.stats()
+    )
+
+
+@app.get("/metrics/idempotency",
+         status_code=status.HTTP_200_OK,
+         response_model=StandardApiResponse,
+         tags=["Monitoring"])
+async def get_idempotency_metrics():
+    """Reports how many submissions were claimed, replayed from cache or rejected as duplicates."""
+    return StandardApiResponse(
+        success=True,
+        message="Idempotency metrics retrieved successfully.",
+        data=idempotency.stats()
+    )
+
+
+@app.get("/metrics/status-stream",
+         status_code=status.HTTP_200_OK,
+         response_model=StandardApiResponse,
+         tags=["Monitoring"])
+async def get_status_stream_metrics():
+    """
+    Reports open status streams on this replica and how many published
+    transitions were delivered to them.
+    """
+    return StandardApiResponse(
+        success=True,
+        message="Status stream metrics retrieved successfully.",
+        data=status_stream.stats()
+    )
+
+
+@app.get("/metrics/scheduler",
+         status_code=status.HTTP_200_OK,
+         response_model=StandardApiResponse,
+         tags=["Monitoring"])
+async def get_scheduler_metrics(redis_client: redis.Redis = Depends(get_redis)):
+    """Reports how many notifications are waiting for their send_at and how many were published."""
+    return StandardApiResponse(
+        success=True,
+        message="Scheduler metrics retrieved successfully.",
+        data=await scheduler.stats(redis_client)
+    )
+
+
+@app.get("/metrics/status-updates",
+         status_code=status.HTTP_200_OK,
+         response_model=StandardApiResponse,
+         tags=["Monitoring"])
+async def get_status_update_metrics():
+    return StandardApiResponse(
+        success=True,
+        message="Status update metrics retrieved successfully.",
+        data={**status_updater.stats(), "cache": status_cache.stats()}
+    )
+
+
+@app.get("/metrics/user-cache",
+         status_code=status.HTTP_200_OK,
+         response_model=StandardApiResponse,
+         tags=["Monitoring"])
+async def get_user_cache_metrics():
+    return StandardApiResponse(
+        success=True,
+        message="User cache metrics retrieved successfully.",
+        data={
+            **user_cache.stats(),
+            "coalesced_fetches": user_fetches.coalesced,
+            "user_service_circuit": user_service_breaker.stats(),
+            "batch_loader": user_loader.stats()
+        }
+    )
+
+
 @app.post("/api/v1/notifications/",
           status_code=status.HTTP_202_ACCEPTED,
           response_model=StandardApiResponse,
-          tags=["Notifications"],
-          dependencies=[Depends(rate_limit_depend)])
+          tags=["Notifications"])
 async def send_notification(
     request: NotificationRequest,
+    http_request: Request,
+    response: Response,
     creds: Annotated[HTTPAuthorizationCredentials, Depends(http_bearer_scheme)],
     
     db: AsyncSession = Depends(get_db),
     redis_client: redis.Redis = Depends(get_redis)
 ):
+    # Bad tokens are turned away before any Redis or user-service work.
+    await token_verifier.authorize(creds.credentials, str(request.user_id))
+
+    claim = idempotency.claim(request)
+    limit, cached_user, replay = await check_rate_limit_and_prefetch_user(
+        http_request,
+        request,
+        redis_client,
+        claim,
+        revocation_key=token_verifier.revocation_key(creds.credentials)
+    )
+    response.headers.update(limit.headers())
+
+    if replay is not None:
+        return StandardApiResponse.model_validate(replay)
+
+    try:
+        result = await accept_notification(request, creds.credentials, cached_user, db, redis_client)
+    except Exception:
+        await idempotency.release(redis_client, claim)
+        raise
+
+    await idempotency.complete(redis_client, claim, result.model_dump(mode="json"))
+    return result
+
+
+async def accept_notification(
+    request: NotificationRequest,
+    token: str,
+    cached_user: Optional[str] | object,
+    db: AsyncSession,
+    redis_client: redis.Redis
+) -> StandardApiResponse:
+    """
+    Checks the user's preferences, then logs and enqueues the notification,
+    or hands it to the scheduler if its send_at is in the future.
+    """
     try:
-        token = creds.credentials
-        
         user_data = await get_and_cache_user_details(
             str(request.user_id), 
             redis_client,
-            f"Bearer {token}"
+            f"Bearer {token}",
+            cached_data=cached_user
         ) 
         
         if not check_user_preferences(request.notification_type, user_data):
@@ -172,33 +408,107 @@ async def send_notification(
     except Exception as e:
         raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, f"User validation failed: {e}")
     
+    due = due_at(request)
     try:
-        new_log = NotificationLog(
-            request_id=request.request_id,
-            user_id=request.user_id,
-            notification_type=request.notification_type,
-            status=NotificationStatus.pending
-        )
-        db.add(new_log)
-        await db.flush() 
-
-        publisher.publish_message(request)
-        
-        await db.commit()
-
-        return StandardApiResponse(
-            success=True,
-            message="Notification request accepted for processing.",
-            data={"request_id": str(request.request_id)}
+        # The log row (and its outbox row) is written by the batching log
+        # writer; this returns once the batch holding it has committed.
+        # Scheduled notifications get no outbox row: the scheduler publishes them.
+        await log_writer.write(request, outbox=settings.OUTBOX_ENABLED and due is None)
+    except DuplicateNotification as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except LogWriterQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Gateway is overloaded, retry later: {e}",
+            headers={"Retry-After": "1"}
         )
-        
     except Exception as e:
-        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to process notification: {str(e)}"
         )
 
+    if due is not None:
+        try:
+            await scheduler.schedule(redis_client, [(request, due)])
+        except RedisError as e:
+            await db.execute(delete(NotificationLog).where(NotificationLog.request_id == request.request_id))
+            await db.commit()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Failed to schedule notification, retry later: {e}",
+                headers={"Retry-After": "1"}
+            )
+    elif not settings.OUTBOX_ENABLED:
+        try:
+            await publish_batcher.submit(request)
+        except Exception as e:
+            # Drop the log row so the client can retry with the same request_id.
+            await db.execute(delete(NotificationLog).where(NotificationLog.request_id == request.request_id))
+            await db.commit()
+            if isinstance(e, PublishQueueFull):
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=f"Gateway is overloaded, retry later: {e}",
+                    headers={"Retry-After": "1"}
+                )
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to process notification: {str(e)}"
+            )
+
+    # Cached only once the message is scheduled or on its way, so a failed
+    # hand-off cannot leave a pending status behind for a log row that was dropped.
+    await status_cache.store(redis_client, [status_entry(request.request_id, NotificationStatus.pending)])
+
+    if due is not None:
+        return StandardApiResponse(
+            success=True,
+            message="Notification scheduled.",
+            data={"request_id": str(request.request_id), "send_at": request.send_at.isoformat()} # type: ignore
+        )
+    if settings.OUTBOX_ENABLED:
+        # The relay publishes the message from the committed outbox row.
+        outbox_relay.wake()
+
+    return StandardApiResponse(
+        success=True,
+        message="Notification request accepted for processing.",
+        data={"request_id": str(request.request_id)}
+    )
+
+
+@app.post("/api/v1/notifications/bulk",
+          status_code=status.HTTP_200_OK,
+          response_class=StreamingResponse,
+          dependencies=[Depends(verify_service_token)],
+          tags=["Notifications"])
+async def send_notifications_bulk(
+    http_request: Request,
+    redis_client: redis.Redis = Depends(get_redis)
+):
+    """
+    Accepts many notifications in one request, as a JSON array or as NDJSON
+    (Content-Type: application/x-ndjson). The body is parsed as it streams
+    in and per-item results are streamed back as NDJSON, in input order,
+    followed by a summary line. Internal: requires X-Service-Token.
+    """
+    content_type = http_request.headers.get("content-type", "")
+    if content_type.startswith(NDJSON_MEDIA_TYPE):
+        items = iter_ndjson_items(http_request.stream())
+    else:
+        items = iter_json_array_items(http_request.stream())
+
+    submission = BulkSubmission(
+        redis_client,
+        AsyncSessionFactory,
+        publisher,
+        outbox_relay,
+        chunk_size=settings.BULK_CHUNK_SIZE,
+        max_items=settings.BULK_MAX_ITEMS
+    )
+    return StreamingResponse(submission.run(items), media_type=NDJSON_MEDIA_TYPE)
+
 
 @app.get("/api/v1/notifications/{request_id}/status/",
          response_model=StandardApiResponse,
@@ -206,14 +516,12 @@ async def send_notification(
          tags=["Notifications"])
 async def get_notification_status(
     request_id: uuid.UUID,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis)
 ):
-    result = await db.execute(
-        select(NotificationLog).filter(NotificationLog.request_id == request_id) # type: ignore
-    )
-    log_entry = result.scalar_one_or_none()
+    entries = await load_status_entries(db, redis_client, [request_id])
 
-    if not log_entry:
+    if str(request_id) not in entries:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Notification status not found for this request_id."
@@ -222,44 +530,125 @@ async def get_notification_status(
     return StandardApiResponse(
         success=True,
         message="Status retrieved successfully.",
-        data={
-            "request_id": str(log_entry.request_id),
-            "status": log_entry.status.value,
-            "last_updated": str(log_entry.updated_at or log_entry.created_at),
-            "error": log_entry.error_message
-        }
+        data=entries[str(request_id)]
     )
 
 
+@app.get("/api/v1/notifications/status/stream",
+         status_code=status.HTTP_200_OK,
+         response_class=StreamingResponse,
+         tags=["Notifications"])
+async def stream_notification_status(
+    request_id: Annotated[list[uuid.UUID], Query(min_length=1, max_length=settings.STATUS_STREAM_MAX_IDS)],
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis)
+):
+    """
+    Server-Sent Events stream of status transitions for one or more
+    request_ids (repeat the `request_id` query parameter). Sends the
+    current status of each ID first, then every transition, and closes
+    once all of them are final.
+    """
+    try:
+        subscription = status_stream.subscribe([str(rid) for rid in dict.fromkeys(request_id)])
+    except StreamCapacityExceeded as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+    # Subscribed before the snapshot is read, so a transition applied in
+    # between is delivered as an event rather than lost.
+    try:
+        snapshot = await load_status_entries(db, redis_client, list(dict.fromkeys(request_id)))
+    except Exception:
+        status_stream.unsubscribe(subscription)
+        raise
+    # Long-lived streams must not pin a database connection.
+    await db.close()
+
+    # events() unsubscribes when it finishes, but a response that is never
+    # iterated (the client went away first) would never run it.
+    return StreamingResponse(
+        status_stream.events(subscription, snapshot),
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(status_stream.unsubscribe, subscription)
+    )
+
+
+async def load_status_entries(
+    db: AsyncSession,
+    redis_client: redis.Redis,
+    request_ids: list[uuid.UUID]
+) -> dict[str, dict]:
+    """
+    Returns the status entry of each known request_id, keyed by its string
+    form: from the status cache where possible, otherwise from one
+    notification_logs query whose rows are written back to the cache.
+    """
+    entries = await status_cache.get_many(redis_client, request_ids)
+    missing = [request_id for request_id in request_ids if str(request_id) not in entries]
+
+    if missing:
+        result = await db.execute(
+            select(NotificationLog).filter(NotificationLog.request_id.in_(missing)) # type: ignore
+        )
+        loaded = [
+            status_entry(
+                log_entry.request_id,
+                log_entry.status,
+                log_entry.error_message,
+                str(log_entry.updated_at or log_entry.created_at)
+            )
+            for log_entry in result.scalars().all()
+        ]
+        await status_cache.store(redis_client, loaded)
+        entries.update((entry["request_id"], entry) for entry in loaded)
+
+    return entries
+
+
 @app.post("/api/v1/email/status/",
           status_code=status.HTTP_200_OK,
           response_model=StandardApiResponse,
           tags=["Status Webhooks"])
-async def email_status_update(
-    status_request: StatusUpdateRequest,
-    db: AsyncSession = Depends(get_db)
-):
-    await update_status_in_db(
-        request_id=status_request.notification_id,
-        new_status=status_request.status,
-        db=db,
-        error_message=status_request.error
-    )
+async def email_status_update(status_request: StatusUpdateRequest):
+    if await apply_status_update(status_request) == "ignored":
+        return StandardApiResponse(success=True, message="Email status already final; update ignored.")
     return StandardApiResponse(success=True, message="Email status updated.")
 
 
-@app.post("/api/v1/push/status/",
+@app.post("/api/v1/email/status/batch",
           status_code=status.HTTP_200_OK,
           response_model=StandardApiResponse,
           tags=["Status Webhooks"])
-async def push_status_update(
-    status_request: StatusUpdateRequest,
-    db: AsyncSession = Depends(get_db)
+async def email_status_batch_update(
+    updates: Annotated[list[StatusUpdateRequest], Body(min_length=1, max_length=settings.STATUS_BATCH_MAX_ITEMS)]
 ):
-    await update_status_in_db(
-        request_id=status_request.notification_id,
-        new_status=status_request.status,
-        db=db,
-        error_message=status_request.error
+    return StandardApiResponse(
+        success=True,
+        message="Email statuses updated.",
+        data=await apply_status_batch(updates)
     )
+
+
+@app.post("/api/v1/push/status/",
+          status_code=status.HTTP_200_OK,
+          response_model=StandardApiResponse,
+          tags=["Status Webhooks"])
+async def push_status_update(status_request: StatusUpdateRequest):
+    if await apply_status_update(status_request) == "ignored":
+        return StandardApiResponse(success=True, message="Push status already final; update ignored.")
     return StandardApiResponse(success=True, message="Push status updated.")
+
+
+@app.post("/api/v1/push/status/batch",
+          status_code=status.HTTP_200_OK,
+          response_model=StandardApiResponse,
+          tags=["Status Webhooks"])
+async def push_status_batch_update(
+    updates: Annotated[list[StatusUpdateRequest], Body(min_length=1, max_length=settings.STATUS_BATCH_MAX_ITEMS)]
+):
+    return StandardApiResponse(
+        success=True,
+        message="Push statuses updated.",
+        data=await apply_status_batch(updates)
+    )
\ No newline at end of file
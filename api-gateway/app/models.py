@@ -1,11 +1,12 @@
 import uuid
 import enum
+import datetime
 from pydantic import BaseModel, Field, HttpUrl, EmailStr
 from typing import Optional, Dict, Any
 
 from sqlalchemy import (
-    Integer, Column, String, DateTime, func, Enum as SQLAlchemyEnum, ForeignKey,
-    Index
+    Integer, SmallInteger, BigInteger, Column, String, Text, DateTime, func, Enum as SQLAlchemyEnum, ForeignKey,
+    Index, text
 )
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import declarative_base, Mapped, mapped_column
@@ -54,6 +55,29 @@ class NotificationLog(Base):
     )
 
 
+class NotificationOutbox(Base):
+    """
+    Messages waiting to be relayed to RabbitMQ. Rows are written in the same
+    transaction as their NotificationLog and deleted once the broker confirms them.
+    """
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        # Matches the relay's ORDER BY priority DESC, id.
+        Index('ix_notification_outbox_priority_id', text('priority DESC'), 'id'),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+
+    request_id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), nullable=False)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    priority: Mapped[int] = mapped_column(SmallInteger, nullable=False, default=0, server_default="0")
+    # Not relayed before this time; pushed back after each failed publish.
+    available_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
 
 class UserData(BaseModel):
     name: str
@@ -68,6 +92,8 @@ class NotificationRequest(BaseModel):
     request_id: uuid.UUID
     priority: int
     metadata: Optional[Dict[str, Any]] = None
+    # Held back by the gateway until this time; sent straight away if unset or past.
+    send_at: Optional[datetime.datetime] = None
 
     class Config:
         from_attributes = True
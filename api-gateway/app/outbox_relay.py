@@ -0,0 +1,168 @@
+import asyncio
+from typing import Optional
+from sqlalchemy import select, delete, update, func
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+from .amqp_client import AMQPPublisher, publisher
+from .config import settings
+from .database import AsyncSessionFactory
+from .models import NotificationOutbox, NotificationRequest, NotificationLog, NotificationStatus
+from .redis_client import get_redis
+from .status_cache import StatusCache, status_cache, status_entry
+from .status_stream import StatusStreamHub, status_stream
+
+
+class OutboxRelay:
+    """
+    Background task that streams `notification_outbox` rows to RabbitMQ.
+
+    Each pass locks a batch of rows, highest priority first, with FOR UPDATE
+    SKIP LOCKED, so several gateway replicas can relay concurrently without
+    publishing the same row twice. Confirmed rows are deleted in the same transaction; rows whose
+    publish failed stay in the outbox and are retried after an exponential
+    backoff (`backoff_base` * 2^attempts seconds, up to `backoff_max`). A row
+    that fails `max_attempts` times, or cannot be parsed, is dropped and its
+    notification marked failed, through `cache` and `stream` when those
+    are given, as the status updater does.
+    """
+
+    def __init__(
+        self,
+        publisher: AMQPPublisher,
+        session_factory: async_sessionmaker[AsyncSession],
+        batch_size: int = 500,
+        poll_interval_ms: float = 200.0,
+        max_attempts: int = 10,
+        backoff_base: float = 1.0,
+        backoff_max: float = 300.0,
+        cache: Optional[StatusCache] = None,
+        stream: Optional[StatusStreamHub] = None
+    ):
+        self.publisher = publisher
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval_ms / 1000
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cache = cache
+        self.stream = stream
+
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            print("Outbox relay started.")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            print("Outbox relay stopped.")
+
+    def wake(self):
+        """Lets the relay pick up freshly committed rows without waiting for the next poll."""
+        self._wakeup.set()
+
+    async def run_once(self) -> int:
+        """Relays one batch of outbox rows. Returns how many were published."""
+        dead: list[tuple[NotificationOutbox, str]] = []
+        async with self.session_factory() as session:
+            async with session.begin():
+                result = await session.execute(
+                    select(NotificationOutbox)
+                    .where(NotificationOutbox.available_at <= func.now())
+                    .order_by(NotificationOutbox.priority.desc(), NotificationOutbox.id)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+                rows = result.scalars().all()
+                if not rows:
+                    return 0
+
+                publishable: list[NotificationOutbox] = []
+                requests: list[NotificationRequest] = []
+                for row in rows:
+                    try:
+                        requests.append(NotificationRequest.model_validate_json(row.payload))
+                        publishable.append(row)
+                    except ValueError as e:
+                        dead.append((row, f"Invalid outbox payload: {e}"))
+
+                results = await self.publisher.publish_batch(requests) if requests else []
+
+                published: list[int] = []
+                failed: list[int] = []
+                for row, error in zip(publishable, results):
+                    attempts = (row.attempts or 0) + 1
+                    if error is None:
+                        published.append(row.id)
+                    elif attempts >= self.max_attempts:
+                        dead.append((row, f"Failed to publish after {attempts} attempts: {error}"))
+                    else:
+                        failed.append(row.id)
+
+                if published or dead:
+                    await session.execute(
+                        delete(NotificationOutbox).where(NotificationOutbox.id.in_(published + [row.id for row, _ in dead]))
+                    )
+                if failed:
+                    backoff = func.least(func.power(2, NotificationOutbox.attempts) * self.backoff_base, self.backoff_max)
+                    await session.execute(
+                        update(NotificationOutbox)
+                        .where(NotificationOutbox.id.in_(failed))
+                        .values(
+                            attempts=NotificationOutbox.attempts + 1,
+                            available_at=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, backoff)
+                        )
+                    )
+                    print(f"Outbox relay: {len(failed)} messages failed to publish, will retry.")
+                for row, reason in dead:
+                    print(f"Outbox relay: giving up on {row.request_id}: {reason}")
+                    await session.execute(
+                        update(NotificationLog)
+                        .where(NotificationLog.request_id == row.request_id, NotificationLog.status == NotificationStatus.pending)
+                        .values(status=NotificationStatus.failed, error_message=reason)
+                    )
+
+        entries = [status_entry(row.request_id, NotificationStatus.failed, reason) for row, reason in dead]
+        if entries and self.cache:
+            await self.cache.store(get_redis(), entries)
+        if entries and self.stream:
+            await self.stream.publish(get_redis(), entries)
+
+        return len(published)
+
+    async def _run(self):
+        while True:
+            try:
+                relayed = await self.run_once()
+            except Exception as e:
+                print(f"Outbox relay error: {e}")
+                relayed = 0
+
+            # A full batch means there is probably more waiting, so go again straight away.
+            if relayed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+
+outbox_relay = OutboxRelay(
+    publisher,
+    AsyncSessionFactory,
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    poll_interval_ms=settings.OUTBOX_POLL_INTERVAL_MS,
+    max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+    backoff_base=settings.OUTBOX_RETRY_BACKOFF,
+    backoff_max=settings.OUTBOX_RETRY_BACKOFF_MAX,
+    cache=status_cache,
+    stream=status_stream
+)
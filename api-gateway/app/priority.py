@@ -0,0 +1,16 @@
+from .config import settings
+from .models import NotificationRequest
+
+
+def amqp_priority(priority: int) -> int:
+    """Clamps a request's priority onto the queues' 0..AMQP_MAX_PRIORITY range."""
+    return max(0, min(priority, settings.AMQP_MAX_PRIORITY))
+
+
+def is_high_priority(request: NotificationRequest) -> bool:
+    return request.priority >= settings.HIGH_PRIORITY_THRESHOLD
+
+
+def low_priority_limit(max_queue_depth: int, reserved_fraction: float) -> int:
+    """Queue depth above which only high-priority requests are admitted."""
+    return max(1, int(max_queue_depth * (1 - reserved_fraction)))
@@ -0,0 +1,182 @@
+import asyncio
+import time
+from typing import Optional
+from .amqp_client import AMQPPublisher, publisher
+from .config import settings
+from .models import NotificationRequest
+from .priority import is_high_priority, low_priority_limit
+
+
+class PublishQueueFull(Exception):
+    """Raised when the batcher's queue is at capacity (back-pressure)."""
+
+
+class PublishBatcher:
+    """
+    Buffers publish requests from concurrent handlers and flushes them
+    to RabbitMQ as confirm batches. A batch is flushed when it reaches
+    `max_batch_size` messages or when its oldest message has waited
+    `max_latency_ms`, whichever comes first. Each caller of `submit`
+    is resolved once its own message in the batch has been confirmed.
+    The last `reserved_fraction` of the queue only admits high-priority
+    requests.
+    """
+
+    def __init__(
+        self,
+        publisher: AMQPPublisher,
+        max_latency_ms: float = 5.0,
+        max_batch_size: int = 100,
+        max_queue_depth: int = 10000,
+        reserved_fraction: float = 0.0
+    ):
+        self.publisher = publisher
+        self.max_latency = max_latency_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.max_queue_depth = max_queue_depth
+        self.low_priority_depth = low_priority_limit(max_queue_depth, reserved_fraction)
+
+        self._queue: asyncio.Queue[tuple[NotificationRequest, asyncio.Future]] = asyncio.Queue(maxsize=max_queue_depth)
+        self._task: Optional[asyncio.Task] = None
+        self._flushing: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.submitted = 0
+        self.rejected = 0
+        self.published = 0
+        self.failed = 0
+        self.batches = 0
+        self.peak_queue_depth = 0
+        self.last_flush_ms = 0.0
+
+    async def start(self):
+        self._stopping = False
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            print("Publish batcher started.")
+
+    async def stop(self):
+        """
+        Stops accepting submissions, lets the batch being published finish
+        and flushes what is still queued, so every waiting caller is resolved.
+        """
+        self._stopping = True
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flushing:
+            await self._flushing
+            self._flushing = None
+
+        while not self._queue.empty():
+            await self._flush(self._drain(self.max_batch_size))
+        print("Publish batcher stopped.")
+
+    async def submit(self, request: NotificationRequest):
+        """
+        Queues a request for the next batch and waits for its confirm.
+        Raises PublishQueueFull immediately if the queue is at capacity
+        (for the request's priority) or the batcher is stopping.
+        """
+        if self._stopping:
+            self.rejected += 1
+            raise PublishQueueFull("Publish batcher is shutting down")
+        if not is_high_priority(request) and self._queue.qsize() >= self.low_priority_depth:
+            self.rejected += 1
+            raise PublishQueueFull(f"Publish queue is full for low-priority requests ({self.low_priority_depth} pending)")
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((request, future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise PublishQueueFull(f"Publish queue is full ({self.max_queue_depth} pending)")
+
+        self.submitted += 1
+        self.peak_queue_depth = max(self.peak_queue_depth, self._queue.qsize())
+        await future
+
+    def stats(self) -> dict:
+        """Back-pressure and throughput counters for monitoring."""
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "low_priority_queue_depth": self.low_priority_depth,
+            "peak_queue_depth": self.peak_queue_depth,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "published": self.published,
+            "failed": self.failed,
+            "batches": self.batches,
+            "avg_batch_size": round((self.published + self.failed) / self.batches, 2) if self.batches else 0.0,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+    def _drain(self, limit: int) -> list[tuple[NotificationRequest, asyncio.Future]]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_latency
+
+            try:
+                while len(batch) < self.max_batch_size:
+                    batch.extend(self._drain(self.max_batch_size - len(batch)))
+                    timeout = deadline - loop.time()
+                    if len(batch) >= self.max_batch_size or timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # Stopped while collecting: these are already off the queue.
+                self._flushing = asyncio.create_task(self._flush(batch))
+                raise
+
+            # Shielded so stop() cannot abandon a batch mid-publish; it
+            # waits for self._flushing instead.
+            self._flushing = asyncio.create_task(self._flush(batch))
+            await asyncio.shield(self._flushing)
+            self._flushing = None
+
+    async def _flush(self, batch: list[tuple[NotificationRequest, asyncio.Future]]):
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        try:
+            results = await self.publisher.publish_batch([request for request, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, BaseException):
+                self.failed += 1
+                if not future.done():
+                    future.set_exception(result)
+            else:
+                self.published += 1
+                if not future.done():
+                    future.set_result(None)
+
+        self.batches += 1
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+
+
+publish_batcher = PublishBatcher(
+    publisher,
+    max_latency_ms=settings.PUBLISH_BATCH_MAX_LATENCY_MS,
+    max_batch_size=settings.PUBLISH_BATCH_SIZE,
+    max_queue_depth=settings.PUBLISH_QUEUE_DEPTH,
+    reserved_fraction=settings.HIGH_PRIORITY_RESERVED_FRACTION
+)
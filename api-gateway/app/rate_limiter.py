@@ -0,0 +1,240 @@
+import hashlib
+import uuid
+from typing import NamedTuple, Optional
+import redis.asyncio as redis
+from redis.exceptions import NoScriptError
+from .config import settings
+
+# Both scripts take one key per rule and, in ARGV, a cost followed by a
+# (limit, window_ms) pair per key. Every rule is checked before any is
+# charged, so a request is either admitted by all of its rules or by none.
+# They return {allowed, limit, remaining, reset_ms, retry_after_ms} for the
+# most restrictive rule. The clock is Redis' own TIME, so replicas agree.
+
+TOKEN_BUCKET_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local cost = tonumber(ARGV[1])
+
+local allowed = 1
+local tokens = {}
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[i * 2])
+    local window = tonumber(ARGV[i * 2 + 1])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local current = tonumber(bucket[1]) or limit
+    local last = tonumber(bucket[2]) or now
+    current = math.min(limit, current + math.max(0, now - last) * limit / window)
+    tokens[i] = current
+    if current < cost then
+        allowed = 0
+    end
+end
+
+local result = nil
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[i * 2])
+    local window = tonumber(ARGV[i * 2 + 1])
+    local rate = limit / window
+    local current = tokens[i]
+    if allowed == 1 then
+        current = current - cost
+    end
+    redis.call('HSET', key, 'tokens', tostring(current), 'ts', now)
+    redis.call('PEXPIRE', key, window)
+
+    local remaining = math.floor(current)
+    local reset = math.ceil((limit - current) / rate)
+    local retry_after = 0
+    if current < cost then
+        retry_after = math.ceil((cost - current) / rate)
+    end
+    if result == nil or retry_after > result[5] or (result[5] == 0 and remaining < result[3]) then
+        result = {allowed, limit, remaining, reset, retry_after}
+    end
+end
+return result
+"""
+
+SLIDING_LOG_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local cost = tonumber(ARGV[1])
+local nonce = ARGV[#ARGV]
+
+local allowed = 1
+local counts = {}
+for i, key in ipairs(KEYS) do
+    local window = tonumber(ARGV[i * 2 + 1])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    counts[i] = redis.call('ZCARD', key)
+    if counts[i] + cost > tonumber(ARGV[i * 2]) then
+        allowed = 0
+    end
+end
+
+local result = nil
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[i * 2])
+    local window = tonumber(ARGV[i * 2 + 1])
+    local count = counts[i]
+    if allowed == 1 then
+        for n = 1, cost do
+            redis.call('ZADD', key, now, now .. ':' .. nonce .. ':' .. n)
+        end
+        count = count + cost
+    end
+    redis.call('PEXPIRE', key, window)
+
+    local reset = window
+    local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+    if oldest[2] then
+        reset = math.max(0, tonumber(oldest[2]) + window - now)
+    end
+    local remaining = math.max(0, limit - count)
+    local retry_after = 0
+    if count + cost > limit and allowed == 0 then
+        retry_after = reset
+    end
+    if result == nil or retry_after > result[5] or (result[5] == 0 and remaining < result[3]) then
+        result = {allowed, limit, remaining, reset, retry_after}
+    end
+end
+return result
+"""
+
+SCRIPTS = {
+    "token_bucket": TOKEN_BUCKET_SCRIPT,
+    "sliding_log": SLIDING_LOG_SCRIPT,
+}
+
+
+class RateLimitRule(NamedTuple):
+    key: str
+    limit: int
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_ms: int
+    retry_after_ms: int
+
+    def headers(self) -> dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(-(-self.reset_ms // 1000)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, -(-self.retry_after_ms // 1000)))
+        return headers
+
+
+class RateLimiter:
+    """
+    Atomic multi-rule rate limiter. All rules that apply to a request are
+    evaluated by a single EVALSHA, which callers can queue on a pipeline
+    alongside their other hot-path reads.
+    """
+
+    def __init__(
+        self,
+        algorithm: str = "token_bucket",
+        window_seconds: int = 60,
+        default_limit: int = 20,
+        per_user_limit: int = 0,
+        per_type_limits: Optional[dict[str, int]] = None,
+        api_key_limits: Optional[dict[str, int]] = None,
+        user_limits: Optional[dict[str, int]] = None
+    ):
+        if algorithm not in SCRIPTS:
+            raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.script = SCRIPTS[algorithm]
+        self.sha = hashlib.sha1(self.script.encode()).hexdigest()
+        self.window_ms = window_seconds * 1000
+        self.default_limit = default_limit
+        self.per_user_limit = per_user_limit
+        self.per_type_limits = per_type_limits or {}
+        self.api_key_limits = api_key_limits or {}
+        self.user_limits = user_limits or {}
+
+    def rules_for(
+        self,
+        client_ip: str,
+        api_key: Optional[str] = None,
+        user_id: Optional[str] = None,
+        notification_type: Optional[str] = None
+    ) -> list[RateLimitRule]:
+        """
+        Builds the rules for one request. Callers are identified by API key
+        when they send a configured one and by client IP otherwise; per-user and
+        per-notification-type rules apply on top when configured.
+        A limit of 0 disables that rule.
+        """
+        prefix = f"rate_limit:{self.algorithm}"
+        rules = []
+
+        # Only configured keys get their own bucket; otherwise rotating
+        # made-up keys would be a way around the per-IP limit.
+        if api_key and api_key in self.api_key_limits:
+            digest = hashlib.sha256(api_key.encode()).hexdigest()[:32]
+            rules.append(RateLimitRule(f"{prefix}:api_key:{digest}", self.api_key_limits[api_key]))
+        else:
+            rules.append(RateLimitRule(f"{prefix}:ip:{client_ip}", self.default_limit))
+
+        if user_id:
+            user_limit = self.user_limits.get(user_id, self.per_user_limit)
+            if user_limit:
+                rules.append(RateLimitRule(f"{prefix}:user:{user_id}", user_limit))
+
+        if notification_type:
+            type_limit = self.per_type_limits.get(notification_type, 0)
+            if type_limit:
+                rules.append(RateLimitRule(f"{prefix}:type:{notification_type}", type_limit))
+
+        return rules
+
+    def queue(self, pipeline, rules: list[RateLimitRule], cost: int = 1):
+        """Queues the limiter's EVALSHA on a pipeline."""
+        args: list = [cost]
+        for rule in rules:
+            args.extend([rule.limit, self.window_ms])
+        if self.algorithm == "sliding_log":
+            args.append(uuid.uuid4().hex)
+        pipeline.evalsha(self.sha, len(rules), *[rule.key for rule in rules], *args)
+
+    async def load(self, redis_client: redis.Redis):
+        """Loads the script so EVALSHA hits. Called on startup and after a NOSCRIPT."""
+        await redis_client.script_load(self.script)
+
+    @staticmethod
+    def parse(raw) -> RateLimitResult:
+        allowed, limit, remaining, reset_ms, retry_after_ms = (int(value) for value in raw)
+        return RateLimitResult(bool(allowed), limit, remaining, reset_ms, retry_after_ms)
+
+    async def check(self, redis_client: redis.Redis, rules: list[RateLimitRule], cost: int = 1) -> RateLimitResult:
+        """Runs the limiter on its own, outside of any other pipeline."""
+        try:
+            return await self._execute(redis_client, rules, cost)
+        except NoScriptError:
+            await self.load(redis_client)
+            return await self._execute(redis_client, rules, cost)
+
+    async def _execute(self, redis_client: redis.Redis, rules: list[RateLimitRule], cost: int) -> RateLimitResult:
+        pipeline = redis_client.pipeline(transaction=False)
+        self.queue(pipeline, rules, cost)
+        return self.parse((await pipeline.execute())[0])
+
+
+rate_limiter = RateLimiter(
+    algorithm=settings.RATE_LIMIT_ALGORITHM,
+    window_seconds=settings.RATE_LIMIT_WINDOW,
+    default_limit=settings.RATE_LIMIT_DEFAULT,
+    per_user_limit=settings.RATE_LIMIT_PER_USER,
+    per_type_limits=settings.RATE_LIMIT_PER_TYPE,
+    api_key_limits=settings.RATE_LIMIT_API_KEYS,
+    user_limits=settings.RATE_LIMIT_USERS
+)
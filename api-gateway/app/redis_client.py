@@ -1,30 +1,28 @@
-import redis
+import redis.asyncio as redis
 from typing import Optional
-from redis.exceptions import ConnectionError
 from .config import settings
 
-try:
-    redis_pool = redis.ConnectionPool(
-        host=settings.REDIS_HOST, 
-        port=6379, 
-        db=0, 
-        decode_responses=True
-    )
-    
-    redis_client: Optional[redis.Redis] = redis.Redis(connection_pool=redis_pool)
-    
-    redis_client.ping()
-    print("Redis client connected successfully.")
+redis_pool = redis.ConnectionPool(
+    host=settings.REDIS_HOST, 
+    port=6379, 
+    db=0, 
+    decode_responses=True,
+    max_connections=settings.REDIS_MAX_CONNECTIONS
+)
 
-except ConnectionError as e:
-    print(f"Failed to connect to Redis: {e}")
-    redis_client = None
+redis_client: Optional[redis.Redis] = redis.Redis(connection_pool=redis_pool)
 
 def get_redis() -> redis.Redis:
     """
-    A dependency function that provides a Redis client
-    from the connection pool.
+    A dependency function that provides an asyncio Redis client
+    backed by the shared connection pool.
     """
     if not redis_client:
         raise Exception("Redis connection not established")
-    return redis_client
\ No newline at end of file
+    return redis_client
+
+async def close_redis():
+    """Called by main.py's lifespan shutdown to release pooled connections."""
+    if redis_client:
+        await redis_client.aclose()
+    await redis_pool.disconnect()
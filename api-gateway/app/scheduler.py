@@ -0,0 +1,254 @@
+import asyncio
+import datetime
+import time
+from typing import Optional
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+from .amqp_client import AMQPPublisher, publisher
+from .config import settings
+from .database import AsyncSessionFactory
+from .redis_client import get_redis
+from .models import NotificationRequest, NotificationLog, NotificationStatus
+from .status_cache import StatusCache, status_cache, status_entry
+from .status_stream import StatusStreamHub, status_stream
+
+SCHEDULED_KEY = "scheduled:due"
+LEASED_KEY = "scheduled:leased"
+PAYLOADS_KEY = "scheduled:payloads"
+ATTEMPTS_KEY = "scheduled:attempts"
+
+# Moves up to ARGV[2] due request_ids (plus any whose lease expired) from the
+# due set to the leased set, with the lease deadline ARGV[3] as score, and
+# returns them with their payloads and failed publish counts. It runs
+# atomically, so replicas popping concurrently never get the same request_id.
+POP_DUE_SCRIPT = """
+local limit = tonumber(ARGV[2])
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, limit)
+if #ids < limit then
+    local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1], 'LIMIT', 0, limit - #ids)
+    for _, id in ipairs(expired) do
+        table.insert(ids, id)
+    end
+end
+if #ids == 0 then
+    return {}
+end
+for _, id in ipairs(ids) do
+    redis.call('ZREM', KEYS[1], id)
+    redis.call('ZADD', KEYS[2], ARGV[3], id)
+end
+return {ids, redis.call('HMGET', KEYS[3], unpack(ids)), redis.call('HMGET', KEYS[4], unpack(ids))}
+"""
+
+
+def due_at(request: NotificationRequest) -> Optional[float]:
+    """
+    The UNIX time `request` is due, or None if it should be sent now.
+    A send_at without a timezone is taken as UTC.
+    """
+    if request.send_at is None:
+        return None
+    send_at = request.send_at
+    if send_at.tzinfo is None:
+        send_at = send_at.replace(tzinfo=datetime.timezone.utc)
+    due = send_at.timestamp()
+    return due if due > time.time() else None
+
+
+class NotificationScheduler:
+    """
+    Holds notifications with a future send_at in Redis until they are due.
+
+    Request_ids are kept in a sorted set scored by due time, with their
+    payloads in a hash, so RabbitMQ and Postgres never see them early. A
+    background loop pops up to `batch_size` due entries at a time with a
+    Lua script and publishes them with publisher confirms. Popped entries
+    are leased for `lease_seconds` rather than deleted: they are removed
+    once confirmed, put back on a failed publish, and picked up again by
+    any replica if the one that popped them dies first. A notification that
+    fails to publish `max_attempts` times is dropped and marked failed in
+    its log row (given `session_factory`) and through `cache` and `stream`.
+    """
+
+    def __init__(
+        self,
+        publisher: AMQPPublisher,
+        batch_size: int = 500,
+        poll_interval_ms: float = 500.0,
+        lease_seconds: float = 60.0,
+        retry_delay: float = 5.0,
+        max_attempts: int = 10,
+        session_factory: Optional[async_sessionmaker[AsyncSession]] = None,
+        cache: Optional[StatusCache] = None,
+        stream: Optional[StatusStreamHub] = None
+    ):
+        self.publisher = publisher
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval_ms / 1000
+        self.lease_seconds = lease_seconds
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self.session_factory = session_factory
+        self.cache = cache
+        self.stream = stream
+
+        self._task: Optional[asyncio.Task] = None
+
+        self.scheduled = 0
+        self.published = 0
+        self.failed = 0
+        self.invalid = 0
+        self.dead = 0
+
+    async def start(self, redis_client: redis.Redis):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(redis_client))
+            print("Notification scheduler started.")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            print("Notification scheduler stopped.")
+
+    async def schedule(self, redis_client: redis.Redis, requests: list[tuple[NotificationRequest, float]]):
+        """Stores (request, due time) pairs in one transaction. Raises RedisError on failure."""
+        if not requests:
+            return
+        pipeline = redis_client.pipeline(transaction=True)
+        pipeline.hset(PAYLOADS_KEY, mapping={str(request.request_id): request.model_dump_json() for request, _ in requests})
+        pipeline.zadd(SCHEDULED_KEY, {str(request.request_id): due for request, due in requests})
+        await pipeline.execute()
+        self.scheduled += len(requests)
+
+    async def run_once(self, redis_client: redis.Redis) -> int:
+        """Publishes one batch of due notifications. Returns how many were popped."""
+        now = time.time()
+        popped = await redis_client.eval(
+            POP_DUE_SCRIPT, 4, SCHEDULED_KEY, LEASED_KEY, PAYLOADS_KEY, ATTEMPTS_KEY,
+            now, self.batch_size, now + self.lease_seconds
+        )
+        if not popped:
+            return 0
+
+        ids, payloads, attempts = popped
+        failed_before = {request_id: int(count or 0) for request_id, count in zip(ids, attempts)}
+        requests: list[NotificationRequest] = []
+        done: list[str] = []
+        for request_id, payload in zip(ids, payloads):
+            if payload is None:
+                # Nothing left to send (the payload was already cleaned up).
+                done.append(request_id)
+                continue
+            try:
+                requests.append(NotificationRequest.model_validate_json(payload))
+            except ValueError as e:
+                print(f"Dropping unreadable scheduled notification {request_id}: {e}")
+                self.invalid += 1
+                done.append(request_id)
+
+        results = await self.publisher.publish_batch(requests) if requests else []
+        retry: list[str] = []
+        dead: list[tuple[str, str]] = []
+        for request, error in zip(requests, results):
+            request_id = str(request.request_id)
+            if error is None:
+                done.append(request_id)
+                continue
+            attempts = failed_before[request_id] + 1
+            if attempts >= self.max_attempts:
+                dead.append((request_id, f"Failed to publish after {attempts} attempts: {error}"))
+                done.append(request_id)
+            else:
+                retry.append(request_id)
+        self.published += len(requests) - len(retry) - len(dead)
+
+        # Marked failed before the entries are dropped, so an error here
+        # leaves them leased and they are tried again once the lease expires.
+        if dead:
+            await self._mark_failed(dead)
+
+        pipeline = redis_client.pipeline(transaction=True)
+        if done:
+            pipeline.zrem(LEASED_KEY, *done)
+            pipeline.hdel(PAYLOADS_KEY, *done)
+            pipeline.hdel(ATTEMPTS_KEY, *done)
+        if retry:
+            print(f"Scheduler: {len(retry)} messages failed to publish, will retry.")
+            self.failed += len(retry)
+            pipeline.zrem(LEASED_KEY, *retry)
+            pipeline.zadd(SCHEDULED_KEY, {request_id: now + self.retry_delay for request_id in retry})
+            for request_id in retry:
+                pipeline.hincrby(ATTEMPTS_KEY, request_id, 1)
+        await pipeline.execute()
+
+        return len(ids)
+
+    async def _mark_failed(self, dead: list[tuple[str, str]]):
+        self.dead += len(dead)
+        for request_id, reason in dead:
+            print(f"Scheduler: giving up on {request_id}: {reason}")
+
+        if self.session_factory:
+            async with self.session_factory() as session:
+                async with session.begin():
+                    for request_id, reason in dead:
+                        await session.execute(
+                            update(NotificationLog)
+                            .where(NotificationLog.request_id == request_id, NotificationLog.status == NotificationStatus.pending)
+                            .values(status=NotificationStatus.failed, error_message=reason)
+                        )
+
+        entries = [status_entry(request_id, NotificationStatus.failed, reason) for request_id, reason in dead]
+        if self.cache:
+            await self.cache.store(get_redis(), entries)
+        if self.stream:
+            await self.stream.publish(get_redis(), entries)
+
+    async def stats(self, redis_client: redis.Redis) -> dict:
+        try:
+            waiting = await redis_client.zcard(SCHEDULED_KEY)
+            leased = await redis_client.zcard(LEASED_KEY)
+        except RedisError as e:
+            print(f"Redis scheduler ZCARD error: {e}")
+            waiting = leased = None
+        return {
+            "waiting": waiting,
+            "leased": leased,
+            "scheduled": self.scheduled,
+            "published": self.published,
+            "failed": self.failed,
+            "invalid": self.invalid,
+            "dead": self.dead,
+        }
+
+    async def _run(self, redis_client: redis.Redis):
+        while True:
+            try:
+                popped = await self.run_once(redis_client)
+            except Exception as e:
+                print(f"Scheduler error: {e}")
+                popped = 0
+
+            # A full batch means there is probably more due, so go again straight away.
+            if popped < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+
+scheduler = NotificationScheduler(
+    publisher,
+    batch_size=settings.SCHEDULER_BATCH_SIZE,
+    poll_interval_ms=settings.SCHEDULER_POLL_INTERVAL_MS,
+    lease_seconds=settings.SCHEDULER_LEASE_SECONDS,
+    retry_delay=settings.SCHEDULER_RETRY_DELAY,
+    max_attempts=settings.SCHEDULER_MAX_ATTEMPTS,
+    session_factory=AsyncSessionFactory,
+    cache=status_cache,
+    stream=status_stream
+)
@@ -0,0 +1,138 @@
+import datetime
+import uuid
+from typing import Optional
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from .local_cache import LocalCache
+from .models import NotificationStatus
+from .config import settings
+
+STATUS_CACHE_PREFIX = "notif_status:"
+
+# A pending entry must never overwrite a newer terminal one (the webhook for
+# a fast delivery can land before the create path writes its entry), so
+# pending entries are only written when nothing is cached yet.
+SET_IF_ABSENT_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('HSET', KEYS[1], 's', ARGV[1], 'e', ARGV[2], 'u', ARGV[3])
+redis.call('PEXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+
+def status_cache_key(request_id: uuid.UUID | str) -> str:
+    return f"{STATUS_CACHE_PREFIX}{request_id}"
+
+
+def status_entry(
+    request_id: uuid.UUID | str,
+    new_status: NotificationStatus,
+    error: Optional[str] = None,
+    last_updated: Optional[str] = None
+) -> dict:
+    """The status payload served by GET /api/v1/notifications/{request_id}/status/."""
+    return {
+        "request_id": str(request_id),
+        "status": new_status.value,
+        "last_updated": last_updated or str(datetime.datetime.now(datetime.timezone.utc)),
+        "error": error
+    }
+
+
+class StatusCache:
+    """
+    Write-through cache of notification statuses.
+
+    Each status is a small Redis hash (s=status, e=error, u=last updated)
+    under notif_status:{request_id}. Pending entries expire after
+    `pending_ttl` seconds so a missed update cannot leave them stale for
+    long; terminal entries never change again (transitions are
+    forward-only), so they live for `terminal_ttl` and are also kept in an
+    in-process LRU.
+    """
+
+    def __init__(self, pending_ttl: float = 300.0, terminal_ttl: float = 86400.0, local: Optional[LocalCache] = None):
+        self.pending_ttl = pending_ttl
+        self.terminal_ttl = terminal_ttl
+        self.local = local or LocalCache()
+
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, redis_client: redis.Redis, request_id: uuid.UUID) -> Optional[dict]:
+        return (await self.get_many(redis_client, [request_id])).get(str(request_id))
+
+    async def get_many(self, redis_client: redis.Redis, request_ids: list[uuid.UUID]) -> dict[str, dict]:
+        """
+        Looks up several statuses: the local tier first, then one pipelined
+        HGETALL per remaining ID. Missing IDs are left out of the result.
+        """
+        entries: dict[str, dict] = {}
+        remote: list[uuid.UUID] = []
+        for request_id in request_ids:
+            entry = self.local.get(str(request_id))
+            if entry is not None:
+                entries[str(request_id)] = entry
+            else:
+                remote.append(request_id)
+
+        if remote:
+            try:
+                pipeline = redis_client.pipeline(transaction=False)
+                for request_id in remote:
+                    pipeline.hgetall(status_cache_key(request_id))
+                results = await pipeline.execute()
+            except RedisError as e:
+                print(f"Redis status cache GET error, falling back to the database: {e}")
+                results = [None] * len(remote)
+
+            for request_id, fields in zip(remote, results):
+                if fields:
+                    entry = status_entry(request_id, NotificationStatus(fields["s"]), fields.get("e") or None, fields.get("u"))
+                    self._remember(entry)
+                    entries[str(request_id)] = entry
+
+        self.hits += len(entries)
+        self.misses += len(request_ids) - len(entries)
+        return entries
+
+    async def store(self, redis_client: redis.Redis, entries: list[dict]):
+        """Writes entries in one pipelined round-trip. Errors are logged, not raised."""
+        if not entries:
+            return
+
+        pipeline = redis_client.pipeline(transaction=False)
+        for entry in entries:
+            key = status_cache_key(entry["request_id"])
+            fields = {"s": entry["status"], "e": entry["error"] or "", "u": entry["last_updated"]}
+            if entry["status"] == NotificationStatus.pending.value:
+                pipeline.eval(SET_IF_ABSENT_SCRIPT, 1, key, fields["s"], fields["e"], fields["u"], int(self.pending_ttl * 1000))
+            else:
+                pipeline.hset(key, mapping=fields)
+                pipeline.pexpire(key, int(self.terminal_ttl * 1000))
+            self._remember(entry)
+
+        try:
+            await pipeline.execute()
+        except RedisError as e:
+            print(f"Redis status cache SET error: {e}")
+
+    def _remember(self, entry: dict):
+        if entry["status"] != NotificationStatus.pending.value:
+            self.local.set(entry["request_id"], entry, size=1)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "local": self.local.stats(),
+        }
+
+
+status_cache = StatusCache(
+    pending_ttl=settings.STATUS_CACHE_PENDING_TTL,
+    terminal_ttl=settings.STATUS_CACHE_TERMINAL_TTL,
+    local=LocalCache(max_entries=settings.STATUS_LOCAL_CACHE_MAX_ENTRIES, ttl=settings.STATUS_LOCAL_CACHE_TTL)
+)
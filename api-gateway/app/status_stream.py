@@ -0,0 +1,170 @@
+import asyncio
+import json
+from typing import AsyncIterator
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from .models import NotificationStatus
+from .config import settings
+
+STATUS_EVENTS_CHANNEL = "notif_status_events"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+class StreamCapacityExceeded(Exception):
+    """Raised when this replica already holds `max_subscriptions` streams."""
+
+
+def sse_frame(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+class StatusSubscription:
+    """One client stream: the request_ids it still waits on and its event queue."""
+
+    def __init__(self, request_ids: list[str]):
+        self.request_ids = set(request_ids)
+        self.pending = set(self.request_ids)
+        # At most one transition per ID is ever published (transitions are
+        # forward-only), so this bound is never reached in practice.
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=len(self.pending))
+        self.closed = False
+
+    def accept(self, entry: dict) -> bool:
+        """Records an entry; False if its ID is no longer waited on."""
+        if entry["request_id"] not in self.pending:
+            return False
+        if entry["status"] != NotificationStatus.pending.value:
+            self.pending.discard(entry["request_id"])
+        return True
+
+
+class StatusStreamHub:
+    """
+    Fans status transitions out to Server-Sent Event streams.
+
+    The status updater publishes each applied batch as one message on
+    STATUS_EVENTS_CHANNEL. Every replica holds a single subscriber task
+    (`listen`) that routes events to the local streams waiting on those
+    request_ids, so an idle stream costs a dict entry and a queue, not a
+    Redis connection.
+    """
+
+    def __init__(self, max_subscriptions: int = 50000, heartbeat: float = 15.0):
+        self.max_subscriptions = max_subscriptions
+        self.heartbeat = heartbeat
+
+        self._subscribers: dict[str, set[StatusSubscription]] = {}
+        self.active = 0
+
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.rejected = 0
+
+    def subscribe(self, request_ids: list[str]) -> StatusSubscription:
+        if self.active >= self.max_subscriptions:
+            self.rejected += 1
+            raise StreamCapacityExceeded(f"Status stream capacity reached ({self.max_subscriptions} open)")
+
+        subscription = StatusSubscription(request_ids)
+        for request_id in subscription.request_ids:
+            self._subscribers.setdefault(request_id, set()).add(subscription)
+        self.active += 1
+        return subscription
+
+    def unsubscribe(self, subscription: StatusSubscription):
+        """Removes a subscription. Safe to call more than once."""
+        if subscription.closed:
+            return
+        subscription.closed = True
+        for request_id in subscription.request_ids:
+            subscribers = self._subscribers.get(request_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[request_id]
+        self.active -= 1
+
+    def dispatch(self, entries: list[dict]):
+        for entry in entries:
+            for subscription in self._subscribers.get(entry["request_id"], ()):
+                try:
+                    subscription.queue.put_nowait(entry)
+                    self.delivered += 1
+                except asyncio.QueueFull:
+                    self.dropped += 1
+
+    async def publish(self, redis_client: redis.Redis, entries: list[dict]):
+        """Publishes a batch of entries in one message. Errors are logged, not raised."""
+        if not entries:
+            return
+        try:
+            await redis_client.publish(STATUS_EVENTS_CHANNEL, json.dumps(entries))
+            self.published += len(entries)
+        except RedisError as e:
+            print(f"Redis status event PUBLISH error: {e}")
+
+    async def listen(self, redis_client: redis.Redis):
+        """Background task routing published status events to local streams."""
+        while True:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(STATUS_EVENTS_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.dispatch(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Status event listener error, resubscribing: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    async def events(
+        self,
+        subscription: StatusSubscription,
+        snapshot: dict[str, dict]
+    ) -> AsyncIterator[bytes]:
+        """
+        Yields the current status of every subscribed ID (`not_found` for
+        unknown ones), then each transition as it is published, with a
+        comment line every `heartbeat` seconds. The stream ends once every
+        ID has reached a terminal status.
+        """
+        try:
+            for request_id in list(subscription.pending):
+                entry = snapshot.get(request_id)
+                if entry is None:
+                    subscription.pending.discard(request_id)
+                    yield sse_frame("not_found", {"request_id": request_id})
+                elif subscription.accept(entry):
+                    yield sse_frame("status", entry)
+
+            while subscription.pending:
+                try:
+                    entry = await asyncio.wait_for(subscription.queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                if subscription.accept(entry):
+                    yield sse_frame("status", entry)
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> dict:
+        return {
+            "active_streams": self.active,
+            "max_subscriptions": self.max_subscriptions,
+            "watched_ids": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+        }
+
+
+status_stream = StatusStreamHub(
+    max_subscriptions=settings.STATUS_STREAM_MAX_SUBSCRIPTIONS,
+    heartbeat=settings.STATUS_STREAM_HEARTBEAT
+)
@@ -0,0 +1,274 @@
+import asyncio
+import time
+import uuid
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+from .config import settings
+from .database import AsyncSessionFactory
+from .redis_client import get_redis
+from .status_cache import StatusCache, status_cache, status_entry
+from .status_stream import StatusStreamHub, status_stream
+from .models import StatusUpdateRequest, NotificationStatus
+
+
+class StatusQueueFull(Exception):
+    """Raised when the updater's queue is at capacity (back-pressure)."""
+
+
+class StatusNotFound(Exception):
+    """Raised when a status update names a request_id that was never logged."""
+
+
+# One round-trip per batch. Transitions are forward-only: only rows still
+# pending are updated, so duplicate or out-of-order reports for a notification
+# that already reached a terminal state change nothing. The final SELECT reads
+# the pre-update snapshot to tell those ignored reports apart from unknown IDs.
+UPDATE_BATCH_SQL = text("""
+    WITH reports AS (
+        SELECT * FROM unnest(
+            CAST(:request_ids AS uuid[]),
+            CAST(:statuses AS notification_status_enum[]),
+            CAST(:errors AS varchar[])
+        ) AS r(request_id, status, error)
+    ),
+    updated AS (
+        UPDATE notification_logs AS l
+        SET status = reports.status, error_message = reports.error, updated_at = now()
+        FROM reports
+        WHERE l.request_id = reports.request_id
+          AND l.status = 'pending'
+          AND reports.status <> 'pending'
+        RETURNING l.request_id
+    )
+    SELECT
+        reports.request_id,
+        CASE
+            WHEN updated.request_id IS NOT NULL THEN 'updated'
+            WHEN l.request_id IS NOT NULL THEN 'ignored'
+            ELSE 'not_found'
+        END AS outcome
+    FROM reports
+    LEFT JOIN updated ON updated.request_id = reports.request_id
+    LEFT JOIN notification_logs AS l ON l.request_id = reports.request_id
+""")
+
+
+class StatusUpdater:
+    """
+    Applies delivery status reports to notification_logs in batches.
+
+    `apply` writes a list of updates with a single UPDATE ... FROM unnest.
+    `submit` is for single-event webhooks: events from concurrent handlers
+    are coalesced and flushed when `max_batch_size` are waiting or the
+    oldest has waited `max_latency_ms`, and each caller gets its own outcome.
+    Applied transitions are written through to `cache` and published to
+    `stream` subscribers when those are given.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        cache: Optional[StatusCache] = None,
+        stream: Optional[StatusStreamHub] = None,
+        max_latency_ms: float = 5.0,
+        max_batch_size: int = 500,
+        max_queue_depth: int = 10000
+    ):
+        self.session_factory = session_factory
+        self.cache = cache
+        self.stream = stream
+        self.max_latency = max_latency_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.max_queue_depth = max_queue_depth
+
+        self._queue: asyncio.Queue[tuple[StatusUpdateRequest, asyncio.Future]] = asyncio.Queue(maxsize=max_queue_depth)
+        self._task: Optional[asyncio.Task] = None
+        self._flushing: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.updated = 0
+        self.ignored = 0
+        self.not_found = 0
+        self.failed = 0
+        self.batches = 0
+        self.rejected = 0
+        self.last_flush_ms = 0.0
+
+    async def start(self):
+        self._stopping = False
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            print("Status updater started.")
+
+    async def stop(self):
+        """
+        Stops accepting updates, lets the batch being applied finish and
+        applies what is still queued, so every waiting caller is resolved.
+        """
+        self._stopping = True
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flushing:
+            await self._flushing
+            self._flushing = None
+
+        while not self._queue.empty():
+            await self._flush(self._drain(self.max_batch_size))
+        print("Status updater stopped.")
+
+    async def submit(self, update: StatusUpdateRequest) -> str:
+        """
+        Queues one status update for the next flush and waits for its
+        outcome ("updated" or "ignored"). Raises StatusQueueFull immediately
+        if the queue is at capacity or the updater is stopping, and
+        StatusNotFound if the request_id is unknown.
+        """
+        if self._stopping:
+            self.rejected += 1
+            raise StatusQueueFull("Status updater is shutting down")
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((update, future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise StatusQueueFull(f"Status update queue is full ({self.max_queue_depth} pending)")
+        return await future
+
+    async def apply(self, updates: list[StatusUpdateRequest]) -> dict[uuid.UUID, str]:
+        """
+        Applies a batch of updates in one statement and returns the outcome
+        for each distinct notification_id: "updated", "ignored" (already in a
+        terminal state) or "not_found". When an ID appears more than once,
+        its first terminal report wins, as it would have in separate batches.
+        """
+        outcomes, _ = await self._apply(updates)
+        return outcomes
+
+    async def _apply(
+        self,
+        updates: list[StatusUpdateRequest]
+    ) -> tuple[dict[uuid.UUID, str], dict[uuid.UUID, StatusUpdateRequest]]:
+        """Like `apply`, but also returns the report chosen for each notification_id."""
+        latest: dict[uuid.UUID, StatusUpdateRequest] = {}
+        for update in updates:
+            chosen = latest.get(update.notification_id)
+            if chosen is None or chosen.status == NotificationStatus.pending:
+                latest[update.notification_id] = update
+        if not latest:
+            return {}, {}
+
+        started = time.perf_counter()
+        async with self.session_factory() as session:
+            async with session.begin():
+                result = await session.execute(UPDATE_BATCH_SQL, {
+                    "request_ids": list(latest),
+                    "statuses": [update.status.value for update in latest.values()],
+                    "errors": [update.error for update in latest.values()],
+                })
+                outcomes = {request_id: outcome for request_id, outcome in result.all()}
+
+        entries = [
+            status_entry(request_id, update.status, update.error)
+            for request_id, update in latest.items()
+            if outcomes.get(request_id) == "updated"
+        ]
+        if entries and self.cache:
+            await self.cache.store(get_redis(), entries)
+        if entries and self.stream:
+            await self.stream.publish(get_redis(), entries)
+
+        counts = list(outcomes.values())
+        self.updated += counts.count("updated")
+        self.ignored += counts.count("ignored")
+        self.not_found += counts.count("not_found")
+        self.batches += 1
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+        return outcomes, latest
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "rejected": self.rejected,
+            "updated": self.updated,
+            "ignored": self.ignored,
+            "not_found": self.not_found,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+    def _drain(self, limit: int) -> list[tuple[StatusUpdateRequest, asyncio.Future]]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_latency
+
+            try:
+                while len(batch) < self.max_batch_size:
+                    batch.extend(self._drain(self.max_batch_size - len(batch)))
+                    timeout = deadline - loop.time()
+                    if len(batch) >= self.max_batch_size or timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # Stopped while collecting: these are already off the queue.
+                self._flushing = asyncio.create_task(self._flush(batch))
+                raise
+
+            # Shielded so stop() cannot abandon a batch mid-update; it
+            # waits for self._flushing instead.
+            self._flushing = asyncio.create_task(self._flush(batch))
+            await asyncio.shield(self._flushing)
+            self._flushing = None
+
+    async def _flush(self, batch: list[tuple[StatusUpdateRequest, asyncio.Future]]):
+        if not batch:
+            return
+
+        try:
+            outcomes, chosen = await self._apply([update for update, _ in batch])
+        except Exception as e:
+            print(f"Status updater flush failed: {e}")
+            self.failed += len(batch)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for update, future in batch:
+            if future.done():
+                continue
+            outcome = outcomes[update.notification_id]
+            # Only the report that was written made the transition.
+            if outcome == "updated" and chosen[update.notification_id] is not update:
+                outcome = "ignored"
+            if outcome == "not_found":
+                future.set_exception(StatusNotFound(f"Notification ID not found: {update.notification_id}"))
+            else:
+                future.set_result(outcome)
+
+
+status_updater = StatusUpdater(
+    AsyncSessionFactory,
+    cache=status_cache,
+    stream=status_stream,
+    max_latency_ms=settings.STATUS_UPDATE_MAX_LATENCY_MS,
+    max_batch_size=settings.STATUS_UPDATE_BATCH_SIZE,
+    max_queue_depth=settings.STATUS_UPDATE_QUEUE_DEPTH
+)
@@ -0,0 +1,87 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+from .config import settings
+from .http_client import get_users_batch_from_service
+
+
+class UserBatchLoader:
+    """
+    DataLoader-style coalescer for user lookups. Keys requested within
+    `max_latency_ms` of each other (or until `max_batch_size` distinct keys
+    are waiting) are resolved by one call to `batch_fn`. Each caller gets
+    its own user, or None if the batch did not return it.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[list[str]], Awaitable[dict[str, dict]]],
+        max_latency_ms: float = 2.0,
+        max_batch_size: int = 500
+    ):
+        self.batch_fn = batch_fn
+        self.max_latency = max_latency_ms / 1000
+        self.max_batch_size = max_batch_size
+
+        self._pending: dict[str, asyncio.Future] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._inflight: set[asyncio.Task] = set()
+
+        self.loads = 0
+        self.batches = 0
+
+    async def load(self, user_id: str) -> Optional[dict]:
+        self.loads += 1
+        future = self._pending.get(user_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[user_id] = future
+
+            if len(self._pending) >= self.max_batch_size:
+                self._dispatch()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.max_latency, self._dispatch)
+
+        return await asyncio.shield(future)
+
+    def stats(self) -> dict:
+        return {
+            "loads": self.loads,
+            "batches": self.batches,
+            "avg_keys_per_batch": round(self.loads / self.batches, 2) if self.batches else 0.0,
+            "pending": len(self._pending),
+        }
+
+    def _dispatch(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.create_task(self._resolve(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _resolve(self, batch: dict[str, asyncio.Future]):
+        self.batches += 1
+        try:
+            users = await self.batch_fn(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # Nobody may be left waiting; don't report it as unretrieved.
+                    future.exception()
+            return
+
+        for user_id, future in batch.items():
+            if not future.done():
+                future.set_result(users.get(user_id))
+
+
+user_loader = UserBatchLoader(
+    get_users_batch_from_service,
+    max_latency_ms=settings.USER_BATCH_MAX_LATENCY_MS,
+    max_batch_size=settings.USER_BATCH_SIZE
+)
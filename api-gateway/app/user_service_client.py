@@ -1,47 +1,271 @@
+import asyncio
+import hashlib
 import json
-import redis
+import time
+import redis.asyncio as redis
 from typing import cast, Optional
 from fastapi import Depends, HTTPException, status
 from .redis_client import get_redis
-from .http_client import get_user_details_from_service
+from .http_client import get_user_details_from_service, get_users_batch_from_service
 from .models import NotificationType
+from .local_cache import LocalCache, SingleFlight
+from .circuit_breaker import CircuitBreaker
+from .user_loader import user_loader
+from .auth import token_verifier
+from .config import settings
 from redis.exceptions import RedisError
 
-USER_PREF_CACHE_TTL = 300 
+USER_PREF_INVALIDATION_CHANNEL = "user_pref_invalidate"
+
+NOT_PREFETCHED = object()
+
+# In-process tier in front of the user_pref: Redis keys. Entries are dropped
+# when the user-service announces an update on USER_PREF_INVALIDATION_CHANNEL.
+user_cache = LocalCache(
+    max_entries=settings.USER_CACHE_MAX_ENTRIES,
+    max_bytes=settings.USER_CACHE_MAX_BYTES,
+    ttl=settings.USER_CACHE_TTL
+)
+user_fetches = SingleFlight()
+user_service_breaker = CircuitBreaker(
+    failure_threshold=settings.USER_SERVICE_BREAKER_THRESHOLD,
+    reset_timeout=settings.USER_SERVICE_BREAKER_RESET
+)
+
+_background_refreshes: set[asyncio.Task] = set()
+
+def user_pref_cache_key(user_id: str) -> str:
+    return f"user_pref:{user_id}"
+
+def is_user_cached_locally(user_id: str) -> bool:
+    return user_pref_cache_key(user_id) in user_cache
+
+def _decode_entry(raw: str) -> dict:
+    """
+    Cache entries are {"data": ..., "missing": bool, "fetched_at": epoch}.
+    Bare user payloads written before soft/hard TTLs existed are treated
+    as freshly fetched.
+    """
+    entry = json.loads(raw)
+    if "fetched_at" not in entry:
+        entry = {"data": entry, "missing": False, "fetched_at": time.time()}
+    return entry
 
 async def get_and_cache_user_details(
     user_id: str,
     redis_client: redis.Redis,
-    token: str
+    token: str,
+    cached_data: Optional[str] | object = NOT_PREFETCHED
 ) -> dict:
     """
     Fetches and caches user details.
-    Checks Redis cache first, falls back to user service if not found.
+    Checks the in-process cache, then Redis, then falls back to the user
+    service. Callers that already read the Redis key in their own pipeline
+    pass the result as `cached_data` to skip a second round-trip.
+
+    Entries younger than USER_PREF_SOFT_TTL are served as-is. Older ones are
+    still served, up to USER_PREF_HARD_TTL, while a background task refreshes
+    them. Unknown users are cached as negative entries for
+    USER_PREF_NEGATIVE_TTL so repeated lookups do not reach the user service.
     """
-    cache_key = f"user_pref:{user_id}"
-    
+    cache_key = user_pref_cache_key(user_id)
+
+    entry = user_cache.get(cache_key)
+    if entry is None:
+        try:
+            if cached_data is NOT_PREFETCHED:
+                cached_data = await redis_client.get(cache_key)
+            if cached_data:
+                entry = _decode_entry(cast(str, cached_data))
+                user_cache.set(cache_key, entry, size=len(cast(str, cached_data)))
+
+        except RedisError as e:
+            print(f"Redis cache GET error, proceeding without cache: {e}")
+        except json.JSONDecodeError as e:
+            print(f"Error decoding cached JSON: {e}")
+
+    if entry is not None:
+        if entry["missing"]:
+            raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
+
+        if time.time() - entry["fetched_at"] >= settings.USER_PREF_SOFT_TTL:
+            _refresh_in_background(user_id, redis_client, token)
+        return entry["data"]
+
+    # The token is part of the key so one caller's bad token cannot fail
+    # the lookup for everyone else waiting on the same user.
+    token_digest = hashlib.sha256(token.encode()).hexdigest()
+    return await user_fetches.do(
+        (cache_key, token_digest),
+        lambda: _fetch_and_cache_user_details(user_id, redis_client, token)
+    )
+
+def _refresh_in_background(user_id: str, redis_client: redis.Redis, token: str):
+    """Refreshes a stale entry without holding up the request that found it."""
+    if user_service_breaker.is_open:
+        return
+
+    async def refresh():
+        try:
+            await user_fetches.do(
+                (user_pref_cache_key(user_id), "refresh"),
+                lambda: _fetch_and_cache_user_details(user_id, redis_client, token)
+            )
+        except Exception as e:
+            print(f"Background refresh of user {user_id} failed, serving stale data: {e}")
+
+    task = asyncio.create_task(refresh())
+    _background_refreshes.add(task)
+    task.add_done_callback(_background_refreshes.discard)
+
+async def _fetch_and_cache_user_details(user_id: str, redis_client: redis.Redis, token: str) -> dict:
     try:
-        cached_data = cast(Optional[str], redis_client.get(cache_key))
-        if cached_data:
-            return json.loads(cached_data)
-            
-    except RedisError as e:
-        print(f"Redis cache GET error, proceeding without cache: {e}")
-    except json.JSONDecodeError as e:
-        print(f"Error decoding cached JSON: {e}")
+        user_data = await _call_user_service(user_id, token)
+    except HTTPException as e:
+        if e.status_code == status.HTTP_404_NOT_FOUND:
+            await _store_entry(user_id, redis_client, None, settings.USER_PREF_NEGATIVE_TTL)
+        raise
+
+    await _store_entry(user_id, redis_client, user_data, settings.USER_PREF_HARD_TTL)
+    return user_data
+
+async def _call_user_service(user_id: str, token: str) -> dict:
+    """
+    Calls the user service through the circuit breaker. Only 5xx-class
+    failures trip it. With INTERNAL_SERVICE_TOKEN set and tokens verified
+    in-process, the lookup joins the batch loader instead of making its own
+    request. The loader authenticates as the gateway, not the caller, so
+    without in-process verification each lookup carries the caller's token
+    and the user service checks it.
+    """
+    if not user_service_breaker.allow_request():
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "User service is unavailable (circuit open)")
+
+    try:
+        if settings.INTERNAL_SERVICE_TOKEN and token_verifier.enabled:
+            user_data = await user_loader.load(user_id)
+            if user_data is None:
+                raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
+        else:
+            user_data = await get_user_details_from_service(user_id, token)
+    except HTTPException as e:
+        if e.status_code >= status.HTTP_500_INTERNAL_SERVER_ERROR:
+            user_service_breaker.record_failure()
+        else:
+            user_service_breaker.record_success()
+        raise
+    except Exception:
+        user_service_breaker.record_failure()
+        raise
+
+    user_service_breaker.record_success()
+    return user_data
 
-    user_data = await get_user_details_from_service(user_id, token)
+async def _store_entry(user_id: str, redis_client: redis.Redis, user_data: Optional[dict], ttl: float):
+    cache_key = user_pref_cache_key(user_id)
+    entry = {"data": user_data, "missing": user_data is None, "fetched_at": time.time()}
+    serialized = json.dumps(entry)
     
     try:
-        redis_client.setex(
+        await redis_client.setex(
             cache_key, 
-            USER_PREF_CACHE_TTL, 
-            json.dumps(user_data)
+            int(ttl), 
+            serialized
         )
     except RedisError as e:
         print(f"Redis cache SET error: {e}")
 
-    return user_data
+    user_cache.set(cache_key, entry, size=len(serialized), ttl=min(ttl, user_cache.ttl))
+
+async def get_users_details_bulk(user_ids: list[str], redis_client: redis.Redis) -> dict[str, Optional[dict]]:
+    """
+    Resolves many users at once for bulk submissions: the in-process cache,
+    then one Redis MGET, then one call to the user service's batch endpoint
+    for whatever is left. Unknown users map to None. Stale entries are
+    served as they are; refreshing them is left to the single-request path.
+    """
+    users: dict[str, Optional[dict]] = {}
+    misses = []
+    for user_id in user_ids:
+        entry = user_cache.get(user_pref_cache_key(user_id))
+        if entry is None:
+            misses.append(user_id)
+        else:
+            users[user_id] = None if entry["missing"] else entry["data"]
+
+    remaining = []
+    if misses:
+        try:
+            cached = await redis_client.mget([user_pref_cache_key(user_id) for user_id in misses])
+        except RedisError as e:
+            print(f"Redis cache MGET error, proceeding without cache: {e}")
+            cached = [None] * len(misses)
+
+        for user_id, raw in zip(misses, cached):
+            try:
+                entry = _decode_entry(raw) if raw else None
+            except json.JSONDecodeError as e:
+                print(f"Error decoding cached JSON: {e}")
+                entry = None
+            if entry is None:
+                remaining.append(user_id)
+                continue
+            user_cache.set(user_pref_cache_key(user_id), entry, size=len(raw))
+            users[user_id] = None if entry["missing"] else entry["data"]
+
+    if remaining:
+        if not user_service_breaker.allow_request():
+            raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "User service is unavailable (circuit open)")
+        try:
+            fetched = await get_users_batch_from_service(remaining)
+        except Exception:
+            user_service_breaker.record_failure()
+            raise
+        user_service_breaker.record_success()
+
+        resolved = {user_id: fetched.get(user_id) for user_id in remaining}
+        await _store_entries(redis_client, resolved)
+        users.update(resolved)
+
+    return users
+
+async def _store_entries(redis_client: redis.Redis, users: dict[str, Optional[dict]]):
+    """Caches many lookups in one pipelined round-trip; None values become negative entries."""
+    pipeline = redis_client.pipeline(transaction=False)
+    for user_id, user_data in users.items():
+        ttl = settings.USER_PREF_NEGATIVE_TTL if user_data is None else settings.USER_PREF_HARD_TTL
+        entry = {"data": user_data, "missing": user_data is None, "fetched_at": time.time()}
+        serialized = json.dumps(entry)
+        pipeline.setex(user_pref_cache_key(user_id), int(ttl), serialized)
+        user_cache.set(user_pref_cache_key(user_id), entry, size=len(serialized), ttl=min(ttl, user_cache.ttl))
+
+    try:
+        await pipeline.execute()
+    except RedisError as e:
+        print(f"Redis cache SET error: {e}")
+
+async def listen_for_user_invalidations(redis_client: redis.Redis):
+    """
+    Background task that drops local cache entries when the user-service
+    publishes a user_id on USER_PREF_INVALIDATION_CHANNEL. Invalidations
+    may be missed while disconnected, so the local tier is cleared on every
+    (re)subscribe.
+    """
+    while True:
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(USER_PREF_INVALIDATION_CHANNEL)
+            user_cache.clear()
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    user_cache.delete(user_pref_cache_key(message["data"]))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"User cache invalidation listener error, resubscribing: {e}")
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
 
 def check_user_preferences(
     notification_type: NotificationType, 
@@ -0,0 +1,218 @@
+import asyncio
+import datetime
+import json
+import uuid
+from types import SimpleNamespace
+from typing import Optional
+import fakeredis
+import httpx
+from app.log_writer import INSERT_BATCH_SQL
+from app.models import NotificationRequest, NotificationStatus
+from app.status_updater import UPDATE_BATCH_SQL
+from .timing import StageTimer
+
+
+class LatencyRedis(fakeredis.FakeAsyncRedis):
+    """
+    In-process Redis (fakeredis, with Lua) that waits `latency_ms` before
+    every command or pipeline, like one network round-trip.
+    """
+
+    def __init__(self, *args, timer: StageTimer, latency_ms: float = 0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timer = timer
+        self.latency = latency_ms / 1000
+
+    async def execute_command(self, *args, **options):
+        async with self.timer.stage("redis"):
+            await asyncio.sleep(self.latency)
+            return await super().execute_command(*args, **options)
+
+    def pipeline(self, transaction: bool = True, shard_hint=None):
+        pipeline = super().pipeline(transaction, shard_hint)
+        execute = pipeline.execute
+
+        async def timed_execute(raise_on_error: bool = True):
+            async with self.timer.stage("redis"):
+                await asyncio.sleep(self.latency)
+                return await execute(raise_on_error)
+
+        pipeline.execute = timed_execute
+        return pipeline
+
+
+class FakeBroker:
+    """
+    Stands in for AMQPPublisher. Every publish_batch is one confirm
+    round-trip of `latency_ms`; messages are serialized as the real
+    publisher does and then dropped.
+    """
+
+    def __init__(self, timer: StageTimer, latency_ms: float = 0.0):
+        self.timer = timer
+        self.latency = latency_ms / 1000
+        self.published = 0
+
+    @property
+    def is_connected(self) -> bool:
+        return True
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def publish_message(self, request: NotificationRequest):
+        await self.publish_batch([request])
+
+    async def publish_batch(self, requests: list[NotificationRequest]) -> list[Optional[BaseException]]:
+        async with self.timer.stage("broker"):
+            await asyncio.sleep(self.latency)
+            for request in requests:
+                request.model_dump_json().encode()
+        self.published += len(requests)
+        return [None] * len(requests)
+
+
+class FakeResult:
+    def __init__(self, rows: list):
+        self._rows = rows
+
+    def scalars(self) -> "FakeResult":
+        return self
+
+    def all(self) -> list:
+        return list(self._rows)
+
+
+class FakeDatabase:
+    """
+    In-memory notification_logs that answers the statements the gateway's
+    request paths issue (the log writer's batch insert, the status
+    updater's batch update, and status reads), each after `latency_ms`.
+    Any other statement raises, so new queries are noticed rather than
+    silently skipped. There is no outbox table: run with OUTBOX_ENABLED off.
+    """
+
+    def __init__(self, timer: StageTimer, latency_ms: float = 0.0):
+        self.timer = timer
+        self.latency = latency_ms / 1000
+        self.logs: dict[uuid.UUID, SimpleNamespace] = {}
+
+    def session(self) -> "FakeSession":
+        return FakeSession(self)
+
+    async def get_db(self):
+        yield self.session()
+
+    def execute(self, statement, params: dict) -> FakeResult:
+        if statement is INSERT_BATCH_SQL:
+            return FakeResult(self._insert(params))
+        if statement is UPDATE_BATCH_SQL:
+            return FakeResult(self._update(params))
+        if getattr(statement, "is_select", False):
+            return FakeResult([self.logs[request_id] for request_id in self._ids(statement) if request_id in self.logs])
+        if getattr(statement, "is_delete", False):
+            for request_id in self._ids(statement):
+                self.logs.pop(request_id, None)
+            return FakeResult([])
+        raise NotImplementedError(f"The benchmark database does not handle: {statement}")
+
+    def _insert(self, params: dict) -> list[uuid.UUID]:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        inserted = []
+        for request_id in params["request_ids"]:
+            if request_id not in self.logs:
+                self.logs[request_id] = SimpleNamespace(
+                    request_id=request_id,
+                    status=NotificationStatus.pending,
+                    error_message=None,
+                    created_at=now,
+                    updated_at=now
+                )
+                inserted.append(request_id)
+        return inserted
+
+    def _update(self, params: dict) -> list[tuple[uuid.UUID, str]]:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        outcomes = []
+        for request_id, new_status, error in zip(params["request_ids"], params["statuses"], params["errors"]):
+            row = self.logs.get(request_id)
+            if row is None:
+                outcomes.append((request_id, "not_found"))
+            elif row.status == NotificationStatus.pending and new_status != NotificationStatus.pending.value:
+                row.status, row.error_message, row.updated_at = NotificationStatus(new_status), error, now
+                outcomes.append((request_id, "updated"))
+            else:
+                outcomes.append((request_id, "ignored"))
+        return outcomes
+
+    @staticmethod
+    def _ids(statement) -> list[uuid.UUID]:
+        # Only `request_id == x` and `request_id.in_([...])` filters are issued.
+        value = statement.whereclause.right.value
+        return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+class FakeSession:
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+
+    async def __aenter__(self) -> "FakeSession":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def begin(self) -> "FakeSession":
+        return self
+
+    async def execute(self, statement, params: Optional[dict] = None) -> FakeResult:
+        async with self.database.timer.stage("db"):
+            await asyncio.sleep(self.database.latency)
+            return self.database.execute(statement, params or {})
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+class FakeUserService:
+    """
+    Answers the user-service's single and batch user lookups after
+    `latency_ms`, for any user_id, with every channel enabled.
+    """
+
+    def __init__(self, timer: StageTimer, latency_ms: float = 0.0):
+        self.timer = timer
+        self.latency = latency_ms / 1000
+        self.calls = 0
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        async with self.timer.stage("user_service"):
+            await asyncio.sleep(self.latency)
+            self.calls += 1
+            if request.method == "POST" and request.url.path.rstrip("/").endswith("/users/batch"):
+                user_ids = json.loads(request.content)["user_ids"]
+                data = {"users": [self.user(user_id) for user_id in user_ids], "missing": []}
+            else:
+                data = self.user(request.url.path.rstrip("/").rsplit("/", 1)[-1])
+            return httpx.Response(200, json={"success": True, "message": "ok", "data": data})
+
+    @staticmethod
+    def user(user_id: str) -> dict:
+        return {
+            "user_id": user_id,
+            "email": f"{user_id}@example.com",
+            "push_token": None,
+            "preferences": {"email": True, "push": True},
+        }
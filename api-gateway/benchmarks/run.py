@@ -0,0 +1,349 @@
+"""
+Load test for the API gateway, run in-process against the real app.
+
+RabbitMQ, Redis, Postgres and the user-service are replaced by the
+stand-ins in benchmarks/fakes.py, each with an injectable per-round-trip
+latency, so the numbers measure the gateway itself and are repeatable on a
+laptop. Three scenarios run one after another at the same concurrency:
+
+- send:    POST /api/v1/notifications/ with a new request_id each time
+- poll:    GET /api/v1/notifications/{request_id}/status/ for sent IDs
+- webhook: POST /api/v1/{type}/status/ marking sent IDs delivered
+
+Requests are offered at `--rate` per second (open loop: latency counts from
+when a request was due, so a stalled gateway cannot hide behind slow
+clients); `--rate 0` sends as fast as the clients can, to measure capacity.
+Each scenario reports p50/p95/p99 latency, throughput and per-stage
+timings, and is compared with benchmarks/baselines.json and the charter's
+targets (1,000 notifications/min, send p99 < 100 ms). The exit code is 1 on
+a regression or a missed target.
+
+    cd api-gateway
+    python -m benchmarks.run
+    python -m benchmarks.run --rate 0 --concurrency 100 --no-compare
+    python -m benchmarks.run --db-latency-ms 10 --no-compare
+    python -m benchmarks.run --update-baselines
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, asdict, fields
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable
+import httpx
+import jwt
+from app import main, http_client as http_client_module, redis_client as redis_client_module
+from app.auth import token_verifier
+from app.config import settings
+from app.database import get_db
+from app.http_client import set_http_client
+from app.log_writer import log_writer
+from app.publish_batcher import publish_batcher
+from app.rate_limiter import rate_limiter
+from app.scheduler import scheduler
+from app.status_updater import status_updater
+from .fakes import LatencyRedis, FakeBroker, FakeDatabase, FakeUserService
+from .timing import StageTimer, summarize
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+
+# Signs the per-user access tokens the send scenario presents.
+TOKEN_SECRET = "benchmark-token-signing-secret-0001"
+
+# docs/PROJECT_CHARTER.md, "Performance & Monitoring".
+CHARTER_MIN_PER_MINUTE = 1000
+# "API Gateway response < 100ms", held at the 99th percentile.
+CHARTER_MAX_SEND_P99_MS = 100.0
+
+# Metrics compared with the baseline: (higher is better, multiple of
+# --tolerance allowed). Tail latencies are noisy, so they get more room.
+BASELINE_METRICS = {
+    "p50_ms": (False, 1.0),
+    "p95_ms": (False, 2.0),
+    "p99_ms": (False, 4.0),
+    "throughput_rps": (True, 1.0),
+}
+
+_MISSING = object()
+
+
+@dataclass
+class BenchmarkConfig:
+    requests: int = 1000
+    concurrency: int = 50
+    # Offered load in requests per second (three times the charter's
+    # 1,000/min); 0 sends unpaced.
+    rate: float = 50.0
+    users: int = 200
+    redis_latency_ms: float = 0.5
+    db_latency_ms: float = 2.0
+    broker_latency_ms: float = 2.0
+    user_service_latency_ms: float = 10.0
+    seed: int = 7
+
+
+@asynccontextmanager
+async def gateway(config: BenchmarkConfig, timer: StageTimer) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Runs the app's lifespan against the stand-ins and yields a client for it.
+    Every module attribute it swaps is put back on exit.
+    """
+    patches: list[tuple[object, str, object]] = []
+
+    def patch(target: object, name: str, value: object):
+        patches.append((target, name, vars(target).get(name, _MISSING)))
+        setattr(target, name, value)
+
+    redis_client = LatencyRedis(decode_responses=True, timer=timer, latency_ms=config.redis_latency_ms)
+    broker = FakeBroker(timer, config.broker_latency_ms)
+    database = FakeDatabase(timer, config.db_latency_ms)
+    users = FakeUserService(timer, config.user_service_latency_ms)
+
+    patch(redis_client_module, "redis_client", redis_client)
+    patch(http_client_module, "http_client", None)
+    for target in (main, publish_batcher, scheduler):
+        patch(target, "publisher", broker)
+    for target in (log_writer, status_updater):
+        patch(target, "session_factory", database.session)
+
+    # The fake database has no outbox, so messages go through the publish
+    # batcher. Tokens are verified in-process, so users are resolved through
+    # the batch loader, as in compose.
+    patch(settings, "OUTBOX_ENABLED", False)
+    patch(settings, "INTERNAL_SERVICE_TOKEN", settings.INTERNAL_SERVICE_TOKEN or "benchmark")
+    patch(token_verifier, "secret", TOKEN_SECRET)
+    patch(token_verifier, "algorithm", "HS256")
+    patch(token_verifier, "jwks_url", None)
+    # The limiter script still runs on every request; it just never says no.
+    patch(rate_limiter, "default_limit", 10 ** 9)
+
+    patch(main, "check_rate_limit_and_prefetch_user", timer.wrap("admission", main.check_rate_limit_and_prefetch_user))
+    patch(main, "get_and_cache_user_details", timer.wrap("user_lookup", main.get_and_cache_user_details))
+    patch(main, "load_status_entries", timer.wrap("status_read", main.load_status_entries))
+    patch(log_writer, "write", timer.wrap("log_write", log_writer.write))
+    patch(publish_batcher, "submit", timer.wrap("publish_enqueue", publish_batcher.submit))
+    patch(status_updater, "submit", timer.wrap("status_update", status_updater.submit))
+
+    overrides = dict(main.app.dependency_overrides)
+    main.app.dependency_overrides[get_db] = database.get_db
+    user_client = users.client()
+    try:
+        async with main.app.router.lifespan_context(main.app):
+            set_http_client(user_client)
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=main.app),
+                base_url="http://benchmark",
+                headers={"Authorization": "Bearer benchmark"}
+            ) as client:
+                yield client
+    finally:
+        await user_client.aclose()
+        main.app.dependency_overrides = overrides
+        for target, name, original in reversed(patches):
+            if original is _MISSING:
+                delattr(target, name)
+            else:
+                setattr(target, name, original)
+
+
+async def drive(call: Callable[[int], Awaitable[httpx.Response]], total: int, concurrency: int, rate: float) -> dict:
+    """
+    Makes `total` calls from `concurrency` concurrent clients, call i being
+    due `i / rate` seconds in (or straight away when rate is 0), and
+    summarizes them. Latency is measured from when each call was due.
+    """
+    latencies: list[float] = []
+    errors = 0
+    indexes = iter(range(total))
+    loop_started = time.perf_counter()
+
+    async def client():
+        nonlocal errors
+        for index in indexes:
+            started = time.perf_counter()
+            if rate:
+                started = loop_started + index / rate
+                await asyncio.sleep(max(0.0, started - time.perf_counter()))
+            try:
+                ok = (await call(index)).is_success
+            except httpx.HTTPError:
+                ok = False
+            latencies.append((time.perf_counter() - started) * 1000)
+            if not ok:
+                errors += 1
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - loop_started
+
+    return {
+        **summarize(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 1),
+        "throughput_per_min": round(total / elapsed * 60),
+    }
+
+
+async def run_benchmark(config: BenchmarkConfig) -> dict:
+    rng = random.Random(config.seed)
+    user_ids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(config.users)]
+    tokens = {user_id: jwt.encode({"user": {"user_id": user_id}}, TOKEN_SECRET, algorithm="HS256") for user_id in user_ids}
+    sent: list[tuple[str, str]] = []
+    timer = StageTimer()
+
+    async def send(index: int) -> httpx.Response:
+        notification_type = "email" if index % 2 == 0 else "push"
+        request_id = str(uuid.uuid4())
+        user_id = user_ids[index % len(user_ids)]
+        response = await client.post("/api/v1/notifications/", headers={"Authorization": f"Bearer {tokens[user_id]}"}, json={
+            "notification_type": notification_type,
+            "user_id": user_id,
+            "template_code": "welcome_email",
+            "variables": {"name": "Benchmark", "link": "http://example.com/verify"},
+            "request_id": request_id,
+            "priority": index % 10
+        })
+        if response.status_code == 202:
+            sent.append((request_id, notification_type))
+        return response
+
+    async def poll(index: int) -> httpx.Response:
+        request_id, _ = sent[index % len(sent)]
+        return await client.get(f"/api/v1/notifications/{request_id}/status/")
+
+    async def webhook(index: int) -> httpx.Response:
+        request_id, notification_type = sent[index % len(sent)]
+        return await client.post(
+            f"/api/v1/{notification_type}/status/",
+            json={"notification_id": request_id, "status": "delivered"}
+        )
+
+    results: dict[str, dict] = {}
+    async with gateway(config, timer) as client:
+        for name, call in (("send", send), ("poll", poll), ("webhook", webhook)):
+            if name != "send" and not sent:
+                break
+            timer.reset()
+            results[name] = await drive(call, config.requests, config.concurrency, config.rate)
+            results[name]["stages"] = timer.summary()
+
+    return {"config": asdict(config), "scenarios": results}
+
+
+def check_charter(results: dict) -> list[str]:
+    send = results["scenarios"].get("send")
+    if send is None:
+        return ["send: no results"]
+    failures = []
+    if send["throughput_per_min"] < CHARTER_MIN_PER_MINUTE:
+        failures.append(f"send: {send['throughput_per_min']}/min is below the {CHARTER_MIN_PER_MINUTE}/min target")
+    if send["p99_ms"] >= CHARTER_MAX_SEND_P99_MS:
+        failures.append(f"send: p99 {send['p99_ms']} ms is above the {CHARTER_MAX_SEND_P99_MS:g} ms target")
+    return failures
+
+
+def compare_to_baselines(results: dict, baselines: dict, tolerance: float) -> list[str]:
+    """
+    Lists every metric that is worse than its baseline by more than its
+    share of `tolerance` (a fraction). Baselines recorded with another
+    config are not comparable, so that is reported instead.
+    """
+    if baselines.get("config") != results["config"]:
+        return ["baselines were recorded with a different config; rerun with it or --update-baselines"]
+
+    regressions = []
+    for name, baseline in baselines.get("scenarios", {}).items():
+        current = results["scenarios"].get(name)
+        if current is None:
+            regressions.append(f"{name}: not run")
+            continue
+        for metric, (higher_is_better, scale) in BASELINE_METRICS.items():
+            expected, actual = baseline[metric], current[metric]
+            allowed = tolerance * scale
+            worse = actual < expected * (1 - allowed) if higher_is_better else actual > expected * (1 + allowed)
+            if worse:
+                regressions.append(f"{name}: {metric} {actual} vs baseline {expected}")
+        if current["errors"]:
+            regressions.append(f"{name}: {current['errors']} failed requests")
+    return regressions
+
+
+def baselines_from(results: dict) -> dict:
+    return {
+        "config": results["config"],
+        "scenarios": {
+            name: {metric: scenario[metric] for metric in BASELINE_METRICS}
+            for name, scenario in results["scenarios"].items()
+        },
+    }
+
+
+def print_report(results: dict):
+    print(f"\nConfig: {json.dumps(results['config'])}")
+    header = f"{'scenario':<10}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, scenario in results["scenarios"].items():
+        print(
+            f"{name:<10}{scenario['count']:>10}{scenario['errors']:>8}{scenario['throughput_rps']:>10}"
+            f"{scenario['p50_ms']:>10}{scenario['p95_ms']:>10}{scenario['p99_ms']:>10}"
+        )
+
+    for name, scenario in results["scenarios"].items():
+        print(f"\n{name} stages{'':<6}{'calls':>8}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for stage, timing in scenario["stages"].items():
+            print(
+                f"  {stage:<16}{timing['count']:>8}{timing['mean_ms']:>10}"
+                f"{timing['p50_ms']:>10}{timing['p95_ms']:>10}{timing['p99_ms']:>10}"
+            )
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="In-process load test for the API gateway.")
+    defaults = BenchmarkConfig()
+    for field in fields(BenchmarkConfig):
+        parser.add_argument(f"--{field.name.replace('_', '-')}", type=type(getattr(defaults, field.name)), default=getattr(defaults, field.name))
+    parser.add_argument("--baselines", type=Path, default=BASELINES_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed regression as a fraction of the baseline.")
+    parser.add_argument("--update-baselines", action="store_true", help="Record this run as the new baselines.")
+    parser.add_argument("--no-compare", action="store_true", help="Only report; skip the baseline and charter checks.")
+    parser.add_argument("--json", type=Path, help="Also write the full results to this file.")
+    return parser.parse_args(argv)
+
+
+def main_cli(argv: list[str]) -> int:
+    args = parse_args(argv)
+    config = BenchmarkConfig(**{field.name: getattr(args, field.name) for field in fields(BenchmarkConfig)})
+    results = asyncio.run(run_benchmark(config))
+    print_report(results)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+    if args.update_baselines:
+        args.baselines.write_text(json.dumps(baselines_from(results), indent=2) + "\n")
+        print(f"\nBaselines written to {args.baselines}.")
+        return 0
+    if args.no_compare:
+        return 0
+
+    problems = check_charter(results)
+    if args.baselines.exists():
+        problems += compare_to_baselines(results, json.loads(args.baselines.read_text()), args.tolerance)
+    else:
+        print(f"\nNo baselines at {args.baselines}; run with --update-baselines to record them.")
+
+    print()
+    for problem in problems:
+        print(f"FAIL {problem}")
+    if not problems:
+        print("OK: charter targets met and no regressions against the baselines.")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli(sys.argv[1:]))
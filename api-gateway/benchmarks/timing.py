@@ -0,0 +1,57 @@
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of `samples` (0 when there are none)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(samples: list[float]) -> dict:
+    return {
+        "count": len(samples),
+        "mean_ms": round(sum(samples) / len(samples), 3) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+    }
+
+
+class StageTimer:
+    """
+    Collects wall-clock durations, in milliseconds, per named stage.
+
+    Request stages (admission, user lookup, log write, ...) are timed once
+    per request; dependency stages (redis, db, broker, user_service) once per
+    round-trip, so a batched call counts once however many requests it
+    carries.
+    """
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = defaultdict(list)
+
+    @asynccontextmanager
+    async def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[name].append((time.perf_counter() - started) * 1000)
+
+    def wrap(self, name: str, func):
+        """Returns a coroutine function that times every call of `func` as `name`."""
+        async def timed(*args, **kwargs):
+            async with self.stage(name):
+                return await func(*args, **kwargs)
+        return timed
+
+    def reset(self):
+        self.samples.clear()
+
+    def summary(self) -> dict[str, dict]:
+        return {name: summarize(samples) for name, samples in sorted(self.samples.items())}
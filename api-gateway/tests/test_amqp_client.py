@@ -0,0 +1,113 @@
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.amqp_client import AMQPPublisher
+from app.models import NotificationRequest
+
+
+def make_request(notification_type="email"):
+    return NotificationRequest(
+        notification_type=notification_type,
+        user_id="c4b4b4b4-b4b4-4b4b-b4b4-c4b4b4b4b4b4",
+        template_code="welcome_email",
+        variables={"name": "Peter", "link": "http://example.com/verify"},
+        request_id="a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1",
+        priority=1
+    )
+
+
+def make_connected_publisher(pool_size=2):
+    publisher = AMQPPublisher("rabbitmq", "guest", "guest", channel_pool_size=pool_size)
+    publisher.connection = MagicMock(is_closed=False)
+
+    exchanges = []
+    for _ in range(pool_size):
+        exchange = MagicMock()
+        exchange.publish = AsyncMock()
+        channel = MagicMock(is_closed=False)
+        channel.get_exchange = AsyncMock(return_value=exchange)
+        publisher.channels.append(channel)
+        exchanges.append(exchange)
+    return publisher, exchanges
+
+
+@pytest.mark.asyncio
+async def test_publish_waits_for_confirm_with_routing_key():
+    publisher, exchanges = make_connected_publisher(pool_size=1)
+
+    await publisher.publish_message(make_request("push"))
+
+    exchanges[0].publish.assert_awaited_once()
+    message = exchanges[0].publish.call_args.args[0]
+    assert exchanges[0].publish.call_args.kwargs["routing_key"] == "push"
+    assert message.message_id == "a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1"
+
+
+@pytest.mark.asyncio
+async def test_publish_spreads_across_channel_pool():
+    publisher, exchanges = make_connected_publisher(pool_size=2)
+
+    await publisher.publish_message(make_request())
+    await publisher.publish_message(make_request())
+
+    assert exchanges[0].publish.await_count == 1
+    assert exchanges[1].publish.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_publish_failure_is_raised_to_caller():
+    publisher, exchanges = make_connected_publisher(pool_size=1)
+    exchanges[0].publish.side_effect = TimeoutError("no confirm")
+
+    with pytest.raises(TimeoutError):
+        await publisher.publish_message(make_request())
+
+
+@pytest.mark.asyncio
+async def test_publish_of_unknown_type_is_raised_to_caller():
+    publisher, exchanges = make_connected_publisher(pool_size=1)
+
+    with pytest.raises(ValueError):
+        await publisher.publish_message(make_request().model_copy(update={"notification_type": "sms"}))
+    exchanges[0].publish.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_request_priority_is_clamped_onto_the_message():
+    publisher, exchanges = make_connected_publisher(pool_size=1)
+
+    await publisher.publish_batch([
+        make_request().model_copy(update={"priority": 7}),
+        make_request().model_copy(update={"priority": 99}),
+        make_request().model_copy(update={"priority": -3})
+    ])
+
+    priorities = [c.args[0].priority for c in exchanges[0].publish.call_args_list]
+    assert priorities == [7, 10, 0]
+
+
+@pytest.mark.asyncio
+async def test_connect_declares_retry_ladder_and_dead_letter_queue():
+    publisher = AMQPPublisher("rabbitmq", "guest", "guest", channel_pool_size=1, retry_delays=[5, 30])
+    channel = MagicMock(is_closed=False)
+    channel.declare_exchange = AsyncMock()
+    channel.declare_queue = AsyncMock()
+    channel.close = AsyncMock()
+    publisher.connection = MagicMock(is_closed=False)
+    publisher.connection.channel = AsyncMock(return_value=channel)
+
+    await publisher._declare_queues()
+
+    queues = {c.args[0]: c.kwargs["arguments"] for c in channel.declare_queue.call_args_list}
+    assert queues["failed.queue"] == {}
+    assert queues["email.queue"] == {"x-max-priority": 10, "x-dead-letter-exchange": "notifications.dlx"}
+    assert queues["push.retry.30s"] == {
+        "x-message-ttl": 30000,
+        "x-dead-letter-exchange": "notifications.direct",
+        "x-dead-letter-routing-key": "push"
+    }
+    assert len(queues) == 7
@@ -0,0 +1,80 @@
+import base64
+import datetime
+import httpx
+import jwt
+import pytest
+from fastapi import HTTPException
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.auth import TokenVerifier
+
+USER_ID = "c4b4b4b4-b4b4-4b4b-b4b4-c4b4b4b4b4b4"
+
+
+def make_token(key="test-secret", user_id=USER_ID, expires_in=3600, headers=None):
+    payload = {
+        "user": {"user_id": user_id, "email": "test@example.com"},
+        "exp": datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=expires_in)
+    }
+    return jwt.encode(payload, key, algorithm="HS256", headers=headers)
+
+
+@pytest.mark.asyncio
+async def test_verify_with_shared_secret():
+    verifier = TokenVerifier(secret="test-secret")
+
+    user = await verifier.authorize(make_token(), USER_ID)
+
+    assert user["user_id"] == USER_ID
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("token", [
+    make_token(key="wrong-secret"),
+    make_token(expires_in=-10),
+    "not-a-jwt",
+])
+async def test_bad_tokens_are_rejected(token):
+    verifier = TokenVerifier(secret="test-secret")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await verifier.verify(token)
+    assert exc_info.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_token_for_another_user_is_forbidden():
+    verifier = TokenVerifier(secret="test-secret")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await verifier.authorize(make_token(user_id="someone-else"), USER_ID)
+    assert exc_info.value.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_disabled_verifier_defers_to_user_service():
+    assert await TokenVerifier().authorize("anything", USER_ID) is None
+
+
+@pytest.mark.asyncio
+async def test_verify_with_jwks_key_set():
+    secret = b"jwks-secret-key-of-sufficient-length"
+    jwks = {"keys": [{
+        "kty": "oct",
+        "kid": "k1",
+        "alg": "HS256",
+        "k": base64.urlsafe_b64encode(secret).rstrip(b"=").decode()
+    }]}
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json=jwks)))
+    verifier = TokenVerifier(jwks_url="http://user-service/.well-known/jwks.json")
+
+    await verifier.load(client)
+    user = await verifier.verify(make_token(key=secret, headers={"kid": "k1"}))
+
+    assert user["user_id"] == USER_ID
+    with pytest.raises(HTTPException):
+        await verifier.verify(make_token(key=secret, headers={"kid": "unknown"}))
+    await client.aclose()
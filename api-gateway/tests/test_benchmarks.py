@@ -0,0 +1,46 @@
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.run import BenchmarkConfig, run_benchmark, compare_to_baselines, baselines_from, check_charter
+from app import main, redis_client as redis_client_module
+from app.publish_batcher import publish_batcher
+from app.config import settings
+
+
+@pytest.mark.asyncio
+async def test_benchmark_drives_every_scenario_and_restores_the_app():
+    publisher, redis_client, outbox = main.publisher, redis_client_module.redis_client, settings.OUTBOX_ENABLED
+    config = BenchmarkConfig(
+        requests=40, concurrency=8, rate=0, users=5,
+        redis_latency_ms=0, db_latency_ms=0, broker_latency_ms=0, user_service_latency_ms=0
+    )
+
+    results = await run_benchmark(config)
+
+    assert list(results["scenarios"]) == ["send", "poll", "webhook"]
+    assert all(scenario["count"] == 40 and scenario["errors"] == 0 for scenario in results["scenarios"].values())
+    assert {"admission", "log_write", "publish_enqueue", "redis", "db", "broker"} <= set(results["scenarios"]["send"]["stages"])
+    assert main.publisher is publisher and publish_batcher.publisher is publisher
+    assert redis_client_module.redis_client is redis_client
+    assert settings.OUTBOX_ENABLED == outbox
+    assert "write" not in vars(main.log_writer)
+
+
+def test_compare_to_baselines_flags_regressions_beyond_tolerance():
+    def results(p50, p95, p99, rps):
+        scenario = {"p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "throughput_rps": rps, "throughput_per_min": rps * 60, "errors": 0}
+        return {"config": {"requests": 10}, "scenarios": {"send": scenario}}
+
+    baselines = baselines_from(results(10, 20, 40, 100))
+
+    assert compare_to_baselines(results(12, 29, 70, 80), baselines, 0.25) == []
+    assert compare_to_baselines(results(13, 20, 40, 70), baselines, 0.25) == [
+        "send: p50_ms 13 vs baseline 10",
+        "send: throughput_rps 70 vs baseline 100",
+    ]
+    assert compare_to_baselines({**results(10, 20, 40, 100), "config": {"requests": 20}}, baselines, 0.25)
+    assert check_charter(results(10, 20, 40, 10)) == ["send: 600/min is below the 1000/min target"]
+    assert check_charter(results(10, 90, 120, 100)) == ["send: p99 120 ms is above the 100 ms target"]
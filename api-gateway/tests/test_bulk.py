@@ -0,0 +1,172 @@
+import datetime
+import json
+import uuid
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+from redis.exceptions import RedisError
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.bulk import BulkSubmission, BulkBodyError, iter_json_array_items, iter_ndjson_items
+from tests.test_amqp_client import make_request
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(items):
+    return [item async for item in items]
+
+
+def make_item(user_id=None):
+    return make_request().model_copy(update={
+        "user_id": uuid.UUID(user_id) if user_id else uuid.uuid4(),
+        "request_id": uuid.uuid4()
+    })
+
+
+@pytest.fixture(autouse=True)
+def status_cache_mock(monkeypatch):
+    cache = MagicMock()
+    cache.store = AsyncMock()
+    monkeypatch.setattr("app.bulk.status_cache", cache)
+    return cache
+
+
+def make_session_factory(inserted_ids):
+    session = MagicMock()
+    session.begin.return_value.__aenter__ = AsyncMock()
+    session.begin.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    insert_result = MagicMock()
+    insert_result.scalars.return_value.all.return_value = inserted_ids
+    session.execute = AsyncMock(side_effect=[insert_result, MagicMock()])
+
+    factory = MagicMock()
+    factory.return_value.__aenter__ = AsyncMock(return_value=session)
+    factory.return_value.__aexit__ = AsyncMock(return_value=False)
+    return factory, session
+
+
+@pytest.mark.asyncio
+async def test_json_array_is_split_across_chunk_boundaries():
+    body = b' [{"a": [1, 2], "s": "x],{\\"y"}, {"b": {"c": 3}} ,\n"str"] '
+    chunks = [body[i:i + 3] for i in range(0, len(body), 3)]
+
+    items = await collect(iter_json_array_items(stream(*chunks)))
+
+    assert [json.loads(item) for item in items] == [{"a": [1, 2], "s": 'x],{"y'}, {"b": {"c": 3}}, "str"]
+
+
+@pytest.mark.asyncio
+async def test_json_array_split_does_not_depend_on_chunk_size():
+    elements = [{"s": 'a\\"[,]{}"', "n": [1, {"m": "\\"}]}, "x\ty", 3, [], {}]
+    body = json.dumps(elements).encode()
+
+    for size in range(1, len(body) + 1):
+        chunks = [body[i:i + size] for i in range(0, len(body), size)]
+        items = await collect(iter_json_array_items(stream(*chunks)))
+        assert [json.loads(item) for item in items] == elements, size
+
+
+@pytest.mark.asyncio
+async def test_json_array_yields_items_before_a_body_error():
+    items = []
+    with pytest.raises(BulkBodyError):
+        async for item in iter_json_array_items(stream(b'[{"a": 1}, , {"b": 2}]')):
+            items.append(item)
+
+    assert items == [b'{"a": 1}']
+
+
+@pytest.mark.asyncio
+async def test_json_array_rejects_non_array_bodies():
+    with pytest.raises(BulkBodyError):
+        await collect(iter_json_array_items(stream(b'{"a": 1}')))
+    with pytest.raises(BulkBodyError):
+        await collect(iter_json_array_items(stream(b'[{"a": 1}')))
+    with pytest.raises(BulkBodyError):
+        await collect(iter_json_array_items(stream(b'[{"a": 1},', b' ]')))
+    assert await collect(iter_json_array_items(stream(b'[ ]'))) == []
+
+
+@pytest.mark.asyncio
+async def test_ndjson_lines_are_split_across_chunks():
+    items = await collect(iter_ndjson_items(stream(b'{"a": 1}\n{"b"', b': 2}\n\n{"c": 3}')))
+
+    assert [json.loads(item) for item in items] == [{"a": 1}, {"b": 2}, {"c": 3}]
+
+
+@pytest.mark.asyncio
+async def test_submission_reports_per_item_results(monkeypatch, status_cache_mock):
+    known_user = str(uuid.uuid4())
+    muted_user = str(uuid.uuid4())
+    accepted = make_item(known_user)
+    duplicate_in_db = make_item(known_user)
+    suppressed = make_item(muted_user)
+    unknown = make_item()
+
+    monkeypatch.setattr("app.bulk.get_users_details_bulk", AsyncMock(return_value={
+        known_user: {"preferences": {"email": True, "push": True}},
+        muted_user: {"preferences": {"email": False, "push": False}},
+        str(unknown.user_id): None
+    }))
+    factory, session = make_session_factory([accepted.request_id])
+    relay = MagicMock()
+
+    submission = BulkSubmission(MagicMock(), factory, MagicMock(), relay, chunk_size=10)
+    bodies = [r.model_dump_json().encode() for r in (accepted, duplicate_in_db, suppressed, unknown)]
+    lines = [json.loads(line) for line in await collect(submission.run(stream(*bodies, b'{"bad": true}')))]
+
+    assert [line.get("status") for line in lines[:-1]] == ["accepted", "duplicate", "suppressed", "rejected", "invalid"]
+    assert [line["index"] for line in lines[:-1]] == [0, 1, 2, 3, 4]
+    assert lines[-1]["summary"]["total"] == 5
+    assert lines[-1]["summary"]["accepted"] == 1
+    # one multi-row log insert and one outbox insert for the whole chunk
+    assert session.execute.await_count == 2
+    relay.wake.assert_called_once()
+    cached = status_cache_mock.store.await_args.args[1]
+    assert [entry["request_id"] for entry in cached] == [str(accepted.request_id)]
+
+
+@pytest.mark.asyncio
+async def test_failed_scheduling_drops_the_log_rows(monkeypatch, status_cache_mock):
+    send_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=1)
+    request = make_item().model_copy(update={"send_at": send_at})
+    monkeypatch.setattr("app.bulk.get_users_details_bulk", AsyncMock(return_value={
+        str(request.user_id): {"preferences": {"email": True, "push": True}}
+    }))
+    scheduler = MagicMock()
+    scheduler.schedule = AsyncMock(side_effect=RedisError("connection reset"))
+    monkeypatch.setattr("app.bulk.scheduler", scheduler)
+    factory, session = make_session_factory([request.request_id])
+
+    submission = BulkSubmission(MagicMock(), factory, MagicMock(), MagicMock())
+    lines = [json.loads(line) for line in await collect(submission.run(stream(request.model_dump_json().encode())))]
+
+    assert lines[0]["status"] == "failed" and lines[0]["error"] == "Failed to schedule"
+    # As for a single send: no log row is left, so the item can be resubmitted.
+    assert session.execute.call_args.args[0].is_delete
+    assert status_cache_mock.store.await_args.args[1] == []
+
+
+@pytest.mark.asyncio
+async def test_submission_processes_in_chunks(monkeypatch):
+    requests = [make_item() for _ in range(5)]
+    lookup = AsyncMock(side_effect=lambda ids, _: {i: {"preferences": None} for i in ids})
+    monkeypatch.setattr("app.bulk.get_users_details_bulk", lookup)
+    factory, session = make_session_factory([])
+    insert_result = MagicMock()
+    insert_result.scalars.return_value.all.return_value = [r.request_id for r in requests]
+    session.execute = AsyncMock(return_value=insert_result)
+
+    submission = BulkSubmission(MagicMock(), factory, MagicMock(), MagicMock(), chunk_size=2)
+    lines = await collect(submission.run(stream(*[r.model_dump_json().encode() for r in requests])))
+
+    assert len(lines) == 6
+    assert lookup.await_count == 3
+    assert json.loads(lines[-1])["summary"] == {"total": 5, "accepted": 5}
@@ -0,0 +1,47 @@
+import pytest
+import fakeredis
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.idempotency import IdempotencyStore
+from tests.test_amqp_client import make_request
+
+
+async def claim(store, redis_client, request):
+    claim = store.claim(request)
+    pipeline = redis_client.pipeline(transaction=False)
+    store.queue(pipeline, claim)
+    claimed, current = await pipeline.execute()
+    assert store.parse(claim, claimed, current) is None
+    return claim
+
+
+@pytest.mark.asyncio
+async def test_expired_claim_cannot_release_or_complete_a_newer_one():
+    redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    store = IdempotencyStore()
+    request = make_request()
+    stale = await claim(store, redis_client, request)
+    # The first handler's in-flight TTL runs out and a retry claims the key.
+    await redis_client.delete(stale.key)
+    fresh = await claim(store, redis_client, request)
+
+    await store.release(redis_client, stale)
+    await store.complete(redis_client, stale, {"message": "stale"})
+    assert fresh.owner in await redis_client.get(fresh.key)
+
+    await store.complete(redis_client, fresh, {"message": "fresh"})
+    assert store.parse(store.claim(request), False, await redis_client.get(fresh.key)) == {"message": "fresh"}
+
+
+@pytest.mark.asyncio
+async def test_release_drops_the_owners_claim():
+    redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    store = IdempotencyStore()
+    owned = await claim(store, redis_client, make_request())
+
+    await store.release(redis_client, owned)
+
+    assert await redis_client.get(owned.key) is None
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.local_cache import LocalCache, SingleFlight
+from app import user_service_client
+
+
+def test_lru_evicts_least_recently_used_by_entries():
+    cache = LocalCache(max_entries=2)
+    cache.set("a", 1, size=1)
+    cache.set("b", 2, size=1)
+    cache.get("a")
+    cache.set("c", 3, size=1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_evicts_by_bytes():
+    cache = LocalCache(max_entries=10, max_bytes=10)
+    cache.set("a", "x", size=6)
+    cache.set("b", "y", size=6)
+
+    assert "a" not in cache
+    assert cache.stats()["bytes"] == 6
+
+
+def test_expired_entries_are_misses():
+    cache = LocalCache(ttl=0)
+    cache.set("a", 1, size=1)
+
+    assert cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+
+    assert results == ["value"] * 5
+    assert calls == 1
+    assert flight.coalesced == 4
+
+
+@pytest.mark.asyncio
+async def test_user_details_are_served_from_local_tier_after_first_fetch(monkeypatch):
+    monkeypatch.setattr(user_service_client, "user_cache", LocalCache())
+    service = AsyncMock(return_value={"user_id": "u1", "preferences": {"email": True}})
+    monkeypatch.setattr(user_service_client, "get_user_details_from_service", service)
+    redis_mock = MagicMock()
+    redis_mock.get = AsyncMock(return_value=None)
+    redis_mock.setex = AsyncMock()
+
+    results = await asyncio.gather(*(
+        user_service_client.get_and_cache_user_details("u1", redis_mock, "Bearer t")
+        for _ in range(3)
+    ))
+    again = await user_service_client.get_and_cache_user_details("u1", redis_mock, "Bearer t")
+
+    assert all(result["user_id"] == "u1" for result in results)
+    assert again["user_id"] == "u1"
+    service.assert_awaited_once()
+    redis_mock.setex.assert_awaited_once()
+    assert redis_mock.get.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_redis_hit_populates_local_tier(monkeypatch):
+    monkeypatch.setattr(user_service_client, "user_cache", LocalCache())
+    redis_mock = MagicMock()
+    redis_mock.get = AsyncMock(return_value=json.dumps({"user_id": "u2"}))
+
+    await user_service_client.get_and_cache_user_details("u2", redis_mock, "Bearer t")
+
+    assert user_service_client.is_user_cached_locally("u2")
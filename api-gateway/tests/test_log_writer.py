@@ -0,0 +1,141 @@
+import asyncio
+import uuid
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.log_writer import NotificationLogWriter, LogWriterQueueFull, DuplicateNotification
+from tests.test_amqp_client import make_request
+
+
+def make_session_factory(inserted_ids=None, error=None):
+    session = MagicMock()
+    session.begin.return_value.__aenter__ = AsyncMock()
+    session.begin.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = inserted_ids or []
+    session.execute = AsyncMock(return_value=result, side_effect=error)
+
+    factory = MagicMock()
+    factory.return_value.__aenter__ = AsyncMock(return_value=session)
+    factory.return_value.__aexit__ = AsyncMock(return_value=False)
+    return factory, session
+
+
+def make_item():
+    return make_request().model_copy(update={"request_id": uuid.uuid4()})
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_share_one_statement():
+    requests = [make_item() for _ in range(3)]
+    factory, session = make_session_factory([r.request_id for r in requests])
+    writer = NotificationLogWriter(factory, max_latency_ms=5)
+    await writer.start()
+
+    await asyncio.gather(*(writer.write(r, outbox=i != 1) for i, r in enumerate(requests)))
+    await writer.stop()
+
+    session.execute.assert_awaited_once()
+    statement, params = session.execute.call_args.args
+    assert "unnest" in str(statement)
+    assert params["request_ids"] == [r.request_id for r in requests]
+    assert params["enqueue"] == [True, False, True]
+    assert writer.stats()["written"] == 3
+
+
+@pytest.mark.asyncio
+async def test_existing_and_repeated_request_ids_are_duplicates():
+    new, existing = make_item(), make_item()
+    factory, session = make_session_factory([new.request_id])
+    writer = NotificationLogWriter(factory, max_latency_ms=5)
+    await writer.start()
+
+    results = await asyncio.gather(
+        writer.write(new), writer.write(existing), writer.write(new),
+        return_exceptions=True
+    )
+    await writer.stop()
+
+    assert results[0] is None
+    assert isinstance(results[1], DuplicateNotification)
+    assert isinstance(results[2], DuplicateNotification)
+    assert session.execute.call_args.args[1]["request_ids"] == [new.request_id, existing.request_id]
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_fails_every_waiter():
+    factory, _ = make_session_factory(error=RuntimeError("db down"))
+    writer = NotificationLogWriter(factory, max_latency_ms=5)
+    await writer.start()
+
+    results = await asyncio.gather(writer.write(make_item()), writer.write(make_item()), return_exceptions=True)
+    await writer.stop()
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert writer.stats()["failed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected():
+    factory, _ = make_session_factory()
+    writer = NotificationLogWriter(factory, max_queue_depth=1)
+
+    pending = asyncio.create_task(writer.write(make_item()))
+    await asyncio.sleep(0)
+    with pytest.raises(LogWriterQueueFull):
+        await writer.write(make_item())
+
+    pending.cancel()
+
+
+@pytest.mark.asyncio
+async def test_reserved_capacity_only_admits_high_priority():
+    factory, session = make_session_factory()
+    writer = NotificationLogWriter(factory, max_queue_depth=4, reserved_fraction=0.5)
+
+    pending = [asyncio.create_task(writer.write(make_item())) for _ in range(2)]
+    await asyncio.sleep(0)
+    with pytest.raises(LogWriterQueueFull):
+        await writer.write(make_item())
+    urgent = asyncio.create_task(writer.write(make_item().model_copy(update={"priority": 9})))
+    await asyncio.sleep(0)
+
+    assert writer.stats()["queue_depth"] == 3
+    for task in (*pending, urgent):
+        task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_stop_during_a_slow_insert_resolves_every_caller():
+    requests = [make_item() for _ in range(3)]
+    factory, session = make_session_factory([r.request_id for r in requests])
+    release = asyncio.Event()
+    result = session.execute.return_value
+
+    async def execute(statement, params):
+        await release.wait()
+        return result
+
+    session.execute = AsyncMock(side_effect=execute)
+    writer = NotificationLogWriter(factory, max_latency_ms=1, max_batch_size=2)
+    await writer.start()
+
+    in_flight = [asyncio.create_task(writer.write(r)) for r in requests[:2]]
+    await asyncio.sleep(0.05)
+    queued = asyncio.create_task(writer.write(requests[2]))
+    await asyncio.sleep(0)
+
+    stopping = asyncio.create_task(writer.stop())
+    await asyncio.sleep(0.01)
+    with pytest.raises(LogWriterQueueFull):
+        await asyncio.wait_for(writer.write(make_item()), timeout=1)
+    release.set()
+    await asyncio.wait_for(stopping, timeout=1)
+
+    await asyncio.wait_for(asyncio.gather(*in_flight, queued), timeout=1)
+    assert writer.stats()["written"] == 3
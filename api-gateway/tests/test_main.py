@@ -1,3 +1,6 @@
+import hashlib
+import json
+import uuid
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
@@ -9,11 +12,18 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app.main import app as fast_app
+from app.main import app as fast_app, stream_notification_status
 from app.database import get_db
 from app.redis_client import get_redis
 from app.amqp_client import publisher as global_publisher
 from app.user_service_client import get_and_cache_user_details
+from app.log_writer import DuplicateNotification
+from app.config import settings
+from app.auth import TokenVerifier
+from tests.test_auth import make_token
+from app.status_stream import StatusStreamHub
+from app.idempotency import RELEASE_SCRIPT
+from redis.exceptions import RedisError
 
 
 @pytest_asyncio.fixture
@@ -21,6 +31,7 @@ async def db_session_mock():
     """Mock async database session"""
     db_mock = AsyncMock()
     db_mock.add = MagicMock()
+    db_mock.add_all = MagicMock()
     db_mock.commit = AsyncMock()
     db_mock.rollback = AsyncMock()
     db_mock.refresh = AsyncMock()
@@ -36,8 +47,11 @@ def redis_client_mock():
     pipeline_mock = MagicMock()
     pipeline_mock.incr.return_value = pipeline_mock
     pipeline_mock.expire.return_value = pipeline_mock
-    pipeline_mock.execute.return_value = [1]
+    pipeline_mock.execute = AsyncMock(return_value=[[1, 20, 19, 3000, 0], True, None, None])
     redis_mock.pipeline.return_value = pipeline_mock
+    redis_mock.set = AsyncMock()
+    redis_mock.delete = AsyncMock()
+    redis_mock.eval = AsyncMock()
     return redis_mock
 
 
@@ -48,11 +62,19 @@ def mock_publisher(monkeypatch):
     for every test.
     """
     publisher_mock = MagicMock()
-    publisher_mock.publish_message = MagicMock()
+    publisher_mock.submit = AsyncMock()
     
-    monkeypatch.setattr("app.main.publisher", publisher_mock)
+    monkeypatch.setattr("app.main.publish_batcher", publisher_mock)
     return publisher_mock
 
+@pytest.fixture
+def log_writer_mock(monkeypatch):
+    writer_mock = MagicMock()
+    writer_mock.write = AsyncMock()
+
+    monkeypatch.setattr("app.main.log_writer", writer_mock)
+    return writer_mock
+
 @pytest.fixture
 def user_service_mock(monkeypatch):
     mock_func = AsyncMock()
@@ -64,13 +86,14 @@ def user_service_mock(monkeypatch):
     return mock_func
 
 @pytest_asyncio.fixture
-async def async_client(db_session_mock, redis_client_mock, user_service_mock) -> AsyncGenerator[AsyncClient, None]:
+async def async_client(db_session_mock, redis_client_mock, user_service_mock, log_writer_mock) -> AsyncGenerator[AsyncClient, None]:
     fast_app.dependency_overrides[get_db] = lambda: db_session_mock
     fast_app.dependency_overrides[get_redis] = lambda: redis_client_mock
     
     async with AsyncClient(
         transport=ASGITransport(app=fast_app), 
-        base_url="http://test"
+        base_url="http://test",
+        headers={"Authorization": "Bearer test-token"}
     ) as client:
         yield client
   
@@ -90,7 +113,7 @@ async def test_health_check(async_client: AsyncClient):
 @pytest.mark.asyncio
 async def test_send_notification_happy_path(
     async_client: AsyncClient, 
-    db_session_mock: AsyncMock,
+    log_writer_mock: MagicMock,
     mock_publisher: MagicMock,
     user_service_mock: AsyncMock
 ):
@@ -117,18 +140,186 @@ async def test_send_notification_happy_path(
     assert response.status_code == status.HTTP_202_ACCEPTED
     assert response.json()["success"] == True
     assert response.json()["data"]["request_id"] == "a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1"
+    assert response.headers["X-RateLimit-Limit"] == "20"
+    assert response.headers["X-RateLimit-Remaining"] == "19"
 
     user_service_mock.assert_called_once()
     
-    db_session_mock.add.assert_called_once()
-    db_session_mock.commit.assert_called_once()
+    log_writer_mock.write.assert_awaited_once()
+    assert log_writer_mock.write.call_args.kwargs["outbox"] is True
     
-    mock_publisher.publish_message.assert_called_once()
+    mock_publisher.submit.assert_not_called()
+
 
 @pytest.mark.asyncio
-async def test_send_notification_user_preferences_disabled(
+async def test_send_notification_direct_publish_without_outbox(
     async_client: AsyncClient, 
+    log_writer_mock: MagicMock,
+    mock_publisher: MagicMock,
+    user_service_mock: AsyncMock,
+    monkeypatch
+):
+    monkeypatch.setattr(settings, "OUTBOX_ENABLED", False)
+    user_service_mock.return_value = {
+        "user_id": "c4b4b4b4-b4b4-4b4b-b4b4-c4b4b4b4b4b4",
+        "preferences": {"email": True, "push": True}
+    }
+
+    payload = {
+        "notification_type": "email",
+        "user_id": "c4b4b4b4-b4b4-4b4b-b4b4-c4b4b4b4b4b4",
+        "template_code": "welcome_email",
+        "variables": {
+            "name": "Peter",
+            "link": "http://example.com/verify"
+        },
+        "request_id": "a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1",
+        "priority": 1
+    }
+
+    response = await async_client.post("/api/v1/notifications/", json=payload)
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert log_writer_mock.write.call_args.kwargs["outbox"] is False
+    mock_publisher.submit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_failed_publish_leaves_no_pending_status(
+    async_client: AsyncClient,
+    mock_publisher: MagicMock,
+    user_service_mock: AsyncMock,
+    db_session_mock: AsyncMock,
+    monkeypatch
+):
+    cache_mock = MagicMock()
+    cache_mock.store = AsyncMock()
+    monkeypatch.setattr("app.main.status_cache", cache_mock)
+    monkeypatch.setattr(settings, "OUTBOX_ENABLED", False)
+    mock_publisher.submit.side_effect = RuntimeError("nacked")
+    user_service_mock.return_value = {"preferences": {"email": True, "push": True}}
+
+    response = await async_client.post("/api/v1/notifications/", json={
+        "notification_type": "email",
+        "user_id": "c4b4b4b4-b4b4-4b4b-b4b4-c4b4b4b4b4b4",
+        "template_code": "welcome_email",
+        "variables": {"name": "Peter", "link": "http://example.com/verify"},
+        "request_id": "a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1",
+        "priority": 1
+    })
+
+    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+    db_session_mock.execute.assert_awaited_once()
+    cache_mock.store.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_send_notification_with_future_send_at_is_scheduled(
+    async_client: AsyncClient,
+    log_writer_mock: MagicMock,
+    mock_publisher: MagicMock,
+    user_service_mock: AsyncMock,
+    redis_client_mock: MagicMock,
+    monkeypatch
+):
+    scheduler_mock = MagicMock()
+    scheduler_mock.schedule = AsyncMock()
+    monkeypatch.setattr("app.main.scheduler", scheduler_mock)
+    monkeypatch.setattr(settings, "OUTBOX_ENABLED", False)
+    user_service_mock.return_value = {
+        "user_id": "c4b4b4b4-b4b4-4b4b-b4b4-c4b4b4b4b4b4",
+        "preferences": {"email": True, "push": True}
+    }
+
+    payload = {
+        "notification_type": "email",
+        "user_id": "c4b4b4b4-b4b4-4b4b-b4b4-c4b4b4b4b4b4",
+        "template_code": "welcome_email",
+        "variables": {
+            "name": "Peter",
+            "link": "http://example.com/verify"
+        },
+        "request_id": "a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1",
+        "priority": 1,
+        "send_at": "2999-01-01T09:00:00+00:00"
+    }
+
+    response = await async_client.post("/api/v1/notifications/", json=payload)
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.json()["data"]["send_at"] == "2999-01-01T09:00:00+00:00"
+    assert log_writer_mock.write.call_args.kwargs["outbox"] is False
+    mock_publisher.submit.assert_not_called()
+    [(request, due)] = scheduler_mock.schedule.call_args.args[1]
+    assert str(request.request_id) == payload["request_id"]
+    assert due == request.send_at.timestamp()
+
+
+@pytest.mark.asyncio
+async def test_failed_scheduling_leaves_no_status_behind(
+    async_client: AsyncClient,
+    user_service_mock: AsyncMock,
     db_session_mock: AsyncMock,
+    monkeypatch
+):
+    stored = {}
+    cache_mock = MagicMock()
+    cache_mock.store = AsyncMock(side_effect=lambda client, entries: stored.update({e["request_id"]: e for e in entries}))
+    cache_mock.get_many = AsyncMock(side_effect=lambda client, ids: {str(i): stored[str(i)] for i in ids if str(i) in stored})
+    monkeypatch.setattr("app.main.status_cache", cache_mock)
+    scheduler_mock = MagicMock()
+    scheduler_mock.schedule = AsyncMock(side_effect=RedisError("connection lost"))
+    monkeypatch.setattr("app.main.scheduler", scheduler_mock)
+    user_service_mock.return_value = {"preferences": {"email": True, "push": True}}
+    request_id = "a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1"
+
+    response = await async_client.post("/api/v1/notifications/", json={
+        "notification_type": "email",
+        "user_id": "c4b4b4b4-b4b4-4b4b-b4b4-c4b4b4b4b4b4",
+        "template_code": "welcome_email",
+        "variables": {"name": "Peter", "link": "http://example.com/verify"},
+        "request_id": request_id,
+        "priority": 1,
+        "send_at": "2999-01-01T09:00:00+00:00"
+    })
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+    # The log row was deleted, so the database has nothing either.
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = []
+    db_session_mock.execute.return_value = result
+    status_response = await async_client.get(f"/api/v1/notifications/{request_id}/status/")
+
+    assert status_response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_send_notification_duplicate_request_id_is_conflict(
+    async_client: AsyncClient,
+    log_writer_mock: MagicMock,
+    mock_publisher: MagicMock,
+    user_service_mock: AsyncMock
+):
+    user_service_mock.return_value = {"preferences": {"email": True, "push": True}}
+    log_writer_mock.write.side_effect = DuplicateNotification("already exists")
+
+    payload = {
+        "notification_type": "email",
+        "user_id": "c4b4b4b4-b4b4-4b4b-b4b4-c4b4b4b4b4b4",
+        "template_code": "welcome_email",
+        "variables": {"name": "Peter", "link": "http://example.com/verify"},
+        "request_id": "a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1",
+        "priority": 1
+    }
+    response = await async_client.post("/api/v1/notifications/", json=payload)
+
+    assert response.status_code == status.HTTP_409_CONFLICT
+    mock_publisher.submit.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_send_notification_user_preferences_disabled(
+    async_client: AsyncClient, 
+    log_writer_mock: MagicMock,
     mock_publisher: MagicMock,
     user_service_mock: AsyncMock
 ):
@@ -152,11 +343,12 @@ async def test_send_notification_user_preferences_disabled(
     
     response = await async_client.post("/api/v1/notifications/", json=payload)
     
-    assert response.status_code == status.HTTP_403_FORBIDDEN
-    assert "User has disabled" in response.json()["detail"]
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.json()["message"] == "Notification suppressed by user preferences."
+    assert response.json()["data"]["request_id"] == "a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1"
     
-    db_session_mock.add.assert_not_called()
-    mock_publisher.publish_message.assert_not_called()
+    log_writer_mock.write.assert_not_called()
+    mock_publisher.submit.assert_not_called()
 
 @pytest.mark.asyncio
 async def test_send_notification_validation_error(async_client: AsyncClient):
@@ -191,8 +383,11 @@ async def test_send_notification_rate_limited(
     pipeline_mock = MagicMock()
     pipeline_mock.incr.return_value = pipeline_mock
     pipeline_mock.expire.return_value = pipeline_mock
-    pipeline_mock.execute.return_value = [99]  # Over the limit
+    pipeline_mock.execute = AsyncMock(return_value=[[0, 20, 0, 60000, 3000], True, None, None])  # Over the limit
     redis_mock.pipeline.return_value = pipeline_mock
+    redis_mock.set = AsyncMock()
+    redis_mock.delete = AsyncMock()
+    redis_mock.eval = AsyncMock()
     
     fast_app.dependency_overrides[get_db] = lambda: db_session_mock
     fast_app.dependency_overrides[get_redis] = lambda: redis_mock
@@ -211,11 +406,285 @@ async def test_send_notification_rate_limited(
 
     async with AsyncClient(
         transport=ASGITransport(app=fast_app), 
-        base_url="http://test"
+        base_url="http://test",
+        headers={"Authorization": "Bearer test-token"}
     ) as client:
         response = await client.post("/api/v1/notifications/", json=payload)
 
     assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
     assert "Too many requests" in response.json()["detail"]
+    assert response.headers["X-RateLimit-Remaining"] == "0"
+    assert response.headers["Retry-After"] == "3"
     
-    fast_app.dependency_overrides = {}
\ No newline at end of file
+    fast_app.dependency_overrides = {}
+
+@pytest.mark.asyncio
+async def test_admission_redis_error_releases_the_idempotency_claim(
+    async_client: AsyncClient,
+    redis_client_mock: MagicMock,
+    log_writer_mock: MagicMock
+):
+    redis_client_mock.pipeline.return_value.execute = AsyncMock(side_effect=RedisError("connection reset"))
+
+    response = await async_client.post("/api/v1/notifications/", json={
+        "notification_type": "email",
+        "user_id": "c4b4b4b4-b4b4-4b4b-b4b4-c4b4b4b4b4b4",
+        "template_code": "welcome_email",
+        "variables": {"name": "Peter", "link": "http://example.com/verify"},
+        "request_id": "a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1",
+        "priority": 1
+    })
+
+    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+    script, _, key = redis_client_mock.eval.call_args.args[:3]
+    assert script == RELEASE_SCRIPT
+    assert key == "idem:a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1"
+    log_writer_mock.write.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_send_notification_passes_pipelined_cache_read_to_user_lookup(
+    async_client: AsyncClient,
+    redis_client_mock: MagicMock,
+    user_service_mock: AsyncMock,
+    mock_publisher: MagicMock
+):
+    cached = '{"user_id": "c4b4b4b4-b4b4-4b4b-b4b4-c4b4b4b4b4b4", "preferences": {"email": true}}'
+    redis_client_mock.pipeline.return_value.execute = AsyncMock(return_value=[[1, 20, 19, 3000, 0], True, None, cached])
+    user_service_mock.return_value = {"preferences": {"email": True, "push": True}}
+
+    payload = {
+        "notification_type": "email",
+        "user_id": "c4b4b4b4-b4b4-4b4b-b4b4-c4b4b4b4b4b4",
+        "template_code": "welcome_email",
+        "variables": {"name": "Peter", "link": "http://example.com/verify"},
+        "request_id": "a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1",
+        "priority": 1
+    }
+    response = await async_client.post("/api/v1/notifications/", json=payload)
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert [c.args[0] for c in redis_client_mock.pipeline.return_value.get.call_args_list] == [
+        "idem:a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1",
+        "user_pref:c4b4b4b4-b4b4-4b4b-b4b4-c4b4b4b4b4b4"
+    ]
+    assert user_service_mock.call_args.kwargs["cached_data"] == cached
+
+
+@pytest.mark.asyncio
+async def test_send_notification_rejects_bad_token_before_redis(
+    async_client: AsyncClient,
+    redis_client_mock: MagicMock,
+    user_service_mock: AsyncMock,
+    monkeypatch
+):
+    monkeypatch.setattr("app.main.token_verifier", TokenVerifier(secret="test-secret"))
+
+    payload = {
+        "notification_type": "email",
+        "user_id": "c4b4b4b4-b4b4-4b4b-b4b4-c4b4b4b4b4b4",
+        "template_code": "welcome_email",
+        "variables": {"name": "Peter", "link": "http://example.com/verify"},
+        "request_id": "a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1",
+        "priority": 1
+    }
+    response = await async_client.post("/api/v1/notifications/", json=payload)
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    redis_client_mock.pipeline.assert_not_called()
+    user_service_mock.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_revoked_token_is_rejected_in_the_admission_round_trip(
+    async_client: AsyncClient,
+    redis_client_mock: MagicMock,
+    log_writer_mock: MagicMock,
+    monkeypatch
+):
+    monkeypatch.setattr("app.main.token_verifier", TokenVerifier(secret="test-secret"))
+    token = make_token()
+    pipeline = redis_client_mock.pipeline.return_value
+    pipeline.execute = AsyncMock(return_value=[[1, 20, 19, 3000, 0], True, None, None, 1])
+
+    response = await async_client.post("/api/v1/notifications/", headers={"Authorization": f"Bearer {token}"}, json={
+        "notification_type": "email",
+        "user_id": "c4b4b4b4-b4b4-4b4b-b4b4-c4b4b4b4b4b4",
+        "template_code": "welcome_email",
+        "variables": {"name": "Peter", "link": "http://example.com/verify"},
+        "request_id": "a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1",
+        "priority": 1
+    })
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    pipeline.exists.assert_called_once_with(f"revoked_token:{hashlib.sha256(token.encode()).hexdigest()}")
+    pipeline.execute.assert_awaited_once()
+    assert redis_client_mock.eval.call_args.args[0] == RELEASE_SCRIPT
+    log_writer_mock.write.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_and_cache_user_details_uses_prefetched_value_without_get():
+    redis_mock = MagicMock()
+    redis_mock.get = AsyncMock()
+
+    user = await get_and_cache_user_details(
+        "c4b4b4b4-b4b4-4b4b-b4b4-c4b4b4b4b4b4",
+        redis_mock,
+        "Bearer test-token",
+        cached_data='{"preferences": {"email": false}}'
+    )
+
+    assert user == {"preferences": {"email": False}}
+    redis_mock.get.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_status_batch_webhook_reports_unknown_ids(async_client: AsyncClient, monkeypatch):
+    updater_mock = MagicMock()
+    updater_mock.apply = AsyncMock(return_value={
+        uuid.UUID("a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1"): "updated",
+        uuid.UUID("b2b2b2b2-b2b2-2b2b-b2b2-b2b2b2b2b2b2"): "not_found"
+    })
+    monkeypatch.setattr("app.main.status_updater", updater_mock)
+
+    response = await async_client.post("/api/v1/email/status/batch", json=[
+        {"notification_id": "a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1", "status": "delivered"},
+        {"notification_id": "b2b2b2b2-b2b2-2b2b-b2b2-b2b2b2b2b2b2", "status": "failed", "error": "bounced"}
+    ])
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["data"] == {
+        "updated": ["a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1"],
+        "ignored": [],
+        "not_found": ["b2b2b2b2-b2b2-2b2b-b2b2-b2b2b2b2b2b2"]
+    }
+    assert len(updater_mock.apply.call_args.args[0]) == 2
+
+    empty = await async_client.post("/api/v1/push/status/batch", json=[])
+    assert empty.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_status_webhook_retry_after_final_state_is_a_no_op(async_client: AsyncClient, monkeypatch):
+    updater_mock = MagicMock()
+    updater_mock.submit = AsyncMock(return_value="ignored")
+    monkeypatch.setattr("app.main.status_updater", updater_mock)
+
+    response = await async_client.post("/api/v1/push/status/", json={
+        "notification_id": "a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1",
+        "status": "delivered"
+    })
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "ignored" in response.json()["message"]
+
+
+@pytest.mark.asyncio
+async def test_get_status_is_served_from_the_cache(async_client: AsyncClient, db_session_mock: MagicMock, monkeypatch):
+    cache_mock = MagicMock()
+    cache_mock.get_many = AsyncMock(return_value={"a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1": {
+        "request_id": "a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1",
+        "status": "delivered",
+        "last_updated": "2025-01-01 00:00:00+00:00",
+        "error": None
+    }})
+    monkeypatch.setattr("app.main.status_cache", cache_mock)
+
+    response = await async_client.get("/api/v1/notifications/a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1/status/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["data"]["status"] == "delivered"
+    db_session_mock.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_status_stream_sends_snapshot_and_closes_when_final(
+    async_client: AsyncClient,
+    db_session_mock: MagicMock,
+    monkeypatch
+):
+    delivered = "a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1"
+    unknown = "b2b2b2b2-b2b2-2b2b-b2b2-b2b2b2b2b2b2"
+    cache_mock = MagicMock()
+    cache_mock.get_many = AsyncMock(return_value={delivered: {
+        "request_id": delivered,
+        "status": "delivered",
+        "last_updated": "2025-01-01 00:00:00+00:00",
+        "error": None
+    }})
+    cache_mock.store = AsyncMock()
+    monkeypatch.setattr("app.main.status_cache", cache_mock)
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = []
+    db_session_mock.execute.return_value = result
+
+    response = await async_client.get(
+        "/api/v1/notifications/status/stream",
+        params=[("request_id", delivered), ("request_id", unknown)]
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert f'event: status\ndata: {{"request_id": "{delivered}", "status": "delivered"' in response.text
+    assert f'event: not_found\ndata: {{"request_id": "{unknown}"}}' in response.text
+
+
+@pytest.mark.asyncio
+async def test_status_stream_dropped_before_iteration_releases_its_subscription(
+    db_session_mock: MagicMock,
+    redis_client_mock: MagicMock,
+    monkeypatch
+):
+    hub = StatusStreamHub()
+    monkeypatch.setattr("app.main.status_stream", hub)
+    cache_mock = MagicMock()
+    cache_mock.get_many = AsyncMock(return_value={})
+    cache_mock.store = AsyncMock()
+    monkeypatch.setattr("app.main.status_cache", cache_mock)
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = []
+    db_session_mock.execute.return_value = result
+
+    response = await stream_notification_status([uuid.uuid4()], db_session_mock, redis_client_mock)
+    assert hub.stats()["active_streams"] == 1
+
+    # The body is never iterated; Starlette still runs the background task.
+    await response.background()
+    assert hub.stats()["active_streams"] == 0
+    assert hub.stats()["watched_ids"] == 0
+
+
+@pytest.mark.asyncio
+async def test_retried_submission_replays_the_original_response(
+    async_client: AsyncClient,
+    redis_client_mock: MagicMock,
+    log_writer_mock: MagicMock,
+    user_service_mock: AsyncMock
+):
+    user_service_mock.return_value = {"preferences": {"email": True, "push": True}}
+    payload = {
+        "notification_type": "email",
+        "user_id": "c4b4b4b4-b4b4-4b4b-b4b4-c4b4b4b4b4b4",
+        "template_code": "welcome_email",
+        "variables": {"name": "Peter", "link": "http://example.com/verify"},
+        "request_id": "a1b1b1b1-b1b1-1b1b-b1b1-a1b1b1b1b1b1",
+        "priority": 1
+    }
+
+    first = await async_client.post("/api/v1/notifications/", json=payload)
+    stored = redis_client_mock.eval.call_args.args[4]
+    redis_client_mock.pipeline.return_value.execute = AsyncMock(return_value=[[1, 20, 18, 3000, 0], False, stored, None])
+    retry = await async_client.post("/api/v1/notifications/", json=payload)
+
+    assert first.status_code == retry.status_code == status.HTTP_202_ACCEPTED
+    assert retry.json() == first.json()
+    log_writer_mock.write.assert_awaited_once()
+
+    in_flight = '{"owner": "another-handler", "fingerprint": "%s"}' % json.loads(stored)["fingerprint"]
+    redis_client_mock.pipeline.return_value.execute = AsyncMock(return_value=[[1, 20, 17, 3000, 0], False, in_flight, None])
+    concurrent = await async_client.post("/api/v1/notifications/", json=payload)
+    assert concurrent.status_code == status.HTTP_409_CONFLICT
+
+    changed = await async_client.post("/api/v1/notifications/", json={**payload, "template_code": "other"})
+    assert changed.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
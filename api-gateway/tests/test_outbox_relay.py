@@ -0,0 +1,118 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+from unittest.mock import MagicMock, AsyncMock, patch
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.outbox_relay import OutboxRelay
+from app.models import NotificationOutbox
+from tests.test_amqp_client import make_request
+
+
+def make_session_factory(rows):
+    session = MagicMock()
+    session.begin.return_value.__aenter__ = AsyncMock()
+    session.begin.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    select_result = MagicMock()
+    select_result.scalars.return_value.all.return_value = rows
+    session.execute = AsyncMock(side_effect=[select_result] + [MagicMock(), MagicMock()])
+
+    factory = MagicMock()
+    factory.return_value.__aenter__ = AsyncMock(return_value=session)
+    factory.return_value.__aexit__ = AsyncMock(return_value=False)
+    return factory, session
+
+
+def make_row(row_id, attempts=0):
+    request = make_request()
+    return NotificationOutbox(id=row_id, request_id=request.request_id, payload=request.model_dump_json(), attempts=attempts)
+
+
+@pytest.mark.asyncio
+async def test_run_once_publishes_batch_and_deletes_confirmed_rows():
+    factory, session = make_session_factory([make_row(1), make_row(2)])
+    publisher = MagicMock()
+    publisher.publish_batch = AsyncMock(return_value=[None, None])
+
+    relay = OutboxRelay(publisher, factory)
+    relayed = await relay.run_once()
+
+    assert relayed == 2
+    assert len(publisher.publish_batch.call_args.args[0]) == 2
+    select_stmt = session.execute.call_args_list[0].args[0]
+    assert "FOR UPDATE SKIP LOCKED" in str(select_stmt.compile(dialect=postgresql.dialect()))
+    # select, then delete of the confirmed rows
+    assert session.execute.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_run_once_keeps_failed_rows_for_retry():
+    factory, session = make_session_factory([make_row(1), make_row(2)])
+    publisher = MagicMock()
+    publisher.publish_batch = AsyncMock(return_value=[None, RuntimeError("nacked")])
+
+    relay = OutboxRelay(publisher, factory)
+    relayed = await relay.run_once()
+
+    assert relayed == 1
+    # select, delete confirmed, bump attempts on the failed one
+    assert session.execute.await_count == 3
+    retry_stmt = str(session.execute.call_args_list[2].args[0].compile(dialect=postgresql.dialect()))
+    assert "available_at" in retry_stmt and "make_interval" in retry_stmt
+
+
+@pytest.mark.asyncio
+async def test_run_once_gives_up_on_a_row_at_max_attempts():
+    factory, session = make_session_factory([make_row(1, attempts=2)])
+    publisher = MagicMock()
+    publisher.publish_batch = AsyncMock(return_value=[RuntimeError("nacked")])
+    cache = MagicMock()
+    cache.store = AsyncMock()
+    stream = MagicMock()
+    stream.publish = AsyncMock()
+
+    with patch("app.outbox_relay.get_redis"):
+        relay = OutboxRelay(publisher, factory, max_attempts=3, cache=cache, stream=stream)
+        relayed = await relay.run_once()
+
+    assert relayed == 0
+    # select, delete the dead row, mark its log row failed
+    assert session.execute.await_count == 3
+    delete_stmt, log_stmt = (call.args[0] for call in session.execute.call_args_list[1:])
+    assert delete_stmt.is_delete
+    assert "notification_logs" in str(log_stmt)
+    entry = cache.store.call_args.args[1][0]
+    assert entry["status"] == "failed"
+    assert "after 3 attempts" in entry["error"]
+    # Live /status subscribers hear about it too.
+    assert stream.publish.call_args.args[1] == [entry]
+
+
+@pytest.mark.asyncio
+async def test_run_once_drops_unreadable_payload_without_publishing():
+    row = make_row(1)
+    row.payload = "{not json"
+    factory, session = make_session_factory([row])
+    publisher = MagicMock()
+    publisher.publish_batch = AsyncMock()
+
+    relay = OutboxRelay(publisher, factory)
+
+    assert await relay.run_once() == 0
+    publisher.publish_batch.assert_not_awaited()
+    assert session.execute.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_run_once_with_empty_outbox_does_not_publish():
+    factory, _ = make_session_factory([])
+    publisher = MagicMock()
+    publisher.publish_batch = AsyncMock()
+
+    relay = OutboxRelay(publisher, factory)
+
+    assert await relay.run_once() == 0
+    publisher.publish_batch.assert_not_awaited()
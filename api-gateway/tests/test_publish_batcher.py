@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.publish_batcher import PublishBatcher, PublishQueueFull
+from tests.test_amqp_client import make_request
+
+
+def make_publisher(results=None):
+    publisher = AsyncMock()
+
+    async def publish_batch(requests):
+        if results is not None:
+            return results[:len(requests)]
+        return [None] * len(requests)
+
+    publisher.publish_batch = AsyncMock(side_effect=publish_batch)
+    return publisher
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submits_are_flushed_as_one_batch():
+    publisher = make_publisher()
+    batcher = PublishBatcher(publisher, max_latency_ms=20, max_batch_size=10)
+    await batcher.start()
+
+    await asyncio.gather(*(batcher.submit(make_request()) for _ in range(5)))
+    await batcher.stop()
+
+    publisher.publish_batch.assert_awaited_once()
+    assert len(publisher.publish_batch.call_args.args[0]) == 5
+    assert batcher.stats()["published"] == 5
+    assert batcher.stats()["batches"] == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_is_flushed_when_full():
+    publisher = make_publisher()
+    batcher = PublishBatcher(publisher, max_latency_ms=1000, max_batch_size=2)
+    await batcher.start()
+
+    await asyncio.wait_for(
+        asyncio.gather(*(batcher.submit(make_request()) for _ in range(4))),
+        timeout=0.5
+    )
+    await batcher.stop()
+
+    assert publisher.publish_batch.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_confirm_is_raised_only_to_its_caller():
+    publisher = make_publisher(results=[None, RuntimeError("nacked")])
+    batcher = PublishBatcher(publisher, max_latency_ms=20, max_batch_size=2)
+    await batcher.start()
+
+    results = await asyncio.gather(
+        batcher.submit(make_request()),
+        batcher.submit(make_request()),
+        return_exceptions=True
+    )
+    await batcher.stop()
+
+    assert results[0] is None
+    assert isinstance(results[1], RuntimeError)
+    assert batcher.stats()["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_submit_rejects_when_queue_is_full():
+    batcher = PublishBatcher(make_publisher(), max_queue_depth=1)
+
+    waiting = asyncio.create_task(batcher.submit(make_request()))
+    await asyncio.sleep(0)
+
+    with pytest.raises(PublishQueueFull):
+        await batcher.submit(make_request())
+    assert batcher.stats()["rejected"] == 1
+
+    await batcher.stop()
+    await waiting
+
+
+@pytest.mark.asyncio
+async def test_stop_during_a_slow_publish_resolves_every_caller():
+    release = asyncio.Event()
+    publisher = AsyncMock()
+
+    async def publish_batch(requests):
+        await release.wait()
+        return [None] * len(requests)
+
+    publisher.publish_batch = AsyncMock(side_effect=publish_batch)
+    batcher = PublishBatcher(publisher, max_latency_ms=1, max_batch_size=2)
+    await batcher.start()
+
+    in_flight = [asyncio.create_task(batcher.submit(make_request())) for _ in range(2)]
+    await asyncio.sleep(0.05)
+    queued = asyncio.create_task(batcher.submit(make_request()))
+    await asyncio.sleep(0)
+
+    stopping = asyncio.create_task(batcher.stop())
+    await asyncio.sleep(0.01)
+    with pytest.raises(PublishQueueFull):
+        await asyncio.wait_for(batcher.submit(make_request()), timeout=1)
+    release.set()
+    await asyncio.wait_for(stopping, timeout=1)
+
+    await asyncio.wait_for(asyncio.gather(*in_flight, queued), timeout=1)
+    assert batcher.stats()["published"] == 3
@@ -0,0 +1,81 @@
+import pytest
+import fakeredis
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.rate_limiter import RateLimiter, RateLimitRule
+
+
+@pytest.fixture
+def fake_redis():
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("algorithm", ["token_bucket", "sliding_log"])
+async def test_limit_is_enforced_and_reported(fake_redis, algorithm):
+    limiter = RateLimiter(algorithm=algorithm, default_limit=3)
+    rules = limiter.rules_for(client_ip="10.0.0.1")
+
+    results = [await limiter.check(fake_redis, rules) for _ in range(4)]
+
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert [r.remaining for r in results[:3]] == [2, 1, 0]
+    assert results[3].retry_after_ms > 0
+    assert results[3].headers()["X-RateLimit-Limit"] == "3"
+    assert "Retry-After" in results[3].headers()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("algorithm", ["token_bucket", "sliding_log"])
+async def test_keys_expire_instead_of_living_forever(fake_redis, algorithm):
+    limiter = RateLimiter(algorithm=algorithm, window_seconds=60)
+    rules = limiter.rules_for(client_ip="10.0.0.1")
+
+    await limiter.check(fake_redis, rules)
+    first_ttl = await fake_redis.pttl(rules[0].key)
+
+    assert 0 < first_ttl <= 60000
+
+
+@pytest.mark.asyncio
+async def test_denied_rule_does_not_charge_the_others(fake_redis):
+    limiter = RateLimiter(default_limit=10)
+    tight = RateLimitRule("rate_limit:test:tight", 1)
+    loose = RateLimitRule("rate_limit:test:loose", 10)
+
+    assert (await limiter.check(fake_redis, [loose, tight])).allowed
+    denied = await limiter.check(fake_redis, [loose, tight])
+
+    assert not denied.allowed
+    assert denied.limit == 1
+    assert (await limiter.check(fake_redis, [loose])).remaining == 8
+
+
+def test_rules_cover_configured_dimensions():
+    limiter = RateLimiter(
+        default_limit=20,
+        per_user_limit=5,
+        per_type_limits={"email": 1000},
+        api_key_limits={"tenant-key": 5000}
+    )
+
+    rules = limiter.rules_for(
+        client_ip="10.0.0.1",
+        api_key="tenant-key",
+        user_id="c4b4b4b4-b4b4-4b4b-b4b4-c4b4b4b4b4b4",
+        notification_type="email"
+    )
+
+    assert [rule.limit for rule in rules] == [5000, 5, 1000]
+    assert ":api_key:" in rules[0].key and "tenant-key" not in rules[0].key
+
+
+def test_unknown_api_key_falls_back_to_client_ip():
+    limiter = RateLimiter(api_key_limits={"tenant-key": 5000})
+
+    rules = limiter.rules_for(client_ip="10.0.0.1", api_key="made-up")
+
+    assert rules == [RateLimitRule("rate_limit:token_bucket:ip:10.0.0.1", 20)]
@@ -0,0 +1,124 @@
+import datetime
+import time
+import uuid
+import pytest
+from unittest.mock import MagicMock, AsyncMock, patch
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.scheduler import NotificationScheduler, due_at, SCHEDULED_KEY, LEASED_KEY, PAYLOADS_KEY, ATTEMPTS_KEY
+from tests.test_amqp_client import make_request
+
+
+def make_scheduled_request(**update):
+    return make_request().model_copy(update={"request_id": uuid.uuid4(), **update})
+
+
+def make_redis(popped):
+    redis_mock = MagicMock()
+    redis_mock.eval = AsyncMock(return_value=popped)
+    pipeline = MagicMock()
+    pipeline.execute = AsyncMock()
+    redis_mock.pipeline.return_value = pipeline
+    return redis_mock, pipeline
+
+
+def test_due_at_only_defers_future_send_times():
+    assert due_at(make_scheduled_request()) is None
+    assert due_at(make_scheduled_request(send_at=datetime.datetime(2000, 1, 1))) is None
+
+    send_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=1)
+    assert due_at(make_scheduled_request(send_at=send_at)) == send_at.timestamp()
+    # Naive times are UTC.
+    assert due_at(make_scheduled_request(send_at=send_at.replace(tzinfo=None))) == send_at.timestamp()
+
+
+@pytest.mark.asyncio
+async def test_schedule_stores_payload_and_due_time_in_one_transaction():
+    redis_mock, pipeline = make_redis([])
+    request = make_scheduled_request()
+    scheduler = NotificationScheduler(MagicMock())
+
+    await scheduler.schedule(redis_mock, [(request, 1234.0)])
+
+    redis_mock.pipeline.assert_called_once_with(transaction=True)
+    pipeline.hset.assert_called_once_with(PAYLOADS_KEY, mapping={str(request.request_id): request.model_dump_json()})
+    pipeline.zadd.assert_called_once_with(SCHEDULED_KEY, {str(request.request_id): 1234.0})
+    pipeline.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_run_once_publishes_due_batch_and_reschedules_failures():
+    sent, failed = make_scheduled_request(), make_scheduled_request()
+    redis_mock, pipeline = make_redis([
+        [str(sent.request_id), str(failed.request_id), "gone"],
+        [sent.model_dump_json(), failed.model_dump_json(), None],
+        [None, "1", None]
+    ])
+    publisher = MagicMock()
+    publisher.publish_batch = AsyncMock(return_value=[None, ConnectionError("broker down")])
+    scheduler = NotificationScheduler(publisher, batch_size=3, lease_seconds=60, retry_delay=5)
+
+    before = time.time()
+    assert await scheduler.run_once(redis_mock) == 3
+
+    keys, args = redis_mock.eval.call_args.args[2:6], redis_mock.eval.call_args.args[6:]
+    assert keys == (SCHEDULED_KEY, LEASED_KEY, PAYLOADS_KEY, ATTEMPTS_KEY)
+    assert args[1] == 3 and args[2] == pytest.approx(args[0] + 60)
+
+    assert [request.request_id for request in publisher.publish_batch.call_args.args[0]] == [sent.request_id, failed.request_id]
+    pipeline.zrem.assert_any_call(LEASED_KEY, "gone", str(sent.request_id))
+    pipeline.hdel.assert_any_call(PAYLOADS_KEY, "gone", str(sent.request_id))
+    pipeline.hdel.assert_any_call(ATTEMPTS_KEY, "gone", str(sent.request_id))
+    pipeline.zrem.assert_any_call(LEASED_KEY, str(failed.request_id))
+    retry_at = pipeline.zadd.call_args.args[1][str(failed.request_id)]
+    assert retry_at >= before + 5
+    pipeline.hincrby.assert_called_once_with(ATTEMPTS_KEY, str(failed.request_id), 1)
+    assert (scheduler.published, scheduler.failed) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_run_once_with_nothing_due_does_not_publish():
+    redis_mock, pipeline = make_redis([])
+    publisher = MagicMock()
+    publisher.publish_batch = AsyncMock()
+    scheduler = NotificationScheduler(publisher)
+
+    assert await scheduler.run_once(redis_mock) == 0
+    publisher.publish_batch.assert_not_awaited()
+    pipeline.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_run_once_marks_failed_after_max_attempts():
+    request = make_scheduled_request()
+    request_id = str(request.request_id)
+    redis_mock, pipeline = make_redis([[request_id], [request.model_dump_json()], ["2"]])
+    publisher = MagicMock()
+    publisher.publish_batch = AsyncMock(return_value=[ConnectionError("broker down")])
+    session = MagicMock()
+    session.begin.return_value.__aenter__ = AsyncMock()
+    session.begin.return_value.__aexit__ = AsyncMock(return_value=False)
+    session.execute = AsyncMock()
+    factory = MagicMock()
+    factory.return_value.__aenter__ = AsyncMock(return_value=session)
+    factory.return_value.__aexit__ = AsyncMock(return_value=False)
+    cache, stream = MagicMock(), MagicMock()
+    cache.store = AsyncMock()
+    stream.publish = AsyncMock()
+    scheduler = NotificationScheduler(publisher, max_attempts=3, session_factory=factory, cache=cache, stream=stream)
+
+    with patch("app.scheduler.get_redis"):
+        await scheduler.run_once(redis_mock)
+
+    assert "notification_logs" in str(session.execute.call_args.args[0])
+    entry = cache.store.call_args.args[1][0]
+    assert entry["status"] == "failed"
+    assert "after 3 attempts" in entry["error"]
+    assert stream.publish.call_args.args[1] == [entry]
+    # Dropped from the schedule, not put back.
+    pipeline.zadd.assert_not_called()
+    pipeline.hdel.assert_any_call(PAYLOADS_KEY, request_id)
+    assert (scheduler.published, scheduler.failed, scheduler.dead) == (0, 0, 1)
@@ -0,0 +1,55 @@
+import uuid
+import pytest
+import fakeredis
+from unittest.mock import MagicMock, AsyncMock
+from redis.exceptions import RedisError
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.status_cache import StatusCache, status_cache_key, status_entry
+from app.local_cache import LocalCache
+from app.models import NotificationStatus
+
+
+@pytest.mark.asyncio
+async def test_pending_entry_never_overwrites_a_terminal_one():
+    redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    cache = StatusCache(pending_ttl=60, terminal_ttl=3600, local=LocalCache())
+    request_id = uuid.uuid4()
+
+    await cache.store(redis_client, [status_entry(request_id, NotificationStatus.delivered)])
+    await cache.store(redis_client, [status_entry(request_id, NotificationStatus.pending)])
+
+    fields = await redis_client.hgetall(status_cache_key(request_id))
+    assert fields["s"] == "delivered"
+    assert 0 < await redis_client.ttl(status_cache_key(request_id)) <= 3600
+
+
+@pytest.mark.asyncio
+async def test_only_terminal_entries_are_kept_locally():
+    redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    cache = StatusCache(local=LocalCache())
+    pending_id, failed_id = uuid.uuid4(), uuid.uuid4()
+
+    await cache.store(redis_client, [
+        status_entry(pending_id, NotificationStatus.pending),
+        status_entry(failed_id, NotificationStatus.failed, "bounced")
+    ])
+    await redis_client.flushall()
+
+    assert await cache.get(redis_client, pending_id) is None
+    entry = await cache.get(redis_client, failed_id)
+    assert (entry["status"], entry["error"]) == ("failed", "bounced")
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_are_treated_as_a_miss():
+    redis_client = MagicMock()
+    redis_client.pipeline.return_value.execute = AsyncMock(side_effect=RedisError("down"))
+    cache = StatusCache(local=LocalCache())
+
+    assert await cache.get(redis_client, uuid.uuid4()) is None
+    assert cache.misses == 1
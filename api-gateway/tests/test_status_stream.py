@@ -0,0 +1,56 @@
+import uuid
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.status_stream import StatusStreamHub, StreamCapacityExceeded
+from app.status_cache import status_entry
+from app.models import NotificationStatus
+
+
+@pytest.mark.asyncio
+async def test_stream_delivers_published_transition_then_closes():
+    hub = StatusStreamHub(heartbeat=0.01)
+    request_id = str(uuid.uuid4())
+    subscription = hub.subscribe([request_id])
+    frames = hub.events(subscription, {request_id: status_entry(request_id, NotificationStatus.pending)})
+
+    assert b'"status": "pending"' in await frames.__anext__()
+    assert await frames.__anext__() == b": keepalive\n\n"
+
+    hub.dispatch([status_entry(request_id, NotificationStatus.delivered)])
+    assert b'"status": "delivered"' in await frames.__anext__()
+    with pytest.raises(StopAsyncIteration):
+        await frames.__anext__()
+
+    assert hub.stats()["active_streams"] == 0
+    assert hub.stats()["watched_ids"] == 0
+
+
+@pytest.mark.asyncio
+async def test_subscriptions_are_capped_per_replica():
+    hub = StatusStreamHub(max_subscriptions=1)
+    hub.subscribe([str(uuid.uuid4())])
+
+    with pytest.raises(StreamCapacityExceeded):
+        hub.subscribe([str(uuid.uuid4())])
+    assert hub.stats()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unsubscribe_is_idempotent():
+    hub = StatusStreamHub()
+    request_id = str(uuid.uuid4())
+    subscription = hub.subscribe([request_id])
+    frames = hub.events(subscription, {})
+
+    hub.unsubscribe(subscription)
+    hub.unsubscribe(subscription)
+    assert hub.stats()["active_streams"] == 0
+
+    assert b"not_found" in await frames.__anext__()
+    with pytest.raises(StopAsyncIteration):
+        await frames.__anext__()
+    assert hub.stats()["active_streams"] == 0
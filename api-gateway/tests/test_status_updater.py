@@ -0,0 +1,136 @@
+import asyncio
+import uuid
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.status_updater import StatusUpdater, StatusNotFound, StatusQueueFull
+from app.models import StatusUpdateRequest, NotificationStatus
+
+
+def make_session_factory(outcomes):
+    session = MagicMock()
+    session.begin.return_value.__aenter__ = AsyncMock()
+    session.begin.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    result = MagicMock()
+    result.all.return_value = list(outcomes.items())
+    session.execute = AsyncMock(return_value=result)
+
+    factory = MagicMock()
+    factory.return_value.__aenter__ = AsyncMock(return_value=session)
+    factory.return_value.__aexit__ = AsyncMock(return_value=False)
+    return factory, session
+
+
+def make_update(request_id=None, new_status=NotificationStatus.delivered, error=None):
+    return StatusUpdateRequest(notification_id=request_id or uuid.uuid4(), status=new_status, error=error)
+
+
+@pytest.mark.asyncio
+async def test_apply_reports_unknown_ids_without_failing_the_batch():
+    known, final, unknown = make_update(), make_update(), make_update()
+    factory, session = make_session_factory({
+        known.notification_id: "updated",
+        final.notification_id: "ignored",
+        unknown.notification_id: "not_found"
+    })
+    updater = StatusUpdater(factory)
+
+    outcomes = await updater.apply([known, final, unknown])
+
+    assert outcomes[unknown.notification_id] == "not_found"
+    session.execute.assert_awaited_once()
+    sql = str(session.execute.call_args.args[0])
+    assert "l.status = 'pending'" in sql
+    assert "RETURNING" in sql
+    stats = updater.stats()
+    assert (stats["updated"], stats["ignored"], stats["not_found"]) == (1, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_apply_keeps_the_first_terminal_update_per_id():
+    request_id = uuid.uuid4()
+    factory, session = make_session_factory({request_id: "updated"})
+
+    await StatusUpdater(factory).apply([
+        make_update(request_id, NotificationStatus.pending),
+        make_update(request_id, NotificationStatus.failed, "bounced"),
+        make_update(request_id, NotificationStatus.delivered)
+    ])
+
+    params = session.execute.call_args.args[1]
+    assert params["request_ids"] == [request_id]
+    assert params["statuses"] == ["failed"]
+    assert params["errors"] == ["bounced"]
+
+
+@pytest.mark.asyncio
+async def test_single_events_are_coalesced_into_one_statement():
+    known, retried, unknown = make_update(), make_update(), make_update()
+    factory, session = make_session_factory({
+        known.notification_id: "updated",
+        retried.notification_id: "ignored",
+        unknown.notification_id: "not_found"
+    })
+    updater = StatusUpdater(factory, max_latency_ms=5)
+    await updater.start()
+
+    results = await asyncio.gather(
+        updater.submit(known), updater.submit(retried), updater.submit(unknown),
+        return_exceptions=True
+    )
+    await updater.stop()
+
+    assert results[:2] == ["updated", "ignored"]
+    assert isinstance(results[2], StatusNotFound)
+    session.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_updated_goes_to_the_report_that_was_applied():
+    request_id = uuid.uuid4()
+    pending = make_update(request_id, NotificationStatus.pending)
+    delivered = make_update(request_id, NotificationStatus.delivered)
+    factory, session = make_session_factory({request_id: "updated"})
+    updater = StatusUpdater(factory, max_latency_ms=5)
+    await updater.start()
+
+    results = await asyncio.gather(updater.submit(pending), updater.submit(delivered))
+    await updater.stop()
+
+    assert session.execute.call_args.args[1]["statuses"] == ["delivered"]
+    assert results == ["ignored", "updated"]
+
+
+@pytest.mark.asyncio
+async def test_stop_during_a_slow_update_resolves_every_caller():
+    updates = [make_update() for _ in range(3)]
+    factory, session = make_session_factory({update.notification_id: "updated" for update in updates})
+    release = asyncio.Event()
+    result = session.execute.return_value
+
+    async def execute(statement, params):
+        await release.wait()
+        return result
+
+    session.execute = AsyncMock(side_effect=execute)
+    updater = StatusUpdater(factory, max_latency_ms=1, max_batch_size=2)
+    await updater.start()
+
+    in_flight = [asyncio.create_task(updater.submit(update)) for update in updates[:2]]
+    await asyncio.sleep(0.05)
+    queued = asyncio.create_task(updater.submit(updates[2]))
+    await asyncio.sleep(0)
+
+    stopping = asyncio.create_task(updater.stop())
+    await asyncio.sleep(0.01)
+    with pytest.raises(StatusQueueFull):
+        await asyncio.wait_for(updater.submit(make_update()), timeout=1)
+    release.set()
+    await asyncio.wait_for(stopping, timeout=1)
+
+    assert await asyncio.wait_for(asyncio.gather(*in_flight, queued), timeout=1) == ["updated"] * 3
@@ -0,0 +1,40 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.user_loader import UserBatchLoader
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loads_share_one_batch_call():
+    batch_fn = AsyncMock(return_value={"u1": {"user_id": "u1"}, "u2": {"user_id": "u2"}})
+    loader = UserBatchLoader(batch_fn, max_latency_ms=5)
+
+    results = await asyncio.gather(loader.load("u1"), loader.load("u2"), loader.load("u1"), loader.load("u3"))
+
+    assert results == [{"user_id": "u1"}, {"user_id": "u2"}, {"user_id": "u1"}, None]
+    batch_fn.assert_awaited_once()
+    assert sorted(batch_fn.call_args.args[0]) == ["u1", "u2", "u3"]
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_dispatched_without_waiting():
+    batch_fn = AsyncMock(side_effect=lambda ids: {i: {"user_id": i} for i in ids})
+    loader = UserBatchLoader(batch_fn, max_latency_ms=10000, max_batch_size=2)
+
+    results = await asyncio.wait_for(asyncio.gather(loader.load("a"), loader.load("b")), timeout=0.5)
+
+    assert [r["user_id"] for r in results] == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_batch_failure_reaches_every_caller():
+    loader = UserBatchLoader(AsyncMock(side_effect=RuntimeError("down")), max_latency_ms=1)
+
+    results = await asyncio.gather(loader.load("a"), loader.load("b"), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import time
+import pytest
+from fastapi import HTTPException
+from unittest.mock import AsyncMock, MagicMock
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import user_service_client
+from app.circuit_breaker import CircuitBreaker
+from app.local_cache import LocalCache
+from app.config import settings
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(user_service_client, "user_cache", LocalCache())
+    monkeypatch.setattr(user_service_client, "user_service_breaker", CircuitBreaker(failure_threshold=2, reset_timeout=60))
+
+
+def make_redis(cached=None):
+    redis_mock = MagicMock()
+    redis_mock.get = AsyncMock(return_value=cached)
+    redis_mock.setex = AsyncMock()
+    return redis_mock
+
+
+def entry(data, age, missing=False):
+    return json.dumps({"data": data, "missing": missing, "fetched_at": time.time() - age})
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_served_while_refreshing_in_background(monkeypatch):
+    service = AsyncMock(return_value={"user_id": "u1", "name": "fresh"})
+    monkeypatch.setattr(user_service_client, "get_user_details_from_service", service)
+    redis_mock = make_redis(entry({"user_id": "u1", "name": "stale"}, age=settings.USER_PREF_SOFT_TTL + 1))
+
+    user = await user_service_client.get_and_cache_user_details("u1", redis_mock, "Bearer t")
+    assert user["name"] == "stale"
+
+    await asyncio.gather(*user_service_client._background_refreshes)
+    service.assert_awaited_once()
+    stored = json.loads(redis_mock.setex.call_args.args[2])
+    assert stored["data"]["name"] == "fresh"
+    assert redis_mock.setex.call_args.args[1] == int(settings.USER_PREF_HARD_TTL)
+
+
+@pytest.mark.asyncio
+async def test_not_found_is_cached_as_negative_entry(monkeypatch):
+    service = AsyncMock(side_effect=HTTPException(404, "User not found"))
+    monkeypatch.setattr(user_service_client, "get_user_details_from_service", service)
+    redis_mock = make_redis()
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc:
+            await user_service_client.get_and_cache_user_details("ghost", redis_mock, "Bearer t")
+        assert exc.value.status_code == 404
+
+    service.assert_awaited_once()
+    assert redis_mock.setex.call_args.args[1] == int(settings.USER_PREF_NEGATIVE_TTL)
+    assert json.loads(redis_mock.setex.call_args.args[2])["missing"] is True
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast_without_calling_user_service(monkeypatch):
+    service = AsyncMock(side_effect=HTTPException(503, "down"))
+    monkeypatch.setattr(user_service_client, "get_user_details_from_service", service)
+
+    for user_id in ("a", "b", "c"):
+        with pytest.raises(HTTPException) as exc:
+            await user_service_client.get_and_cache_user_details(user_id, make_redis(), "Bearer t")
+        assert exc.value.status_code == 503
+
+    assert service.await_count == 2
+    assert user_service_client.user_service_breaker.state == "open"
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_keeps_serving_stale_data(monkeypatch):
+    service = AsyncMock()
+    monkeypatch.setattr(user_service_client, "get_user_details_from_service", service)
+    breaker = user_service_client.user_service_breaker
+    breaker.record_failure()
+    breaker.record_failure()
+
+    redis_mock = make_redis(entry({"user_id": "u1"}, age=settings.USER_PREF_SOFT_TTL + 1))
+    user = await user_service_client.get_and_cache_user_details("u1", redis_mock, "Bearer t")
+
+    assert user == {"user_id": "u1"}
+    assert not user_service_client._background_refreshes
+    service.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_unverified_token_is_checked_by_user_service_not_the_batch_loader(monkeypatch):
+    service = AsyncMock(side_effect=HTTPException(401, "Invalid token"))
+    loader = MagicMock()
+    loader.load = AsyncMock(return_value={"user_id": "u1"})
+    monkeypatch.setattr(user_service_client, "get_user_details_from_service", service)
+    monkeypatch.setattr(user_service_client, "user_loader", loader)
+    monkeypatch.setattr(settings, "INTERNAL_SERVICE_TOKEN", "internal")
+    monkeypatch.setattr(user_service_client.token_verifier, "secret", None)
+    monkeypatch.setattr(user_service_client.token_verifier, "jwks_url", None)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await user_service_client.get_and_cache_user_details("u1", make_redis(), "forged")
+
+    assert exc_info.value.status_code == 401
+    service.assert_awaited_once_with("u1", "forged")
+    loader.load.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_batch_loader_is_used_once_tokens_are_verified_in_process(monkeypatch):
+    service = AsyncMock()
+    loader = MagicMock()
+    loader.load = AsyncMock(return_value={"user_id": "u1"})
+    monkeypatch.setattr(user_service_client, "get_user_details_from_service", service)
+    monkeypatch.setattr(user_service_client, "user_loader", loader)
+    monkeypatch.setattr(settings, "INTERNAL_SERVICE_TOKEN", "internal")
+    monkeypatch.setattr(user_service_client.token_verifier, "secret", "signing-secret")
+
+    assert await user_service_client.get_and_cache_user_details("u1", make_redis(), "token") == {"user_id": "u1"}
+    loader.load.assert_awaited_once_with("u1")
+    service.assert_not_awaited()
+
+
+def test_circuit_half_opens_after_reset_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_bulk_lookup_uses_one_mget_and_one_batch_call(monkeypatch):
+    batch = AsyncMock(return_value={"u2": {"user_id": "u2"}})
+    monkeypatch.setattr(user_service_client, "get_users_batch_from_service", batch)
+    redis_mock = MagicMock()
+    redis_mock.mget = AsyncMock(return_value=[entry({"user_id": "u1"}, age=0), None, None])
+    pipeline = MagicMock()
+    pipeline.execute = AsyncMock()
+    redis_mock.pipeline.return_value = pipeline
+
+    users = await user_service_client.get_users_details_bulk(["u1", "u2", "ghost"], redis_mock)
+
+    assert users == {"u1": {"user_id": "u1"}, "u2": {"user_id": "u2"}, "ghost": None}
+    batch.assert_awaited_once_with(["u2", "ghost"])
+    ttls = {call.args[0]: call.args[1] for call in pipeline.setex.call_args_list}
+    assert ttls == {
+        "user_pref:u2": int(settings.USER_PREF_HARD_TTL),
+        "user_pref:ghost": int(settings.USER_PREF_NEGATIVE_TTL)
+    }
+    assert user_service_client.is_user_cached_locally("ghost")
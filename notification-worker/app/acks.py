@@ -0,0 +1,80 @@
+from collections import deque
+from typing import Optional
+from aio_pika.abc import AbstractIncomingMessage
+
+
+class AckBatcher:
+    """
+    Acknowledges one channel's deliveries with a single `basic.ack
+    multiple=true` per batch instead of one frame per message.
+
+    Sends finish out of order, but a multiple ack covers every delivery up
+    to its tag, so it is only sent up to the newest tag below which every
+    delivery has finished. Deliveries that were rejected individually count
+    as finished. Acks are flushed every `batch_size` completions and, by the
+    worker, every ack interval.
+    """
+
+    def __init__(self, batch_size: int = 50):
+        self.batch_size = batch_size
+
+        self._outstanding: deque[int] = deque()
+        # delivery tag -> message to ack, or None if it was settled on its own
+        self._finished: dict[int, Optional[AbstractIncomingMessage]] = {}
+        self._unacked = 0
+        self._last_tag = 0
+
+        self.acked = 0
+        self.ack_frames = 0
+
+    def track(self, message: AbstractIncomingMessage):
+        """Registers a delivery; must be called in delivery order."""
+        tag = message.delivery_tag or 0
+        if tag <= self._last_tag:
+            # Tags restart when the channel is reopened; the old deliveries
+            # are redelivered by the broker and can no longer be acked here.
+            self.reset()
+        self._last_tag = tag
+        self._outstanding.append(tag)
+
+    async def ack(self, message: AbstractIncomingMessage):
+        self._finished[message.delivery_tag or 0] = message
+        self._unacked += 1
+        if self._unacked >= self.batch_size:
+            await self.flush()
+
+    def settled(self, message: AbstractIncomingMessage):
+        """Marks a delivery that was rejected or nacked on its own."""
+        self._finished[message.delivery_tag or 0] = None
+
+    async def flush(self):
+        last: Optional[AbstractIncomingMessage] = None
+        count = 0
+        while self._outstanding and self._outstanding[0] in self._finished:
+            message = self._finished.pop(self._outstanding.popleft())
+            if message is not None:
+                last = message
+                count += 1
+
+        if last is None:
+            return
+        self._unacked -= count
+        try:
+            await last.ack(multiple=True)
+            self.acked += count
+            self.ack_frames += 1
+        except Exception as e:
+            print(f"Batched ack failed, the broker will redeliver: {e}")
+
+    def reset(self):
+        self._outstanding.clear()
+        self._finished.clear()
+        self._unacked = 0
+        self._last_tag = 0
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._outstanding),
+            "acked": self.acked,
+            "ack_frames": self.ack_frames,
+        }
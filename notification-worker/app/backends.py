@@ -0,0 +1,72 @@
+import asyncio
+import importlib
+import random
+from abc import ABC, abstractmethod
+from .models import NotificationMessage
+
+
+class TransientDeliveryError(Exception):
+    """The provider could not take the message right now; it may be retried."""
+
+
+class PermanentDeliveryError(Exception):
+    """The provider rejected the message; retrying it cannot succeed."""
+
+
+class DeliveryBackend(ABC):
+    """
+    Sends one notification through a provider (SMTP, Mailgun, FCM, ...).
+    Implementations return once the provider has accepted the message and
+    raise TransientDeliveryError or PermanentDeliveryError otherwise. One
+    instance serves all concurrent sends, so it should share its clients.
+    """
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @abstractmethod
+    async def send(self, message: NotificationMessage):
+        ...
+
+
+class StubBackend(DeliveryBackend):
+    """
+    Local backend for tests and load runs: waits `latency_ms` per send and
+    fails a `failure_rate` share of them, without talking to a provider.
+    """
+
+    def __init__(self, latency_ms: float = 20.0, failure_rate: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.failure_rate = failure_rate
+        self.sent: list[NotificationMessage] = []
+
+    async def send(self, message: NotificationMessage):
+        await asyncio.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            raise TransientDeliveryError("Stub provider failure")
+        self.sent.append(message)
+
+
+BACKENDS: dict[str, type[DeliveryBackend]] = {
+    "stub": StubBackend,
+}
+
+
+def load_backend(name: str, **kwargs) -> DeliveryBackend:
+    """
+    Builds a backend from a registered name or from a
+    "package.module:ClassName" path, passing `kwargs` to its constructor.
+    """
+    if name in BACKENDS:
+        return BACKENDS[name](**kwargs)
+
+    module_name, _, class_name = name.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown delivery backend: {name}")
+    backend_class = getattr(importlib.import_module(module_name), class_name)
+    if not issubclass(backend_class, DeliveryBackend):
+        raise TypeError(f"{name} is not a DeliveryBackend")
+    return backend_class(**kwargs)
@@ -0,0 +1,41 @@
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Optional
+
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file='../../.env', env_file_encoding='utf-8', extra='ignore')
+
+    RABBITMQ_HOST: str = "rabbitmq"
+    RABBITMQ_DEFAULT_USER: str = "guest"
+    RABBITMQ_DEFAULT_PASS: str = "guest"
+    AMQP_CONNECT_MAX_RETRIES: int = 10
+    AMQP_RECONNECT_BACKOFF: float = 1.0
+    AMQP_RECONNECT_BACKOFF_MAX: float = 30.0
+
+    # Queues this replica consumes from; run one replica per queue to scale
+    # email and push independently.
+    WORKER_QUEUES: list[str] = ["email.queue", "push.queue"]
+    # Messages the broker may hand over unacknowledged, per queue. Keep it
+    # above WORKER_CONCURRENCY so the next message is already local when a
+    # send finishes, and above WORKER_ACK_BATCH_SIZE so acks can batch.
+    WORKER_PREFETCH: int = 200
+    WORKER_CONCURRENCY: int = 50
+    WORKER_ACK_BATCH_SIZE: int = 50
+    WORKER_ACK_MAX_LATENCY_MS: float = 100.0
+    # Retry tiers (seconds) for transient failures. The worker declares a
+    # TTL queue for each, as the gateway does for its AMQP_RETRY_DELAYS.
+    # After the last tier the message is parked in failed.queue.
+    AMQP_RETRY_DELAYS: list[int] = [5, 30, 300]
+
+    # "stub" or a "package.module:ClassName" implementing DeliveryBackend.
+    WORKER_BACKEND: str = "stub"
+    STUB_LATENCY_MS: float = 20.0
+    STUB_FAILURE_RATE: float = 0.0
+
+    GATEWAY_URL: str = "http://api-gateway:8000"
+    INTERNAL_SERVICE_TOKEN: Optional[str] = None
+    STATUS_REPORT_MAX_LATENCY_MS: float = 200.0
+    STATUS_REPORT_BATCH_SIZE: int = 500
+    STATUS_REPORT_QUEUE_DEPTH: int = 20000
+    STATUS_REPORT_MAX_RETRIES: int = 3
+
+settings = Settings()
@@ -0,0 +1,67 @@
+from fastapi import FastAPI, Response, status
+from contextlib import asynccontextmanager
+import httpx
+from .backends import load_backend
+from .config import settings
+from .status_reporter import build_status_reporter
+from .worker import NotificationWorker
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Starts the status reporter, the delivery backend and the consumer, and
+    stops them in reverse order so in-flight sends are acked and reported.
+    """
+    print("Notification worker starting...")
+
+    client = httpx.AsyncClient(timeout=10.0)
+    reporter = build_status_reporter(client)
+
+    backend_options = {}
+    if settings.WORKER_BACKEND == "stub":
+        backend_options = {"latency_ms": settings.STUB_LATENCY_MS, "failure_rate": settings.STUB_FAILURE_RATE}
+    backend = load_backend(settings.WORKER_BACKEND, **backend_options)
+
+    worker = NotificationWorker(
+        backend,
+        reporter,
+        queues=settings.WORKER_QUEUES,
+        prefetch=settings.WORKER_PREFETCH,
+        concurrency=settings.WORKER_CONCURRENCY,
+        ack_batch_size=settings.WORKER_ACK_BATCH_SIZE,
+        ack_max_latency_ms=settings.WORKER_ACK_MAX_LATENCY_MS,
+        retry_delays=settings.AMQP_RETRY_DELAYS
+    )
+    app.state.worker = worker
+    app.state.reporter = reporter
+
+    await reporter.start()
+    await backend.start()
+    await worker.start()
+
+    yield
+
+    print("Notification worker shutting down...")
+    await worker.stop()
+    await backend.close()
+    await reporter.stop()
+    await client.aclose()
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.get("/health", tags=["Monitoring"])
+async def get_health(response: Response):
+    if not app.state.worker.is_connected:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "disconnected"}
+    return {"status": "ok"}
+
+
+@app.get("/metrics", tags=["Monitoring"])
+async def get_metrics():
+    return {
+        "worker": app.state.worker.stats(),
+        "status_reporter": app.state.reporter.stats(),
+    }
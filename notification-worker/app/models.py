@@ -0,0 +1,39 @@
+import uuid
+import enum
+from pydantic import BaseModel
+from typing import Optional, Dict, Any
+
+
+class NotificationType(str, enum.Enum):
+    email = "email"
+    push = "push"
+
+
+class NotificationStatus(str, enum.Enum):
+    delivered = "delivered"
+    pending = "pending"
+    failed = "failed"
+
+
+class UserData(BaseModel):
+    name: str
+    link: str
+    meta: Optional[Dict[str, Any]] = None
+
+
+class NotificationMessage(BaseModel):
+    """The payload published by the gateway (docs/message_schemas.json)."""
+    notification_type: NotificationType
+    user_id: uuid.UUID
+    template_code: str
+    variables: UserData
+    request_id: uuid.UUID
+    priority: int
+    metadata: Optional[Dict[str, Any]] = None
+
+
+class StatusReport(BaseModel):
+    """One entry of the gateway's /api/v1/{type}/status/batch webhook body."""
+    notification_id: uuid.UUID
+    status: NotificationStatus
+    error: Optional[str] = None
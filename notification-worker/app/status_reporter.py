@@ -0,0 +1,175 @@
+import asyncio
+import time
+import uuid
+from typing import Optional
+import httpx
+from .config import settings
+from .models import NotificationType, NotificationStatus, StatusReport
+
+
+class StatusReporter:
+    """
+    Reports delivery outcomes to the gateway's batch status webhooks.
+
+    `report` only queues the outcome, so acknowledging a message never
+    waits on the gateway. Reports are flushed when `max_batch_size` are
+    waiting or the oldest has waited `max_latency_ms`, as one POST per
+    notification type. A failed POST is retried with backoff up to
+    `max_retries` times; after that the batch is dropped and counted.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        gateway_url: str,
+        service_token: Optional[str] = None,
+        max_latency_ms: float = 200.0,
+        max_batch_size: int = 500,
+        max_queue_depth: int = 20000,
+        max_retries: int = 3
+    ):
+        self.client = client
+        self.gateway_url = gateway_url.rstrip("/")
+        self.headers = {"X-Service-Token": service_token} if service_token else {}
+        self.max_latency = max_latency_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.max_queue_depth = max_queue_depth
+        self.max_retries = max_retries
+
+        self._queue: asyncio.Queue[tuple[NotificationType, StatusReport]] = asyncio.Queue(maxsize=max_queue_depth)
+        self._task: Optional[asyncio.Task] = None
+        self._flushing: Optional[asyncio.Task] = None
+
+        self.reported = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_flush_ms = 0.0
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            print("Status reporter started.")
+
+    async def stop(self):
+        """
+        Stops the flush loop, lets the batch being posted finish and reports
+        what is still queued.
+        """
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flushing:
+            await self._flushing
+            self._flushing = None
+
+        while not self._queue.empty():
+            await self._flush(self._drain(self.max_batch_size))
+        print("Status reporter stopped.")
+
+    def report(
+        self,
+        notification_type: NotificationType,
+        request_id: uuid.UUID,
+        new_status: NotificationStatus,
+        error: Optional[str] = None
+    ):
+        """Queues one outcome for the next flush. Drops it if the queue is full."""
+        try:
+            self._queue.put_nowait((notification_type, StatusReport(notification_id=request_id, status=new_status, error=error)))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "reported": self.reported,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+    def _drain(self, limit: int) -> list[tuple[NotificationType, StatusReport]]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_latency
+
+            try:
+                while len(batch) < self.max_batch_size:
+                    batch.extend(self._drain(self.max_batch_size - len(batch)))
+                    timeout = deadline - loop.time()
+                    if len(batch) >= self.max_batch_size or timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # Stopped while collecting: these are already off the queue.
+                self._flushing = asyncio.create_task(self._flush(batch))
+                raise
+
+            # Shielded so stop() cannot abandon a batch mid-POST; it
+            # waits for self._flushing instead.
+            self._flushing = asyncio.create_task(self._flush(batch))
+            await asyncio.shield(self._flushing)
+            self._flushing = None
+
+    async def _flush(self, batch: list[tuple[NotificationType, StatusReport]]):
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        by_type: dict[NotificationType, list[StatusReport]] = {}
+        for notification_type, report in batch:
+            by_type.setdefault(notification_type, []).append(report)
+
+        for notification_type, reports in by_type.items():
+            if await self._post(notification_type, reports):
+                self.reported += len(reports)
+            else:
+                self.failed += len(reports)
+
+        self.batches += 1
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+
+    async def _post(self, notification_type: NotificationType, reports: list[StatusReport]) -> bool:
+        url = f"{self.gateway_url}/api/v1/{notification_type.value}/status/batch"
+        body = [report.model_dump(mode="json") for report in reports]
+        delay = 0.5
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                response = await self.client.post(url, json=body, headers=self.headers)
+                response.raise_for_status()
+                return True
+            except httpx.HTTPError as e:
+                print(f"Status report to {url} failed (attempt {attempt}/{self.max_retries}): {e}")
+                if attempt < self.max_retries:
+                    await asyncio.sleep(delay)
+                    delay *= 2
+        return False
+
+
+def build_status_reporter(client: httpx.AsyncClient) -> StatusReporter:
+    return StatusReporter(
+        client,
+        settings.GATEWAY_URL,
+        service_token=settings.INTERNAL_SERVICE_TOKEN,
+        max_latency_ms=settings.STATUS_REPORT_MAX_LATENCY_MS,
+        max_batch_size=settings.STATUS_REPORT_BATCH_SIZE,
+        max_queue_depth=settings.STATUS_REPORT_QUEUE_DEPTH,
+        max_retries=settings.STATUS_REPORT_MAX_RETRIES
+    )
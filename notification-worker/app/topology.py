@@ -0,0 +1,28 @@
+# Names of the broker topology the gateway declares (api-gateway/app/amqp_client.py).
+# The worker consumes from it and also declares the retry tiers it publishes
+# to, with the same arguments, so a retry never depends on the gateway's
+# AMQP_RETRY_DELAYS matching its own.
+
+EXCHANGE_NAME = 'notifications.direct'
+
+RETRY_COUNT_HEADER = 'x-retry-count'
+
+# Routing key of each work queue, which retried messages are sent back with.
+ROUTING_KEYS = {
+    'email.queue': 'email',
+    'push.queue': 'push',
+}
+
+
+def retry_queue_name(routing_key: str, delay_seconds: int) -> str:
+    """The TTL queue that redelivers a message to `routing_key` after `delay_seconds`."""
+    return f"{routing_key}.retry.{delay_seconds}s"
+
+
+def retry_queue_arguments(routing_key: str, delay_seconds: int) -> dict:
+    """Arguments of a retry tier: expire after the delay, then dead-letter back to `routing_key`."""
+    return {
+        "x-message-ttl": delay_seconds * 1000,
+        "x-dead-letter-exchange": EXCHANGE_NAME,
+        "x-dead-letter-routing-key": routing_key
+    }
@@ -0,0 +1,289 @@
+import asyncio
+from typing import Optional
+import aio_pika
+from aio_pika.abc import AbstractRobustConnection, AbstractChannel, AbstractExchange, AbstractIncomingMessage, AbstractQueue
+from aio_pika.exceptions import AMQPConnectionError, ChannelNotFoundEntity, ChannelPreconditionFailed
+from pydantic import ValidationError
+from .acks import AckBatcher
+from .backends import DeliveryBackend, TransientDeliveryError, PermanentDeliveryError
+from .config import settings
+from .models import NotificationMessage, NotificationStatus
+from .status_reporter import StatusReporter
+from .topology import EXCHANGE_NAME, RETRY_COUNT_HEADER, ROUTING_KEYS, retry_queue_name, retry_queue_arguments
+
+
+class NotificationWorker:
+    """
+    Consumes email.queue/push.queue and hands each message to a delivery
+    backend.
+
+    Every queue gets its own channel with a `prefetch` window, so the next
+    messages are already local when a send finishes; at most `concurrency`
+    sends run at once across all queues. Successful deliveries are acked
+    in batches (see AckBatcher) and every outcome is reported to the
+    gateway through the StatusReporter. Scale out by running more replicas:
+    the broker spreads deliveries across all consumers of a queue.
+
+    A transient failure moves the message to the next retry tier (a TTL
+    queue that redelivers it after `retry_delays[n]` seconds) instead of
+    requeueing it at the head of the queue; once the tiers are exhausted,
+    or on a permanent failure, it is rejected and dead-lettered to
+    failed.queue.
+    """
+
+    def __init__(
+        self,
+        backend: DeliveryBackend,
+        reporter: StatusReporter,
+        queues: list[str],
+        prefetch: int = 200,
+        concurrency: int = 50,
+        ack_batch_size: int = 50,
+        ack_max_latency_ms: float = 100.0,
+        retry_delays: Optional[list[int]] = None
+    ):
+        self.backend = backend
+        self.reporter = reporter
+        self.queues = queues
+        self.prefetch = prefetch
+        self.concurrency = concurrency
+        self.ack_batch_size = ack_batch_size
+        self.ack_interval = ack_max_latency_ms / 1000
+        self.retry_delays = retry_delays if retry_delays is not None else [5, 30, 300]
+
+        self.connection: Optional[AbstractRobustConnection] = None
+        self.channels: list[AbstractChannel] = []
+        self.consumers: list[tuple[AbstractQueue, str]] = []
+        self.ackers: dict[str, AckBatcher] = {}
+        self.retry_exchange: Optional[AbstractExchange] = None
+
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._tasks: set[asyncio.Task] = set()
+        self._ack_task: Optional[asyncio.Task] = None
+
+        self.delivered = 0
+        self.failed = 0
+        self.retried = 0
+        self.invalid = 0
+        self.in_flight = 0
+
+    @property
+    def is_connected(self) -> bool:
+        return self.connection is not None and not self.connection.is_closed
+
+    async def start(self):
+        await self._connect()
+        await self._declare_retry_queues()
+        # Retries go through the default exchange straight to a tier queue;
+        # confirms make sure a retry is stored before its original is acked,
+        # and an unroutable retry (no such tier) raises instead of being
+        # confirmed and dropped, so the original is requeued.
+        retry_channel = await self.connection.channel(publisher_confirms=True, on_return_raises=True) # type: ignore
+        self.channels.append(retry_channel)
+        self.retry_exchange = retry_channel.default_exchange
+        for queue_name in self.queues:
+            await self._consume(queue_name)
+        self._ack_task = asyncio.create_task(self._flush_acks_periodically())
+
+    async def _declare_retry_queues(self):
+        """
+        Declares the retry tiers of every consumed queue with the gateway's
+        arguments. A tier that already exists with other arguments is left
+        as it is, as the gateway does.
+        """
+        for queue_name in self.queues:
+            routing_key = ROUTING_KEYS.get(queue_name)
+            if routing_key is None:
+                continue
+            for delay in self.retry_delays:
+                tier = retry_queue_name(routing_key, delay)
+                # A failed declaration closes its channel, so each gets its own.
+                channel = await self.connection.channel() # type: ignore
+                try:
+                    await channel.declare_exchange(EXCHANGE_NAME, aio_pika.ExchangeType.DIRECT, durable=True)
+                    await channel.declare_queue(tier, durable=True, arguments=retry_queue_arguments(routing_key, delay))
+                except ChannelPreconditionFailed as e:
+                    print(f"WARNING: {tier} exists with other arguments and was left as it is: {e}")
+                finally:
+                    if not channel.is_closed:
+                        await channel.close()
+
+    async def _consume(self, queue_name: str):
+        """
+        Starts consuming one queue on its own channel. The gateway declares
+        the queues, so this waits (with backoff) until the queue exists.
+        """
+        delay = settings.AMQP_RECONNECT_BACKOFF
+        for attempt in range(1, settings.AMQP_CONNECT_MAX_RETRIES + 1):
+            channel = await self.connection.channel() # type: ignore
+            try:
+                await channel.set_qos(prefetch_count=self.prefetch)
+                queue = await channel.get_queue(queue_name, ensure=True)
+                break
+            except ChannelNotFoundEntity:
+                print(f"{queue_name} does not exist yet (attempt {attempt}/{settings.AMQP_CONNECT_MAX_RETRIES}).")
+                if attempt == settings.AMQP_CONNECT_MAX_RETRIES:
+                    raise
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, settings.AMQP_RECONNECT_BACKOFF_MAX)
+
+        acker = AckBatcher(self.ack_batch_size)
+        self.ackers[queue_name] = acker
+        consumer_tag = await queue.consume(lambda message: self._on_message(message, acker))
+        self.channels.append(channel)
+        self.consumers.append((queue, consumer_tag))
+        print(f"Consuming {queue_name} (prefetch={self.prefetch}, concurrency={self.concurrency}).")
+
+    async def _connect(self):
+        delay = settings.AMQP_RECONNECT_BACKOFF
+        for attempt in range(1, settings.AMQP_CONNECT_MAX_RETRIES + 1):
+            try:
+                self.connection = await aio_pika.connect_robust(
+                    host=settings.RABBITMQ_HOST,
+                    login=settings.RABBITMQ_DEFAULT_USER,
+                    password=settings.RABBITMQ_DEFAULT_PASS,
+                    reconnect_interval=settings.AMQP_RECONNECT_BACKOFF
+                )
+                return
+            except (AMQPConnectionError, OSError) as e:
+                print(f"Failed to connect to RabbitMQ (attempt {attempt}/{settings.AMQP_CONNECT_MAX_RETRIES}): {e}")
+                if attempt == settings.AMQP_CONNECT_MAX_RETRIES:
+                    raise
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, settings.AMQP_RECONNECT_BACKOFF_MAX)
+
+    async def stop(self):
+        """Stops consuming, lets in-flight sends finish and acks them."""
+        for queue, consumer_tag in self.consumers:
+            await queue.cancel(consumer_tag)
+        self.consumers = []
+
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._ack_task:
+            self._ack_task.cancel()
+            try:
+                await self._ack_task
+            except asyncio.CancelledError:
+                pass
+            self._ack_task = None
+        for acker in self.ackers.values():
+            await acker.flush()
+
+        for channel in self.channels:
+            await channel.close()
+        self.channels = []
+        if self.connection and not self.connection.is_closed:
+            await self.connection.close()
+        print("Notification worker stopped.")
+
+    async def _on_message(self, message: AbstractIncomingMessage, acker: AckBatcher):
+        # Deliveries arrive in tag order; the send itself runs in its own task
+        # so the consumer callback returns straight away.
+        acker.track(message)
+        task = asyncio.create_task(self.handle(message, acker))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def handle(self, message: AbstractIncomingMessage, acker: AckBatcher):
+        try:
+            notification = NotificationMessage.model_validate_json(message.body)
+        except ValidationError as e:
+            print(f"Rejecting malformed message {message.message_id}: {e}")
+            self.invalid += 1
+            await message.reject(requeue=False)
+            acker.settled(message)
+            return
+
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                await self.backend.send(notification)
+            except TransientDeliveryError as e:
+                await self._retry_later(message, notification, acker, str(e))
+                return
+            except Exception as e:
+                # Provider rejections and unexpected errors are not retried.
+                reason = str(e) if isinstance(e, PermanentDeliveryError) else f"Unexpected delivery error: {e}"
+                await self._park(message, notification, acker, reason)
+                return
+            finally:
+                self.in_flight -= 1
+
+        self.delivered += 1
+        self.reporter.report(notification.notification_type, notification.request_id, NotificationStatus.delivered)
+        await acker.ack(message)
+
+    async def _retry_later(
+        self,
+        message: AbstractIncomingMessage,
+        notification: NotificationMessage,
+        acker: AckBatcher,
+        reason: str
+    ):
+        """Republishes the message to its next retry tier, or parks it when none is left."""
+        attempt = int((message.headers or {}).get(RETRY_COUNT_HEADER, 0))
+        if attempt >= len(self.retry_delays):
+            await self._park(message, notification, acker, f"Gave up after {attempt} retries: {reason}")
+            return
+
+        delay = self.retry_delays[attempt]
+        # x-death grows with every pass through a TTL queue; the count is ours.
+        headers = {key: value for key, value in (message.headers or {}).items() if key != "x-death"}
+        headers[RETRY_COUNT_HEADER] = attempt + 1
+        try:
+            await self.retry_exchange.publish( # type: ignore
+                aio_pika.Message(
+                    body=message.body,
+                    headers=headers,
+                    content_type=message.content_type,
+                    message_id=message.message_id,
+                    priority=message.priority,
+                    delivery_mode=aio_pika.DeliveryMode.PERSISTENT
+                ),
+                routing_key=retry_queue_name(notification.notification_type.value, delay)
+            )
+        except Exception as e:
+            print(f"Could not schedule a retry for {notification.request_id}, requeueing: {e}")
+            await message.nack(requeue=True)
+            acker.settled(message)
+            return
+
+        print(f"Delivery of {notification.request_id} failed, retry {attempt + 1} in {delay}s: {reason}")
+        self.retried += 1
+        await acker.ack(message)
+
+    async def _park(
+        self,
+        message: AbstractIncomingMessage,
+        notification: NotificationMessage,
+        acker: AckBatcher,
+        reason: str
+    ):
+        """Reports the notification as failed and dead-letters it to failed.queue."""
+        print(f"Delivery of {notification.request_id} failed permanently: {reason}")
+        self.failed += 1
+        self.reporter.report(notification.notification_type, notification.request_id, NotificationStatus.failed, reason)
+        await message.reject(requeue=False)
+        acker.settled(message)
+
+    async def _flush_acks_periodically(self):
+        while True:
+            await asyncio.sleep(self.ack_interval)
+            for acker in self.ackers.values():
+                await acker.flush()
+
+    def stats(self) -> dict:
+        return {
+            "connected": self.is_connected,
+            "queues": self.queues,
+            "prefetch": self.prefetch,
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "retried": self.retried,
+            "retry_delays": self.retry_delays,
+            "invalid": self.invalid,
+            "acks": {queue: acker.stats() for queue, acker in self.ackers.items()},
+        }
@@ -0,0 +1,59 @@
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.acks import AckBatcher
+
+
+def make_message(tag):
+    message = MagicMock(delivery_tag=tag)
+    message.ack = AsyncMock()
+    return message
+
+
+@pytest.mark.asyncio
+async def test_multiple_ack_stops_at_the_oldest_unfinished_delivery():
+    acker = AckBatcher(batch_size=100)
+    messages = [make_message(tag) for tag in range(1, 6)]
+    for message in messages:
+        acker.track(message)
+
+    await acker.ack(messages[0])
+    acker.settled(messages[1])
+    await acker.ack(messages[3])
+    await acker.flush()
+
+    messages[0].ack.assert_awaited_once_with(multiple=True)
+    messages[3].ack.assert_not_awaited()
+
+    await acker.ack(messages[2])
+    await acker.ack(messages[4])
+    await acker.flush()
+
+    messages[4].ack.assert_awaited_once_with(multiple=True)
+    assert acker.stats() == {"in_flight": 0, "acked": 4, "ack_frames": 2}
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_acked_without_waiting_for_the_timer():
+    acker = AckBatcher(batch_size=2)
+    first, second = make_message(1), make_message(2)
+    acker.track(first)
+    acker.track(second)
+
+    await acker.ack(first)
+    first.ack.assert_not_awaited()
+    await acker.ack(second)
+
+    second.ack.assert_awaited_once_with(multiple=True)
+
+
+def test_reopened_channel_resets_tracking():
+    acker = AckBatcher()
+    acker.track(make_message(7))
+    acker.track(make_message(1))
+
+    assert acker.stats()["in_flight"] == 1
@@ -0,0 +1,88 @@
+import asyncio
+import uuid
+import httpx
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.status_reporter import StatusReporter
+from app.models import NotificationType, NotificationStatus
+
+
+def make_client(*responses):
+    client = MagicMock()
+    client.post = AsyncMock(side_effect=list(responses))
+    return client
+
+
+def ok():
+    return httpx.Response(200, request=httpx.Request("POST", "http://gateway"))
+
+
+@pytest.mark.asyncio
+async def test_reports_are_batched_into_one_post_per_type():
+    client = make_client(ok(), ok())
+    reporter = StatusReporter(client, "http://gateway/", service_token="secret", max_latency_ms=5)
+    await reporter.start()
+
+    delivered, failed, pushed = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    reporter.report(NotificationType.email, delivered, NotificationStatus.delivered)
+    reporter.report(NotificationType.email, failed, NotificationStatus.failed, "bounced")
+    reporter.report(NotificationType.push, pushed, NotificationStatus.delivered)
+    await asyncio.sleep(0.05)
+    await reporter.stop()
+
+    assert client.post.await_count == 2
+    email_call = client.post.call_args_list[0]
+    assert email_call.args[0] == "http://gateway/api/v1/email/status/batch"
+    assert email_call.kwargs["json"] == [
+        {"notification_id": str(delivered), "status": "delivered", "error": None},
+        {"notification_id": str(failed), "status": "failed", "error": "bounced"}
+    ]
+    assert email_call.kwargs["headers"] == {"X-Service-Token": "secret"}
+    assert client.post.call_args_list[1].args[0] == "http://gateway/api/v1/push/status/batch"
+    assert reporter.stats()["reported"] == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_post_is_retried(monkeypatch):
+    monkeypatch.setattr("app.status_reporter.asyncio.sleep", AsyncMock())
+    client = make_client(httpx.ConnectError("down"), ok())
+    reporter = StatusReporter(client, "http://gateway", max_retries=2)
+
+    reporter.report(NotificationType.push, uuid.uuid4(), NotificationStatus.delivered)
+    await reporter.stop()
+
+    assert client.post.await_count == 2
+    assert (reporter.stats()["reported"], reporter.stats()["failed"]) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_stop_during_a_slow_post_reports_every_outcome():
+    release = asyncio.Event()
+
+    async def post(url, json, headers):
+        await release.wait()
+        return ok()
+
+    client = MagicMock()
+    client.post = AsyncMock(side_effect=post)
+    reporter = StatusReporter(client, "http://gateway", max_latency_ms=1, max_batch_size=2)
+    await reporter.start()
+
+    for _ in range(2):
+        reporter.report(NotificationType.email, uuid.uuid4(), NotificationStatus.delivered)
+    # The first two are being posted; the third is still queued.
+    await asyncio.sleep(0.05)
+    reporter.report(NotificationType.email, uuid.uuid4(), NotificationStatus.delivered)
+
+    stopping = asyncio.create_task(reporter.stop())
+    await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.wait_for(stopping, timeout=1)
+
+    assert sum(len(call.kwargs["json"]) for call in client.post.call_args_list) == 3
+    assert reporter.stats()["reported"] == 3
@@ -0,0 +1,161 @@
+import json
+import uuid
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.worker import NotificationWorker
+from app.acks import AckBatcher
+from app.backends import StubBackend, PermanentDeliveryError, TransientDeliveryError, load_backend
+from app.models import NotificationType, NotificationStatus
+
+
+def make_message(tag=1, headers=None, **overrides):
+    payload = {
+        "notification_type": "email",
+        "user_id": "c4b4b4b4-b4b4-4b4b-b4b4-c4b4b4b4b4b4",
+        "template_code": "welcome_email",
+        "variables": {"name": "Peter", "link": "http://example.com/verify"},
+        "request_id": str(uuid.uuid4()),
+        "priority": 1,
+        **overrides
+    }
+    message = MagicMock(
+        delivery_tag=tag,
+        body=json.dumps(payload).encode(),
+        headers=headers or {},
+        content_type="application/json",
+        message_id=payload["request_id"],
+        priority=1
+    )
+    message.ack = AsyncMock()
+    message.nack = AsyncMock()
+    message.reject = AsyncMock()
+    return message, payload
+
+
+def make_worker(backend):
+    reporter = MagicMock()
+    worker = NotificationWorker(backend, reporter, queues=["email.queue"], ack_batch_size=1, retry_delays=[5, 30])
+    worker.retry_exchange = MagicMock()
+    worker.retry_exchange.publish = AsyncMock()
+    return worker, reporter
+
+
+@pytest.mark.asyncio
+async def test_delivered_message_is_reported_and_acked():
+    backend = StubBackend(latency_ms=0)
+    worker, reporter = make_worker(backend)
+    acker = AckBatcher(batch_size=1)
+    message, payload = make_message()
+    acker.track(message)
+
+    await worker.handle(message, acker)
+
+    assert len(backend.sent) == 1
+    reporter.report.assert_called_once_with(NotificationType.email, uuid.UUID(payload["request_id"]), NotificationStatus.delivered)
+    message.ack.assert_awaited_once_with(multiple=True)
+
+
+@pytest.mark.asyncio
+async def test_failures_are_rejected_or_retried():
+    backend = MagicMock()
+    backend.send = AsyncMock(side_effect=[PermanentDeliveryError("invalid address"), TransientDeliveryError("timeout")])
+    worker, reporter = make_worker(backend)
+    acker = AckBatcher()
+    rejected, _ = make_message(1)
+    retried, _ = make_message(2, headers={"x-retry-count": 1, "x-death": [{"count": 1}]})
+    malformed = MagicMock(delivery_tag=3, body=b'{"notification_type": "fax"}')
+    malformed.reject = AsyncMock()
+
+    await worker.handle(rejected, acker)
+    await worker.handle(retried, acker)
+    await worker.handle(malformed, acker)
+
+    rejected.reject.assert_awaited_once_with(requeue=False)
+    assert reporter.report.call_args.args[2:] == (NotificationStatus.failed, "invalid address")
+    published, kwargs = worker.retry_exchange.publish.call_args
+    assert kwargs["routing_key"] == "email.retry.30s"
+    assert published[0].headers == {"x-retry-count": 2}
+    assert published[0].body == retried.body
+    retried.nack.assert_not_awaited()
+    malformed.reject.assert_awaited_once_with(requeue=False)
+    assert reporter.report.call_count == 1
+    assert (worker.failed, worker.retried, worker.invalid) == (1, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_exhausted_retries_are_dead_lettered():
+    backend = MagicMock()
+    backend.send = AsyncMock(side_effect=TransientDeliveryError("timeout"))
+    worker, reporter = make_worker(backend)
+    acker = AckBatcher()
+    message, payload = make_message(1, headers={"x-retry-count": 2})
+    acker.track(message)
+
+    await worker.handle(message, acker)
+
+    worker.retry_exchange.publish.assert_not_awaited()
+    message.reject.assert_awaited_once_with(requeue=False)
+    reporter.report.assert_called_once_with(
+        NotificationType.email, uuid.UUID(payload["request_id"]), NotificationStatus.failed, "Gave up after 2 retries: timeout"
+    )
+    assert (worker.failed, worker.retried) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_retry_publish_failure_requeues():
+    backend = MagicMock()
+    backend.send = AsyncMock(side_effect=TransientDeliveryError("timeout"))
+    worker, reporter = make_worker(backend)
+    worker.retry_exchange.publish.side_effect = ConnectionError("channel closed")
+    acker = AckBatcher()
+    message, _ = make_message(1)
+    acker.track(message)
+
+    await worker.handle(message, acker)
+
+    message.nack.assert_awaited_once_with(requeue=True)
+    reporter.report.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_start_declares_retry_tiers_and_returns_unroutable_retries():
+    worker, _ = make_worker(StubBackend(latency_ms=0))
+    channels = []
+
+    async def open_channel(**kwargs):
+        channel = MagicMock(is_closed=False)
+        channel.declare_exchange = AsyncMock()
+        channel.declare_queue = AsyncMock()
+        channel.close = AsyncMock()
+        channels.append((kwargs, channel))
+        return channel
+
+    worker.connection = MagicMock()
+    worker.connection.channel = AsyncMock(side_effect=open_channel)
+    worker._connect = AsyncMock()
+    worker._consume = AsyncMock()
+
+    await worker.start()
+    worker._ack_task.cancel()
+
+    declared = {
+        channel.declare_queue.call_args.args[0]: channel.declare_queue.call_args.kwargs["arguments"]
+        for _, channel in channels[:-1]
+    }
+    assert declared == {
+        "email.retry.5s": {"x-message-ttl": 5000, "x-dead-letter-exchange": "notifications.direct", "x-dead-letter-routing-key": "email"},
+        "email.retry.30s": {"x-message-ttl": 30000, "x-dead-letter-exchange": "notifications.direct", "x-dead-letter-routing-key": "email"},
+    }
+    assert channels[-1][0] == {"publisher_confirms": True, "on_return_raises": True}
+
+
+def test_backends_load_by_name_or_path():
+    assert isinstance(load_backend("stub", latency_ms=0), StubBackend)
+    assert isinstance(load_backend("app.backends:StubBackend"), StubBackend)
+    with pytest.raises(ValueError):
+        load_backend("smtp")
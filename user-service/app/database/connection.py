@@ -1,7 +1,10 @@
 import os
+import json
 from dotenv import load_dotenv
 import asyncpg
 import logging
+from pydantic import BaseModel
+from app.schema.user import UserPreference
 
 load_dotenv()
 
@@ -15,10 +18,64 @@ DB_PORT = os.getenv("USER_DB_PORT")
 
 DATABASE_URL = f"postgres://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+DB_POOL_MIN_SIZE = int(os.getenv("USER_DB_POOL_MIN_SIZE", "5"))
+DB_POOL_MAX_SIZE = int(os.getenv("USER_DB_POOL_MAX_SIZE", "20"))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("USER_DB_STATEMENT_CACHE_SIZE", "100"))
+DB_MAX_INACTIVE_LIFETIME = float(os.getenv("USER_DB_MAX_INACTIVE_LIFETIME", "300"))
+
+pool: asyncpg.Pool | None = None
+
+
+def _encode_jsonb(value) -> str:
+    if isinstance(value, BaseModel):
+        return value.model_dump_json()
+    return json.dumps(value)
+
+
+async def init_connection(conn: asyncpg.Connection):
+    """
+    Runs on every new pool connection. `preferences` is the only JSONB
+    column, so JSONB values decode straight into UserPreference.
+    """
+    await conn.set_type_codec(
+        "jsonb",
+        schema="pg_catalog",
+        encoder=_encode_jsonb,
+        decoder=UserPreference.model_validate_json,
+        format="text",
+    )
+
+
+async def create_pool() -> asyncpg.Pool:
+    """Create the shared connection pool. Called once from the app lifespan."""
+    global pool
+    pool = await asyncpg.create_pool(
+        DATABASE_URL,
+        min_size=DB_POOL_MIN_SIZE,
+        max_size=DB_POOL_MAX_SIZE,
+        statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+        max_inactive_connection_lifetime=DB_MAX_INACTIVE_LIFETIME,
+        init=init_connection,
+    )
+    logger.info("Database pool created (min=%s, max=%s).", DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE)
+    return pool
+
+
+async def close_pool():
+    """Close the shared connection pool on shutdown."""
+    global pool
+    if pool is not None:
+        await pool.close()
+        pool = None
+
+
+def get_pool() -> asyncpg.Pool:
+    if pool is None:
+        raise RuntimeError("Database pool is not initialised")
+    return pool
+
+
 async def get_db():
-    """Async generator to provide a database connection."""
-    conn = await asyncpg.connect(DATABASE_URL)
-    try:
+    """Async generator to provide a pooled database connection."""
+    async with get_pool().acquire() as conn:
         yield conn
-    finally:
-        await conn.close()
\ No newline at end of file
@@ -15,9 +15,12 @@ DB_PORT = os.getenv("USER_DB_PORT")
 DATABASE_URL = f"postgres://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
 
-async def create_table():
-    """Create the necessary database table if it does not exist."""
-    conn = await asyncpg.connect(DATABASE_URL)
+async def create_table(pool: asyncpg.Pool | None = None):
+    """
+    Create the necessary database table if it does not exist.
+    Uses the app's pool when given one, otherwise a one-off connection.
+    """
+    conn = await pool.acquire() if pool else await asyncpg.connect(DATABASE_URL)
 
     try:
         await conn.execute("""
@@ -33,7 +36,10 @@ async def create_table():
         """)
 
     finally:
-        await conn.close()
+        if pool:
+            await pool.release(conn)
+        else:
+            await conn.close()
 
 
 if __name__ == "__main__":
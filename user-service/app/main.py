@@ -1,18 +1,55 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-import asyncpg
 from dotenv import load_dotenv
 
 from app.routes.user import user_router
-from app.database.db_schema import create_table, DATABASE_URL
+from app.database.db_schema import create_table
+from app.database.connection import create_pool, close_pool, get_pool
 from app.models.user import logger
+from app.services.cache import redis_client
+from app.services.password import password_hasher
+from app.services.auth import listen_for_token_revocations, token_cache
 
 load_dotenv()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create the DB pool and tables and start the token revocation listener
+    on startup; on shutdown stop the password hashing pool and release the
+    DB pool and the Redis connections used for cache invalidation.
+    """
+    try:
+        pool = await create_pool()
+        logger.info("Database connected successfully.")
+        await create_table(pool)
+        logger.info("Tables created or verified successfully.")
+    except Exception as e:
+        logger.error("Startup error: %s", e, exc_info=True)
+        raise
+
+    revocation_listener = asyncio.create_task(listen_for_token_revocations())
+
+    yield
+
+    revocation_listener.cancel()
+    try:
+        await revocation_listener
+    except asyncio.CancelledError:
+        pass
+    password_hasher.shutdown()
+    await close_pool()
+    await redis_client.aclose()
+
+
 app = FastAPI(
     title="User Service API",
     description="Handles user signup, authentication, and profile management.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -23,37 +60,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-db_connection: asyncpg.Connection | None = None
-
-
-@app.on_event("startup")
-async def startup_event():
-    """
-    Create DB connection and tables on app startup.
-    """
-    global db_connection
-    try:
-        db_connection = await asyncpg.connect(DATABASE_URL)
-        logger.info("Database connected successfully.")
-        await create_table()
-        logger.info("Tables created or verified successfully.")
-    except Exception as e:
-        logger.error("Startup error: %s", e, exc_info=True)
-        raise
-
 
 @app.get("/health", tags=["Health"])
 async def health_check():
     """
     Pings the database to ensure service is healthy.
     """
-    global db_connection
     try:
-        await db_connection.execute("SELECT 1;")
+        await get_pool().fetchval("SELECT 1;")
         return {"status": "ok"}
     except Exception as e:
         logger.error("Health check failed: %s", e, exc_info=True)
         return {"status": "unhealthy"}
 
 
+@app.get("/metrics/password-hashing", tags=["Monitoring"])
+async def password_hashing_metrics():
+    """
+    Worker pool usage and queue depth for bcrypt hashing/verification.
+    """
+    return password_hasher.stats()
+
+
+@app.get("/metrics/token-cache", tags=["Monitoring"])
+async def token_cache_metrics():
+    """
+    Hit rate and size of the verified-JWT cache.
+    """
+    return token_cache.stats()
+
+
 app.include_router(user_router)
@@ -1,13 +1,18 @@
 import asyncpg
-import json
 import uuid
 import logging
-import bcrypt
 from fastapi import HTTPException
 from app.schema.user import UserRequest, UserUpdate
+from app.services.password import password_hasher
+from app.database.connection import get_pool
 
 logger = logging.getLogger()
 
+# Explicit column lists: the constant query text keeps asyncpg's prepared
+# statement cache warm, and the password hash is only read where needed.
+USER_PROFILE_COLUMNS = "user_id, name, email, push_token, preferences, created_at"
+USER_PREFERENCE_COLUMNS = "user_id, email, push_token, preferences"
+
 
 async def create_user(conn: asyncpg.Connection, user: UserRequest):
     """
@@ -20,7 +25,7 @@ async def create_user(conn: asyncpg.Connection, user: UserRequest):
     """
     try:
         user_id = str(uuid.uuid4())
-        hashed = bcrypt.hashpw(user.password.encode(), bcrypt.gensalt()).decode()
+        hashed = await password_hasher.hash(user.password)
 
         query = """
             INSERT INTO users (user_id, name, email, push_token, preferences, password)
@@ -34,33 +39,74 @@ async def create_user(conn: asyncpg.Connection, user: UserRequest):
             user.name,
             user.email,
             user.push_token,
-            json.dumps(user.preferences.dict()),
+            user.preferences,
             hashed
         )
 
         return dict(details) if details else None
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("Exception occurred in create_user: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 
-async def get_user(conn: asyncpg.Connection, user_id: str=None, email: str=None):
+async def get_user_by_id(conn: asyncpg.Connection, user_id: str):
     """
-    this function gets the instance of the user from the db and returns it as a dict
+    this function gets a user's profile by primary key. The password hash
+    is not selected.
+
     :param conn: asyncpg.Connection
     :param user_id: str
     :return: user: Dict
     """
     try:
-        query = """
-            SELECT * FROM users WHERE user_id = $1 OR email = $2
-        """
-        user = await conn.fetchrow(query, user_id, email)
+        query = f"SELECT {USER_PROFILE_COLUMNS} FROM users WHERE user_id = $1"
+        user = await conn.fetchrow(query, user_id)
+
+        return dict(user) if user else None
+    except Exception as e:
+        logger.error("exception occurred in get user by id: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error") from e
+
+
+async def get_user_by_email(conn: asyncpg.Connection, email: str):
+    """
+    this function gets a user by email through the unique email index,
+    including the password hash, for signup checks and login.
+
+    :param conn: asyncpg.Connection
+    :param email: str
+    :return: user: Dict
+    """
+    try:
+        query = f"SELECT {USER_PROFILE_COLUMNS}, password FROM users WHERE email = $1"
+        user = await conn.fetchrow(query, email)
 
         return dict(user) if user else None
     except Exception as e:
-        logger.error("exception occurred in get user: %s", e, exc_info=True)
+        logger.error("exception occurred in get user by email: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error") from e
+
+
+async def get_user_preferences_by_ids(conn: asyncpg.Connection, user_ids: list[str]):
+    """
+    this function resolves many users in a single query, selecting only
+    what the gateway needs to route a notification: contact details and
+    preferences.
+
+    :param conn: asyncpg.Connection
+    :param user_ids: list[str]
+    :return: list[Dict]: users that exist, in no particular order
+    """
+    try:
+        query = f"SELECT {USER_PREFERENCE_COLUMNS} FROM users WHERE user_id = ANY($1::varchar[])"
+        rows = await conn.fetch(query, user_ids)
+
+        return [dict(row) for row in rows]
+    except Exception as e:
+        logger.error("exception occurred in get user preferences by ids: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 
@@ -87,10 +133,10 @@ async def update_user(conn: asyncpg.Connection, user_id: str, data: UserUpdate):
 
         if data.preferences:
             fields.append("preferences = ${}".format(len(values) + 1))
-            values.append(json.dumps(data.preferences.dict()))
+            values.append(data.preferences)
 
         if data.password:
-            hashed = bcrypt.hashpw(data.password.encode(), bcrypt.gensalt()).decode()
+            hashed = await password_hasher.hash(data.password)
             fields.append("password = ${}".format(len(values) + 1))
             values.append(hashed)
 
@@ -102,7 +148,7 @@ async def update_user(conn: asyncpg.Connection, user_id: str, data: UserUpdate):
             UPDATE users
             SET {', '.join(fields)}
             WHERE user_id = ${len(values)}
-            RETURNING user_id, name, email, push_token, preferences, created_at
+            RETURNING {USER_PROFILE_COLUMNS}
         """
 
         result = await conn.fetchrow(query, *values)
@@ -111,6 +157,34 @@ async def update_user(conn: asyncpg.Connection, user_id: str, data: UserUpdate):
         else:
             return None
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("Error updating user: %s", e)
-        raise HTTPException(status_code=500, detail="Internal server error") from e
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal server error") from e
+
+
+async def rehash_password(user_id: str, password: str, old_hash: str):
+    """
+    Re-hashes a password at the current BCRYPT_ROUNDS after a successful login.
+    Runs as a background task on its own pool connection, and only replaces
+    the hash if it has not changed in the meantime. Failures are logged: the
+    old hash keeps working.
+
+    :param user_id: str
+    :param password: str: the plaintext the user just logged in with
+    :param old_hash: str: the hash that password was verified against
+    """
+    try:
+        hashed = await password_hasher.hash(password)
+        async with get_pool().acquire() as conn:
+            result = await conn.execute(
+                "UPDATE users SET password = $1 WHERE user_id = $2 AND password = $3",
+                hashed,
+                user_id,
+                old_hash
+            )
+        if result == "UPDATE 1":
+            password_hasher.rehashed += 1
+    except Exception as e:
+        logger.error("Failed to rehash password for user %s: %s", user_id, e, exc_info=True)
\ No newline at end of file
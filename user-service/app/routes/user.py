@@ -1,18 +1,34 @@
-import json
 import asyncpg
-from fastapi import APIRouter, Depends, HTTPException, status
-import bcrypt
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
 import uuid  # Make sure this is imported
 
-from app.services.auth import get_current_user, generate_token
+from app.services.auth import (
+    get_current_user,
+    generate_token,
+    revoke_token,
+    security,
+    verify_service_token
+)
+from app.services.cache import invalidate_user_cache
+from app.services.password import password_hasher
 from app.database.connection import get_db
-from app.models.user import create_user, get_user, update_user, logger
+from app.models.user import (
+    create_user,
+    get_user_by_id,
+    get_user_by_email,
+    get_user_preferences_by_ids,
+    update_user,
+    rehash_password,
+    logger
+)
 from app.schema.user import (
     UserUpdate,
     UserResponse,
     UserLogin,
     UserRequest,
-    UserPreference,
+    UserPreferencesResponse,
+    UserBatchRequest,
     GenericResponse
 )
 
@@ -36,7 +52,7 @@ async def create_user_route(
                 detail="name, email, preferences, and password are required fields"
             )
 
-        existing = await get_user(conn, email=user.email)
+        existing = await get_user_by_email(conn, user.email)
         if existing:
             raise HTTPException(
                 status_code=400,
@@ -75,19 +91,19 @@ async def create_user_route(
 )
 async def login(
     user: UserLogin,
+    background_tasks: BackgroundTasks,
     conn: asyncpg.Connection = Depends(get_db)
 ):
     try:
-        existing = await get_user(conn, email=user.email)
+        existing = await get_user_by_email(conn, user.email)
         if not existing:
             raise HTTPException(status_code=404, detail="User not found")
 
-        if not bcrypt.checkpw(user.password.encode(), existing['password'].encode()):
+        if not await password_hasher.verify(user.password, existing['password']):
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
-        preferences_data = existing["preferences"]
-        if isinstance(preferences_data, str):
-            preferences_data = json.loads(preferences_data)
+        if password_hasher.needs_rehash(existing['password']):
+            background_tasks.add_task(rehash_password, existing['user_id'], user.password, existing['password'])
 
         return GenericResponse(
             success=True,
@@ -97,7 +113,7 @@ async def login(
                 name=existing['name'],
                 email=existing['email'],
                 push_token=existing['push_token'],
-                preferences=UserPreference(**preferences_data),
+                preferences=existing['preferences'],
                 access_token=generate_token({
                     "user_id": existing['user_id'],
                     "name": existing['name'],
@@ -116,6 +132,78 @@ async def login(
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 
+@user_router.post(
+    '/logout',
+    status_code=status.HTTP_200_OK,
+    description="Revoke the current access token on every replica.",
+    response_model_exclude_none=True
+)
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user=Depends(get_current_user)
+):
+    try:
+        await revoke_token(credentials.credentials)
+
+        return GenericResponse(
+            success=True,
+            message="User logged out successfully",
+            data=None,
+            error=None,
+            meta=None
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Exception in logout route: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error") from e
+
+
+@user_router.post(
+    '/batch',
+    status_code=status.HTTP_200_OK,
+    description="Resolve many users by ID in one query (internal, requires X-Service-Token).",
+    response_model_exclude_none=True,
+    dependencies=[Depends(verify_service_token)]
+)
+async def get_users_batch_route(
+    batch: UserBatchRequest,
+    conn: asyncpg.Connection = Depends(get_db)
+):
+    try:
+        user_ids = list(dict.fromkeys(batch.user_ids))
+        records = await get_user_preferences_by_ids(conn, user_ids)
+
+        users = [
+            UserPreferencesResponse(
+                user_id=record['user_id'],
+                email=record['email'],
+                push_token=record['push_token'] or "",
+                preferences=record['preferences']
+            ).model_dump(mode="json")
+            for record in records
+        ]
+
+        found = {user["user_id"] for user in users}
+        return GenericResponse(
+            success=True,
+            message="Users retrieved successfully",
+            data={
+                "users": users,
+                "missing": [user_id for user_id in user_ids if user_id not in found]
+            },
+            error=None,
+            meta=None
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Exception in get_users_batch_route: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error") from e
+
+
 @user_router.get(
     '/{user_id}',
     status_code=status.HTTP_200_OK,
@@ -136,16 +224,12 @@ async def get_user_route(
 
         # --- THIS IS THE FIX ---
         # We must pass a string to the database function, not a UUID object
-        user_record = await get_user(conn, user_id=str(user_id))
+        user_record = await get_user_by_id(conn, str(user_id))
         # -----------------------
         
         if not user_record:
             raise HTTPException(status_code=404, detail="User not found")
 
-        preferences_data = user_record["preferences"]
-        if isinstance(preferences_data, str):
-            preferences_data = json.loads(preferences_data)
-
         return GenericResponse(
             success=True,
             message="User retrieved successfully",
@@ -154,7 +238,7 @@ async def get_user_route(
                 name=user_record['name'],
                 email=user_record['email'],
                 push_token=user_record['push_token'],
-                preferences=UserPreference(**preferences_data),
+                preferences=user_record['preferences'],
                 created_at=user_record['created_at']
             ).model_dump(exclude_none=True),
             error=None,
@@ -196,9 +280,7 @@ async def update_user_route(
         if not user_record:
             raise HTTPException(status_code=404, detail="User not found")
 
-        preferences_data = user_record["preferences"]
-        if isinstance(preferences_data, str):
-            preferences_data = json.loads(preferences_data)
+        await invalidate_user_cache(str(user_id))
 
         return GenericResponse(
             success=True,
@@ -208,7 +290,7 @@ async def update_user_route(
                 name=user_record['name'],
                 email=user_record['email'],
                 push_token=user_record['push_token'],
-                preferences=UserPreference(**preferences_data),
+                preferences=user_record['preferences'],
                 created_at=user_record['created_at']
             ).model_dump(exclude_none=True),
             error=None,
@@ -1,6 +1,8 @@
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import BaseModel, EmailStr, ConfigDict, Field
+
+MAX_BATCH_LOOKUP = 5000
 
 
 class UserPreference(BaseModel):
@@ -29,6 +31,13 @@ class UserResponse(BaseModel):
     )
 
 
+class UserPreferencesResponse(BaseModel):
+    user_id: str
+    email: str
+    push_token: str
+    preferences: UserPreference
+
+
 class GenericResponse(BaseModel):
     success: bool
     message: str
@@ -51,3 +60,7 @@ class UserUpdate(BaseModel):
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
+
+
+class UserBatchRequest(BaseModel):
+    user_ids: list[str] = Field(min_length=1, max_length=MAX_BATCH_LOOKUP)
@@ -1,17 +1,35 @@
+import asyncio
 import datetime
+import hashlib
+import hmac
 import os
+import time
 import jwt
 from dotenv import load_dotenv
-from fastapi import HTTPException, Depends, status
+from fastapi import HTTPException, Depends, Header, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.models.user import logger
+from app.services.cache import redis_client
+from app.services.token_cache import VerifiedTokenCache
 
 load_dotenv()
 
 JWT_SECRET = os.getenv("JWT_SECRET_KEY")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+INTERNAL_SERVICE_TOKEN = os.getenv("INTERNAL_SERVICE_TOKEN")
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+
+# Revoked tokens are kept in Redis under this prefix until they would have
+# expired anyway, and announced on the channel so every replica evicts them.
+REVOKED_TOKEN_PREFIX = "revoked_token:"
+TOKEN_REVOCATION_CHANNEL = "token_revoked"
 
 security = HTTPBearer()
+token_cache = VerifiedTokenCache(max_entries=TOKEN_CACHE_MAX_ENTRIES)
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
 
 def generate_token(user: dict):
     """Generate a JWT token using user dictionary."""
@@ -23,17 +41,95 @@ def generate_token(user: dict):
     return token
 
 
-def verify_token(token):
-    """Verify the JWT token and return the user dictionary."""
+def decode_token(token):
+    """Verify the JWT token's signature and claims and return its payload."""
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user = payload.get("user")
-        return user
+        return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
     except Exception as e:
         logger.error(f"exception in verify token: {e}", exc_info=True)
         return None
 
 
+def verify_token(token):
+    """Verify the JWT token and return the user dictionary."""
+    payload = decode_token(token)
+    return payload.get("user") if payload else None
+
+
+async def authenticate_token(token: str):
+    """
+    Verify the JWT token, skipping jwt.decode for tokens this replica has
+    already verified. On a cache miss the token is decoded and checked
+    against the Redis deny-list before being cached until its `exp`.
+    If the deny-list is unreachable the token is accepted but not cached,
+    so the next request checks again.
+    """
+    digest = token_digest(token)
+    user = token_cache.get(digest)
+    if user is not None:
+        return user
+
+    payload = decode_token(token)
+    if not payload or payload.get("user") is None:
+        return None
+
+    try:
+        if await redis_client.exists(f"{REVOKED_TOKEN_PREFIX}{digest}"):
+            return None
+    except Exception as e:
+        logger.error("Token deny-list check failed, not caching token: %s", e, exc_info=True)
+        return payload["user"]
+
+    if "exp" in payload:
+        token_cache.set(digest, payload["user"], float(payload["exp"]))
+    return payload["user"]
+
+
+async def revoke_token(token: str):
+    """
+    Deny-list a token until it expires and tell every replica to drop it
+    from its verified-token cache.
+    """
+    digest = token_digest(token)
+    token_cache.delete(digest)
+
+    payload = decode_token(token)
+    if not payload or "exp" not in payload:
+        return
+
+    ttl = int(payload["exp"] - time.time())
+    if ttl <= 0:
+        return
+
+    pipeline = redis_client.pipeline(transaction=False)
+    pipeline.set(f"{REVOKED_TOKEN_PREFIX}{digest}", 1, ex=ttl)
+    pipeline.publish(TOKEN_REVOCATION_CHANNEL, digest)
+    await pipeline.execute()
+
+
+async def listen_for_token_revocations():
+    """
+    Background task that evicts revoked tokens from this replica's cache.
+    Revocations may be missed while disconnected, so the cache is cleared
+    on every (re)subscribe.
+    """
+    while True:
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(TOKEN_REVOCATION_CHANNEL)
+            token_cache.clear()
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    token_cache.delete(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Token revocation listener error, resubscribing: %s", e, exc_info=True)
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
+
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Dependency to get the current user from the JWT token."""
     try:
@@ -41,7 +137,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         if not token:
             raise HTTPException(status_code=401, detail="token missing")
 
-        user = verify_token(token)
+        user = await authenticate_token(token)
 
         if user is None:
             raise HTTPException(
@@ -60,3 +156,15 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error"
         )
+
+
+async def verify_service_token(x_service_token: str | None = Header(default=None)):
+    """Dependency for internal service-to-service routes, checked against INTERNAL_SERVICE_TOKEN."""
+    if not INTERNAL_SERVICE_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Internal service access is not configured"
+        )
+    if not x_service_token or not hmac.compare_digest(x_service_token, INTERNAL_SERVICE_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid service token")
+    return True
@@ -0,0 +1,30 @@
+import os
+import redis.asyncio as redis
+from dotenv import load_dotenv
+from app.models.user import logger
+
+load_dotenv()
+
+REDIS_HOST = os.getenv("REDIS_HOST", "redis")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+
+# Must match the api-gateway's user_pref: cache keys and invalidation channel.
+USER_PREF_CACHE_PREFIX = "user_pref:"
+USER_PREF_INVALIDATION_CHANNEL = "user_pref_invalidate"
+
+redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
+
+
+async def invalidate_user_cache(user_id: str):
+    """
+    Drops the gateway's cached copy of a user and tells every gateway
+    replica to evict its in-process copy. Failures are logged, not raised:
+    the caches still expire on their own TTL.
+    """
+    try:
+        pipeline = redis_client.pipeline(transaction=False)
+        pipeline.delete(f"{USER_PREF_CACHE_PREFIX}{user_id}")
+        pipeline.publish(USER_PREF_INVALIDATION_CHANNEL, user_id)
+        await pipeline.execute()
+    except Exception as e:
+        logger.error("Failed to invalidate cached user %s: %s", user_id, e, exc_info=True)
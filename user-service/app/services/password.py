@@ -0,0 +1,138 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import bcrypt
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+
+load_dotenv()
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "256"))
+
+
+# Module-level so they can be pickled into a ProcessPoolExecutor.
+def _hashpw(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=rounds)).decode()
+
+
+def _checkpw(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode(), hashed.encode())
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt off the event loop on a bounded worker pool.
+
+    At most `workers` operations run at once; further callers wait their
+    turn, and once `max_queue` are already waiting new ones are refused
+    with a 503 instead of piling up behind a login storm.
+    """
+
+    def __init__(
+        self,
+        rounds: int = 12,
+        workers: int = 2,
+        max_queue: int = 256,
+        executor: str = "thread"
+    ):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor: {executor}")
+        self.rounds = rounds
+        self.workers = workers
+        self.max_queue = max_queue
+        self.executor_kind = executor
+
+        self._executor: Executor | None = None
+        self._slots: asyncio.Semaphore | None = None
+
+        self.in_flight = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.total_wait_ms = 0.0
+        self.total_run_ms = 0.0
+
+    def _ensure_started(self):
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self._slots = None
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hashpw, password, self.rounds)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(_checkpw, password, hashed)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True when a stored hash was made with a different cost than BCRYPT_ROUNDS."""
+        try:
+            return int(hashed.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+
+    async def _run(self, fn, *args):
+        self._ensure_started()
+
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many password operations in progress, retry shortly",
+                headers={"Retry-After": "1"}
+            )
+
+        queued_at = time.perf_counter()
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+
+        started_at = time.perf_counter()
+        self.total_wait_ms += (started_at - queued_at) * 1000
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self.total_run_ms += (time.perf_counter() - started_at) * 1000
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.executor_kind,
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "avg_wait_ms": round(self.total_wait_ms / self.completed, 2) if self.completed else 0.0,
+            "avg_run_ms": round(self.total_run_ms / self.completed, 2) if self.completed else 0.0,
+        }
+
+
+password_hasher = PasswordHasher(
+    rounds=BCRYPT_ROUNDS,
+    workers=PASSWORD_HASH_WORKERS,
+    max_queue=PASSWORD_HASH_MAX_QUEUE,
+    executor=PASSWORD_HASH_EXECUTOR
+)
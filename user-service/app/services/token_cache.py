@@ -0,0 +1,59 @@
+import time
+from collections import OrderedDict
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of tokens that already passed signature and claims checks,
+    keyed by token digest. Each entry expires at its token's `exp`, so a
+    cached token is never honoured past the point jwt.decode would reject it.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, digest: str) -> dict | None:
+        entry = self._entries.get(digest)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        user, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[digest]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(digest)
+        self.hits += 1
+        return user
+
+    def set(self, digest: str, user: dict, expires_at: float):
+        if expires_at <= time.time():
+            return
+
+        self._entries[digest] = (user, expires_at)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, digest: str):
+        self._entries.pop(digest, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -23,7 +23,7 @@ def mock_db():
 @pytest.fixture
 def mock_current_user():
     """Fixture for mocking current authenticated user"""
-    return {"user_id": "abc123", "email": "cipher@example.com"}
+    return {"user_id": "5f0c6d7e-8a9b-4c1d-9e2f-3a4b5c6d7e8f", "email": "cipher@example.com"}
 
 
 @pytest.fixture
@@ -0,0 +1,72 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import auth
+
+
+@pytest.fixture(autouse=True)
+def jwt_secret():
+    with patch.object(auth, "JWT_SECRET", "test-secret"):
+        auth.token_cache.clear()
+        yield
+        auth.token_cache.clear()
+
+
+@pytest.fixture
+def mock_redis():
+    client = MagicMock()
+    client.exists = AsyncMock(return_value=0)
+    pipeline = MagicMock()
+    pipeline.execute = AsyncMock(return_value=[True, 1])
+    client.pipeline.return_value = pipeline
+    with patch.object(auth, "redis_client", client):
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_verified_token_is_served_from_cache(mock_redis):
+    token = auth.generate_token({"user_id": "u1", "email": "cipher@example.com"})
+
+    with patch.object(auth, "decode_token", wraps=auth.decode_token) as decode:
+        first = await auth.authenticate_token(token)
+        second = await auth.authenticate_token(token)
+
+    assert first == second == {"user_id": "u1", "email": "cipher@example.com"}
+    assert decode.call_count == 1
+    assert mock_redis.exists.await_count == 1
+    assert auth.token_cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_deny_listed_token_is_rejected_and_not_cached(mock_redis):
+    mock_redis.exists.return_value = 1
+    token = auth.generate_token({"user_id": "u1"})
+
+    assert await auth.authenticate_token(token) is None
+    assert auth.token_cache.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_revoke_token_evicts_and_deny_lists(mock_redis):
+    token = auth.generate_token({"user_id": "u1"})
+    await auth.authenticate_token(token)
+
+    await auth.revoke_token(token)
+
+    digest = auth.token_digest(token)
+    assert auth.token_cache.get(digest) is None
+    pipeline = mock_redis.pipeline.return_value
+    key, value = pipeline.set.call_args.args
+    assert key == f"{auth.REVOKED_TOKEN_PREFIX}{digest}"
+    assert 0 < pipeline.set.call_args.kwargs["ex"] <= 3600
+    pipeline.publish.assert_called_once_with(auth.TOKEN_REVOCATION_CHANNEL, digest)
+
+
+@pytest.mark.asyncio
+async def test_invalid_token_is_rejected(mock_redis):
+    assert await auth.authenticate_token("not-a-jwt") is None
+    mock_redis.exists.assert_not_awaited()
@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.password import PasswordHasher
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_round_trip():
+    hasher = PasswordHasher(rounds=4, workers=2)
+    try:
+        hashed = await hasher.hash("secret123")
+
+        assert await hasher.verify("secret123", hashed) is True
+        assert await hasher.verify("wrong", hashed) is False
+        assert hasher.stats()["completed"] == 3
+    finally:
+        hasher.shutdown()
+
+
+def test_needs_rehash_compares_cost_factor():
+    hasher = PasswordHasher(rounds=12)
+
+    assert hasher.needs_rehash("$2b$10$abcdefghijklmnopqrstuv") is True
+    assert hasher.needs_rehash("$2b$12$abcdefghijklmnopqrstuv") is False
+    assert hasher.needs_rehash("not-a-bcrypt-hash") is False
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped_and_overflow_is_rejected():
+    hasher = PasswordHasher(rounds=4, workers=1, max_queue=1)
+    release = asyncio.Event()
+
+    async def blocked(*args):
+        await release.wait()
+
+    loop = asyncio.get_running_loop()
+    original = loop.run_in_executor
+    loop.run_in_executor = lambda executor, fn, *args: asyncio.ensure_future(blocked())
+    try:
+        first = asyncio.create_task(hasher.verify("a", "b"))
+        second = asyncio.create_task(hasher.verify("a", "b"))
+        await asyncio.sleep(0)
+
+        assert hasher.in_flight == 1
+        assert hasher.queued == 1
+        with pytest.raises(HTTPException) as exc_info:
+            await hasher.verify("a", "b")
+        assert exc_info.value.status_code == 503
+        assert hasher.stats()["rejected"] == 1
+
+        release.set()
+        await asyncio.gather(first, second)
+        assert hasher.completed == 2
+    finally:
+        loop.run_in_executor = original
+        hasher.shutdown()
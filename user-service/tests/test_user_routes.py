@@ -11,7 +11,7 @@ from app.routes.user import user_router
 
 
 mock_user = {
-    "user_id": "abc123",
+    "user_id": "5f0c6d7e-8a9b-4c1d-9e2f-3a4b5c6d7e8f",
     "name": "Cipher",
     "email": "cipher@example.com",
     "push_token": "token123",
@@ -22,13 +22,13 @@ mock_user = {
 
 
 @pytest.mark.asyncio
-@patch("app.routes.user.get_user", new_callable=AsyncMock)
+@patch("app.routes.user.get_user_by_email", new_callable=AsyncMock)
 @patch("app.routes.user.create_user", new_callable=AsyncMock)
 async def test_create_user_success(mock_create_user, mock_get_user, async_client):
     mock_get_user.return_value = None
     mock_create_user.return_value = mock_user
 
-    response = await async_client.post("/users/", json={
+    response = await async_client.post("/api/v1/users/", json={
         "name": "Cipher",
         "email": "cipher@example.com",
         "password": "secret123",
@@ -44,13 +44,13 @@ async def test_create_user_success(mock_create_user, mock_get_user, async_client
 
 
 @pytest.mark.asyncio
-@patch("app.routes.user.get_user", new_callable=AsyncMock)
+@patch("app.routes.user.get_user_by_email", new_callable=AsyncMock)
 @patch("app.routes.user.generate_token", return_value="fake_jwt_token")
 @patch("bcrypt.checkpw", return_value=True)
 async def test_login_success(mock_checkpw, mock_token, mock_get_user, async_client):
     mock_get_user.return_value = mock_user
 
-    response = await async_client.post("/users/login", json={
+    response = await async_client.post("/api/v1/users/login", json={
         "email": "cipher@example.com",
         "password": "secret123"
     })
@@ -62,28 +62,48 @@ async def test_login_success(mock_checkpw, mock_token, mock_get_user, async_clie
 
 
 @pytest.mark.asyncio
-@patch("app.routes.user.get_user", new_callable=AsyncMock)
-@patch("app.routes.user.get_current_user", return_value={"user_id": "abc123"})
+@patch("app.routes.user.rehash_password", new_callable=AsyncMock)
+@patch("app.routes.user.get_user_by_email", new_callable=AsyncMock)
+@patch("app.routes.user.generate_token", return_value="fake_jwt_token")
+@patch("bcrypt.checkpw", return_value=True)
+async def test_login_rehashes_outdated_cost(mock_checkpw, mock_token, mock_get_user, mock_rehash, async_client):
+    outdated = mock_user.copy()
+    outdated["password"] = "$2b$10$hashhere"
+    mock_get_user.return_value = outdated
+
+    response = await async_client.post("/api/v1/users/login", json={
+        "email": "cipher@example.com",
+        "password": "secret123"
+    })
+
+    assert response.status_code == status.HTTP_200_OK
+    mock_rehash.assert_awaited_once_with(outdated["user_id"], "secret123", "$2b$10$hashhere")
+
+
+@pytest.mark.asyncio
+@patch("app.routes.user.get_user_by_id", new_callable=AsyncMock)
+@patch("app.routes.user.get_current_user", return_value={"user_id": "5f0c6d7e-8a9b-4c1d-9e2f-3a4b5c6d7e8f"})
 async def test_get_user_success(mock_current_user, mock_get_user, async_client):
     mock_get_user.return_value = mock_user
 
-    response = await async_client.get("/users/abc123")
+    response = await async_client.get("/api/v1/users/5f0c6d7e-8a9b-4c1d-9e2f-3a4b5c6d7e8f")
 
     assert response.status_code == status.HTTP_200_OK
     data = response.json()
     assert data["success"] is True
-    assert data["data"]["user_id"] == "abc123"
+    assert data["data"]["user_id"] == "5f0c6d7e-8a9b-4c1d-9e2f-3a4b5c6d7e8f"
 
 
 @pytest.mark.asyncio
+@patch("app.routes.user.invalidate_user_cache", new_callable=AsyncMock)
 @patch("app.routes.user.update_user", new_callable=AsyncMock)
-@patch("app.routes.user.get_current_user", return_value={"user_id": "abc123"})
-async def test_update_user_success(mock_current_user, mock_update_user, async_client):
+@patch("app.routes.user.get_current_user", return_value={"user_id": "5f0c6d7e-8a9b-4c1d-9e2f-3a4b5c6d7e8f"})
+async def test_update_user_success(mock_current_user, mock_update_user, mock_invalidate, async_client):
     updated_user = mock_user.copy()
     updated_user["name"] = "Cipher Updated"
     mock_update_user.return_value = updated_user
 
-    response = await async_client.put("/users/abc123", json={
+    response = await async_client.put("/api/v1/users/5f0c6d7e-8a9b-4c1d-9e2f-3a4b5c6d7e8f", json={
         "name": "Cipher Updated",
         "preferences": {"email": False, "push": True}
     })
@@ -92,3 +112,38 @@ async def test_update_user_success(mock_current_user, mock_update_user, async_cl
     data = response.json()
     assert data["success"] is True
     assert data["data"]["name"] == "Cipher Updated"
+    mock_invalidate.assert_awaited_once_with("5f0c6d7e-8a9b-4c1d-9e2f-3a4b5c6d7e8f")
+
+
+@pytest.mark.asyncio
+@patch("app.services.auth.INTERNAL_SERVICE_TOKEN", "service-secret")
+@patch("app.routes.user.get_user_preferences_by_ids", new_callable=AsyncMock)
+async def test_get_users_batch_success(mock_get_user_preferences_by_ids, async_client):
+    record = {k: v for k, v in mock_user.items() if k != "password"}
+    mock_get_user_preferences_by_ids.return_value = [record]
+
+    response = await async_client.post(
+        "/api/v1/users/batch",
+        json={"user_ids": ["5f0c6d7e-8a9b-4c1d-9e2f-3a4b5c6d7e8f", "missing1", "5f0c6d7e-8a9b-4c1d-9e2f-3a4b5c6d7e8f"]},
+        headers={"X-Service-Token": "service-secret"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()["data"]
+    assert [user["user_id"] for user in data["users"]] == ["5f0c6d7e-8a9b-4c1d-9e2f-3a4b5c6d7e8f"]
+    assert set(data["users"][0]) == {"user_id", "email", "push_token", "preferences"}
+    assert data["missing"] == ["missing1"]
+    mock_get_user_preferences_by_ids.assert_awaited_once()
+    assert mock_get_user_preferences_by_ids.call_args.args[1] == ["5f0c6d7e-8a9b-4c1d-9e2f-3a4b5c6d7e8f", "missing1"]
+
+
+@pytest.mark.asyncio
+@patch("app.services.auth.INTERNAL_SERVICE_TOKEN", "service-secret")
+async def test_get_users_batch_rejects_bad_service_token(async_client):
+    response = await async_client.post(
+        "/api/v1/users/batch",
+        json={"user_ids": ["5f0c6d7e-8a9b-4c1d-9e2f-3a4b5c6d7e8f"]},
+        headers={"X-Service-Token": "wrong"}
+    )
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN